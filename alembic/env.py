@@ -1,10 +1,11 @@
 from logging.config import fileConfig
+
 from sqlalchemy import engine_from_config, pool
-from sqlmodel import SQLModel
-from alembic import context
 
-from core.models import Device, RawPacket, DecodedEvent, CaptureSession, AlertRule
+from alembic import context
 from core.db import get_engine
+from core.models import AlertRule, CaptureSession, DecodedEvent, Device, RawPacket
+from sqlmodel import SQLModel
 
 config = context.config
 fileConfig(config.config_file_name)
@@ -19,7 +20,12 @@ def run_migrations_offline():
 
 
 def run_migrations_online():
-    connectable = get_engine()
+    # the app's writer pool holds one connection; migrations open their own
+    connectable = engine_from_config(
+        {"sqlalchemy.url": str(get_engine().url)},
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
 
     with connectable.connect() as connection:
         context.configure(connection=connection, target_metadata=target_metadata)
@@ -0,0 +1,115 @@
+"""Move JSON ``device.rssi_history`` into an append-only ``sighting`` table.
+
+Histories are converted in batches, each committed on its own. A converted
+device has its ``rssi_history`` cleared, so re-running an interrupted upgrade
+picks up where the previous run stopped.
+"""
+
+import json
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+device = sa.table(
+    'device',
+    sa.column('mac', sa.String()),
+    sa.column('rssi_history', sa.String()),
+)
+sighting = sa.table(
+    'sighting',
+    sa.column('mac', sa.String()),
+    sa.column('ts', sa.DateTime()),
+    sa.column('rssi', sa.Integer()),
+)
+
+
+def _parse_history(raw):
+    try:
+        entries = json.loads(raw or '[]')
+    except ValueError:
+        return []
+    rows = []
+    for entry in entries:
+        try:
+            rows.append((datetime.fromisoformat(entry['t']), int(entry['rssi'])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return rows
+
+
+def upgrade():
+    if 'sighting' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'sighting',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('mac', sa.String(), nullable=False),
+            sa.Column('ts', sa.DateTime(), nullable=False),
+            sa.Column('rssi', sa.Integer(), nullable=False),
+        )
+        op.create_index('ix_sighting_mac_ts', 'sighting', ['mac', 'ts'])
+
+    with op.get_context().autocommit_block():
+        engine = op.get_bind().engine
+        last_mac = ''
+        while True:
+            with engine.begin() as conn:
+                batch = conn.execute(
+                    sa.select(device.c.mac, device.c.rssi_history)
+                    .where(device.c.mac > last_mac)
+                    .where(device.c.rssi_history.is_not(None))
+                    .order_by(device.c.mac)
+                    .limit(BATCH_SIZE)
+                ).all()
+                if not batch:
+                    break
+                last_mac = batch[-1][0]
+                rows = [
+                    {'mac': mac, 'ts': ts, 'rssi': rssi}
+                    for mac, raw in batch
+                    for ts, rssi in _parse_history(raw)
+                ]
+                if rows:
+                    conn.execute(sighting.insert(), rows)
+                conn.execute(
+                    device.update()
+                    .where(device.c.mac.in_([mac for mac, _ in batch]))
+                    .values(rssi_history=None)
+                )
+
+    with op.batch_alter_table('device') as batch_op:
+        batch_op.drop_column('rssi_history')
+
+
+def downgrade():
+    with op.batch_alter_table('device') as batch_op:
+        batch_op.add_column(sa.Column('rssi_history', sa.String()))
+
+    bind = op.get_bind()
+    macs = [mac for (mac,) in bind.execute(sa.select(device.c.mac))]
+    for i in range(0, len(macs), BATCH_SIZE):
+        chunk = macs[i:i + BATCH_SIZE]
+        histories = {}
+        for mac, ts, rssi in bind.execute(
+            sa.select(sighting.c.mac, sighting.c.ts, sighting.c.rssi)
+            .where(sighting.c.mac.in_(chunk))
+            .order_by(sighting.c.mac, sighting.c.ts)
+        ):
+            histories.setdefault(mac, []).append({'t': ts.isoformat(), 'rssi': rssi})
+        for mac, history in histories.items():
+            bind.execute(
+                device.update()
+                .where(device.c.mac == mac)
+                .values(rssi_history=json.dumps(history))
+            )
+
+    op.drop_index('ix_sighting_mac_ts', table_name='sighting')
+    op.drop_table('sighting')
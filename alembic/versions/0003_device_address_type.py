@@ -0,0 +1,20 @@
+"""Record the Bluetooth address type of each device."""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('device') as batch_op:
+        batch_op.add_column(sa.Column('address_type', sa.String()))
+
+
+def downgrade():
+    with op.batch_alter_table('device') as batch_op:
+        batch_op.drop_column('address_type')
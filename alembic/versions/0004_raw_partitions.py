@@ -0,0 +1,26 @@
+"""Catalog of time-partitioned raw packet files."""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rawpartition',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('first_ts', sa.DateTime()),
+        sa.Column('last_ts', sa.DateTime()),
+    )
+
+
+def downgrade():
+    op.drop_table('rawpartition')
@@ -0,0 +1,40 @@
+"""Keep sniffer metadata on raw packets and link them to capture sessions."""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rawpacket') as batch_op:
+        batch_op.add_column(sa.Column('access_addr', sa.String()))
+        batch_op.add_column(sa.Column('handle', sa.Integer()))
+        batch_op.add_column(sa.Column('pdu_type', sa.String()))
+        batch_op.add_column(
+            sa.Column(
+                'session_id',
+                sa.Integer(),
+                sa.ForeignKey('capturesession.id', name='fk_rawpacket_session'),
+            )
+        )
+    with op.batch_alter_table('capturesession') as batch_op:
+        batch_op.add_column(sa.Column('backend', sa.String()))
+        batch_op.add_column(
+            sa.Column('packets', sa.Integer(), nullable=False, server_default='0')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('capturesession') as batch_op:
+        batch_op.drop_column('packets')
+        batch_op.drop_column('backend')
+    with op.batch_alter_table('rawpacket') as batch_op:
+        batch_op.drop_column('session_id')
+        batch_op.drop_column('pdu_type')
+        batch_op.drop_column('handle')
+        batch_op.drop_column('access_addr')
@@ -0,0 +1,16 @@
+"""Index devices by ``(last_seen, mac)`` for keyset pagination."""
+
+from alembic import op
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_device_last_seen_mac', 'device', ['last_seen', 'mac'])
+
+
+def downgrade():
+    op.drop_index('ix_device_last_seen_mac', table_name='device')
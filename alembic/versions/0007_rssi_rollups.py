@@ -0,0 +1,73 @@
+"""RSSI rollup tables at 1-minute and 1-hour resolution.
+
+Existing sightings are folded into both tables so trends cover the data
+collected before the upgrade. The backfill walks ``ix_sighting_mac_ts`` in
+batches of MACs, each committed on its own, so the write lock is never held
+for the whole table.
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+ROLLUPS = {
+    'rssiminute': '%Y-%m-%d %H:%M:00.000000',
+    'rssihour': '%Y-%m-%d %H:00:00.000000',
+}
+
+
+def upgrade():
+    for name, bucket in ROLLUPS.items():
+        op.create_table(
+            name,
+            sa.Column('mac', sa.String(), primary_key=True),
+            sa.Column('bucket', sa.DateTime(), primary_key=True),
+            sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('min_rssi', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('max_rssi', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('sum_rssi', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('sum_sq', sa.Integer(), nullable=False, server_default='0'),
+        )
+        op.create_index(f'ix_{name}_bucket', name, ['bucket'])
+
+    with op.get_context().autocommit_block():
+        engine = op.get_bind().engine
+        last_mac = ''
+        while True:
+            with engine.begin() as conn:
+                macs = conn.execute(
+                    sa.text(
+                        "SELECT DISTINCT mac FROM sighting WHERE mac > :last "
+                        "ORDER BY mac LIMIT :limit"
+                    ),
+                    {'last': last_mac, 'limit': BATCH_SIZE},
+                ).scalars().all()
+                if not macs:
+                    break
+                last_mac = macs[-1]
+                for name, bucket in ROLLUPS.items():
+                    conn.execute(
+                        sa.text(
+                            f"INSERT INTO {name} "
+                            "(mac, bucket, count, min_rssi, max_rssi, sum_rssi, "
+                            "sum_sq) "
+                            f"SELECT mac, strftime('{bucket}', ts) AS b, COUNT(*), "
+                            "MIN(rssi), MAX(rssi), SUM(rssi), SUM(rssi * rssi) "
+                            "FROM sighting WHERE mac BETWEEN :first AND :last "
+                            "GROUP BY mac, b"
+                        ),
+                        {'first': macs[0], 'last': last_mac},
+                    )
+
+
+def downgrade():
+    for name in ROLLUPS:
+        op.drop_index(f'ix_{name}_bucket', table_name=name)
+        op.drop_table(name)
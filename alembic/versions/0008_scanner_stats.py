@@ -0,0 +1,32 @@
+"""Saved dashboard counters and hourly activity."""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scannerstats',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('total_devices', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_visits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_events', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_detection', sa.DateTime()),
+    )
+    op.create_table(
+        'activityhour',
+        sa.Column('hour', sa.DateTime(), primary_key=True),
+        sa.Column('unique_devices', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('visits', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade():
+    op.drop_table('activityhour')
+    op.drop_table('scannerstats')
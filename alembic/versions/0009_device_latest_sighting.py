@@ -0,0 +1,83 @@
+"""Denormalised latest-sighting columns on ``device``.
+
+Existing devices are backfilled from ``sighting`` in batches of devices,
+each committed on its own; the correlated subqueries walk
+``ix_sighting_mac_ts`` so every device costs a few index probes.
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+device = sa.table(
+    'device',
+    sa.column('mac', sa.String()),
+    sa.column('last_rssi', sa.Integer()),
+    sa.column('sighting_count', sa.Integer()),
+    sa.column('max_rssi', sa.Integer()),
+)
+sighting = sa.table(
+    'sighting',
+    sa.column('mac', sa.String()),
+    sa.column('ts', sa.DateTime()),
+    sa.column('rssi', sa.Integer()),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('device') as batch_op:
+        batch_op.add_column(sa.Column('last_rssi', sa.Integer()))
+        batch_op.add_column(sa.Column('last_name', sa.String()))
+        batch_op.add_column(
+            sa.Column(
+                'sighting_count', sa.Integer(), nullable=False, server_default='0'
+            )
+        )
+        batch_op.add_column(sa.Column('max_rssi', sa.Integer()))
+
+    own = sighting.c.mac == device.c.mac
+    values = {
+        'last_rssi': sa.select(sighting.c.rssi)
+        .where(own)
+        .order_by(sighting.c.ts.desc())
+        .limit(1)
+        .scalar_subquery(),
+        'sighting_count': sa.select(sa.func.count()).where(own).scalar_subquery(),
+        'max_rssi': sa.select(sa.func.max(sighting.c.rssi))
+        .where(own)
+        .scalar_subquery(),
+    }
+    with op.get_context().autocommit_block():
+        engine = op.get_bind().engine
+        last_mac = ''
+        while True:
+            with engine.begin() as conn:
+                macs = conn.execute(
+                    sa.select(device.c.mac)
+                    .where(device.c.mac > last_mac)
+                    .order_by(device.c.mac)
+                    .limit(BATCH_SIZE)
+                ).scalars().all()
+                if not macs:
+                    break
+                last_mac = macs[-1]
+                conn.execute(
+                    device.update()
+                    .where(device.c.mac.between(macs[0], macs[-1]))
+                    .values(values)
+                )
+
+
+def downgrade():
+    with op.batch_alter_table('device') as batch_op:
+        batch_op.drop_column('max_rssi')
+        batch_op.drop_column('sighting_count')
+        batch_op.drop_column('last_name')
+        batch_op.drop_column('last_rssi')
@@ -0,0 +1,32 @@
+"""Composite indexes behind the ``/devices`` search filters."""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_device_vendor_last_seen',
+        'device',
+        [sa.text('vendor COLLATE NOCASE'), 'last_seen'],
+    )
+    op.create_index(
+        'ix_device_address_type_last_seen',
+        'device',
+        ['address_type', 'last_seen', 'mac'],
+    )
+    op.create_index(
+        'ix_device_last_rssi_last_seen', 'device', ['last_rssi', 'last_seen']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_device_last_rssi_last_seen', table_name='device')
+    op.drop_index('ix_device_address_type_last_seen', table_name='device')
+    op.drop_index('ix_device_vendor_last_seen', table_name='device')
@@ -1,14 +1,45 @@
+import logging
+import threading
+
 import uvicorn
+
+import config
 from api.app import app
-from plugins import load_plugins
+from core.db import init_db
+from core.scanner import STATS
 from mqtt_client import setup as mqtt_setup
-import config
+from plugins import load_plugins
+
+logger = logging.getLogger(__name__)
+
+
+def _follow_stats(stop: threading.Event) -> threading.Thread:
+    """Serve the counters the scanner saves; there is no scanner here."""
+    # the web server may start before the scanner ever created the tables
+    init_db()
+    try:
+        STATS.load()
+    except Exception as exc:
+        logger.error("Loading stats failed: %s", exc)
+    thread = threading.Thread(target=STATS.follow, args=(stop,), daemon=True)
+    thread.start()
+    return thread
 
 
 def main():
     load_plugins()
     mqtt_setup()
-    uvicorn.run(app, host=config.WEB_HOST, port=config.WEB_PORT)
+    stop = threading.Event()
+    _follow_stats(stop)
+    try:
+        uvicorn.run(
+            app,
+            host=config.WEB_HOST,
+            port=config.WEB_PORT,
+            ws_per_message_deflate=config.WS_PER_MESSAGE_DEFLATE,
+        )
+    finally:
+        stop.set()
 
 
 if __name__ == "__main__":
@@ -1,11 +1,25 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import JSONResponse, Response
+
 from api.routes import router
 from api.websocket import websocket_endpoint
+from core.async_db import ClientDisconnected, QueryTimeout
 
 app = FastAPI()
 app.include_router(router)
 
 
+@app.exception_handler(QueryTimeout)
+async def query_timeout(request: Request, exc: QueryTimeout):
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected(request: Request, exc: ClientDisconnected):
+    # nobody is listening any more; nginx's "client closed request"
+    return Response(status_code=499)
+
+
 @app.websocket("/ws")
 async def ws(ws: WebSocket):
     await websocket_endpoint(ws)
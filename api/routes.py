@@ -1,12 +1,46 @@
-from fastapi import APIRouter, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Form, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
+
 import config
+from core.async_db import STREAM_SLOTS, iterate_read, run_read
+from core.cache import ResponseCache
+from core.db import get_device_page
+from core.exporter import MEDIA_TYPES, STREAM_FORMATS, stream_export
+from core.rollups import query_rssi
+from core.scanner import STATE, STATS
+from core.search import DeviceFilter, search_devices
 from external_api import shodan_lookup, wigle_lookup
-from core.db import get_devices
 
 router = APIRouter()
 templates = Jinja2Templates(directory="web/templates")
+RESPONSE_CACHE = ResponseCache()
+
+
+class _ExportResponse(StreamingResponse):
+    """Streaming export that always closes its reader and frees its slot.
+
+    This holds even when the client goes away before the body is read.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                STREAM_SLOTS.release()
 
 
 @router.get("/ping")
@@ -48,5 +82,146 @@ async def wigle(ssid: str):
 
 
 @router.get("/export")
-async def export(limit: int = 100):
-    return JSONResponse(get_devices(limit))
+async def export(
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fmt: Optional[str] = Query(None, alias="format"),
+    gzip: bool = False,
+):
+    """Return one page of devices, or stream every device with ``format``.
+
+    Pages carry ``X-Next-Cursor`` for the next request and an ``ETag``; they
+    are served from the response cache until new data is written. With
+    ``format`` set to ``json``, ``jsonl`` or ``csv`` the whole export is
+    streamed in chunks; with ``gzip`` it is sent as a compressed ``.gz``
+    attachment. At most ``API_EXPORT_STREAMS`` exports stream at once;
+    others get a 503.
+    """
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format {fmt}")
+        # a gzip export is a .gz file download, not a transfer encoding:
+        # clients would otherwise decode it and save plain text as .gz
+        filename = f"devices.{fmt}.gz" if gzip else f"devices.{fmt}"
+        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+        if not STREAM_SLOTS.acquire(blocking=False):
+            raise HTTPException(
+                status_code=503,
+                detail="Too many concurrent exports",
+                headers={"Retry-After": "5"},
+            )
+        return _ExportResponse(
+            iterate_read(stream_export(fmt, limit, gzip)),
+            media_type="application/gzip" if gzip else MEDIA_TYPES[fmt],
+            headers=headers,
+        )
+    limit = limit or 100
+
+    def render():
+        rows, next_cursor = get_device_page(limit, cursor)
+        headers = {}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+            headers["Link"] = f'<?limit={limit}&cursor={next_cursor}>; rel="next"'
+        return JSONResponse(jsonable_encoder(rows)).body, "application/json", headers
+
+    try:
+        status, cached = await run_read(
+            RESPONSE_CACHE.respond,
+            f"export?limit={limit}&cursor={cursor or ''}",
+            request.headers.get("if-none-match"),
+            render,
+            request=request,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if status == 304:
+        return Response(status_code=304, headers={"ETag": cached.etag})
+    headers = {**cached.headers, "ETag": cached.etag}
+    return Response(cached.body, media_type=cached.media_type, headers=headers)
+
+
+@router.get("/devices")
+async def devices(
+    request: Request,
+    vendor: Optional[str] = None,
+    rssi_min: Optional[int] = None,
+    rssi_max: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    within: Optional[int] = Query(None, ge=1),
+    address_type: Optional[str] = None,
+    mac_prefix: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Search devices, newest first.
+
+    ``vendor`` and ``mac_prefix`` match prefixes (vendor case-insensitively),
+    ``rssi_min``/``rssi_max`` bound the latest RSSI, ``since``/``until`` or
+    ``within`` (seconds) bound ``last_seen`` and ``address_type`` is one of
+    the address types or ``random`` for any random sub-type.
+    """
+    if within is not None:
+        window = datetime.now() - timedelta(seconds=within)
+        since = max(since, window) if since else window
+    criteria = DeviceFilter(
+        vendor=vendor,
+        rssi_min=rssi_min,
+        rssi_max=rssi_max,
+        since=since,
+        until=until,
+        address_type=address_type,
+        mac_prefix=mac_prefix,
+    )
+    try:
+        rows = await run_read(search_devices, criteria, limit, request=request)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return JSONResponse(jsonable_encoder(rows))
+
+
+@router.get("/devices/{mac}/rssi")
+async def device_rssi(
+    request: Request,
+    mac: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: int = 60,
+):
+    """RSSI statistics per ``resolution`` seconds, from the cheapest tier.
+
+    ``start`` defaults to one day ago and ``end`` to now.
+    """
+    now = datetime.now()
+    start = start or now - timedelta(days=1)
+    try:
+        tier, buckets = await run_read(
+            query_rssi, mac, start, end, resolution, now, request=request
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return JSONResponse(
+        jsonable_encoder({"mac": mac, "tier": tier, "buckets": buckets})
+    )
+
+
+@router.get("/api/stats")
+async def stats():
+    """Dashboard counters, served from memory."""
+    return JSONResponse(STATS.snapshot())
+
+
+@router.get("/api/cache")
+async def cache_stats():
+    """Response cache hit ratio of this process."""
+    return await run_read(RESPONSE_CACHE.snapshot)
+
+
+@router.get("/live")
+async def live(limit: int = 100, history: bool = False):
+    return {
+        "devices": [s.to_dict(history) for s in STATE.recent(limit)],
+        "memory": STATE.memory_usage(),
+    }
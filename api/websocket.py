@@ -1,18 +1,136 @@
+"""WebSocket feed of the devices the scanner is seeing.
+
+A client first receives a ``snapshot`` frame with every device in
+``core.scanner.STATE``. After that, bus events are coalesced per MAC and
+sent as at most one ``delta`` frame per ``WS_TICK`` seconds, holding only
+the devices that changed, and the MACs that were lost, since the previous
+frame. Frames wait in a bounded per-client buffer; when a slow client lets
+it fill up, or its bus subscription had to drop events, pending frames are
+discarded and a fresh snapshot is sent instead.
+"""
+
 import asyncio
+import json
 import logging
+from typing import Dict, Optional
+
 from fastapi import WebSocket
-from core.scanner import EVENT_BUS
+
+from config import WS_SEND_BUFFER, WS_TICK
+from core.lifecycle import LOST
+from core.scanner import EVENT_BUS, STATE
 
 logger = logging.getLogger(__name__)
 
 
+class DeltaFeed:
+    """Turn bus events into snapshot and coalesced delta frames for one client."""
+
+    def __init__(
+        self, bus, state, tick: float = WS_TICK, buffer: int = WS_SEND_BUFFER
+    ) -> None:
+        self.state = state
+        self.tick = tick
+        self.seq = 0
+        self.sent = 0
+        self.snapshots = 0
+        self.resyncs = 0
+        self._sub = bus.subscribe()
+        self._dropped = 0
+        self._outbox: "asyncio.Queue[dict]" = asyncio.Queue(buffer)
+
+    def snapshot(self) -> dict:
+        self.seq += 1
+        self.snapshots += 1
+        return {
+            "type": "snapshot",
+            "seq": self.seq,
+            "devices": [s.to_dict() for s in self.state.recent()],
+        }
+
+    def delta(self) -> Optional[dict]:
+        """Coalesce queued events; ``None`` when nothing changed."""
+        changed: Dict[str, dict] = {}
+        while True:
+            try:
+                event = self._sub.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if event.get("address"):
+                changed[event["address"]] = event
+        if self._sub.dropped != self._dropped:
+            # events were lost, so a delta would be incomplete
+            self._dropped = self._sub.dropped
+            self.resyncs += 1
+            return self.snapshot()
+        if not changed:
+            return None
+        devices, lost = [], []
+        for mac, event in changed.items():
+            if event.get("event") == LOST:
+                lost.append(mac)
+                continue
+            state = self.state.get(mac)
+            devices.append(
+                state.to_dict()
+                if state is not None
+                else {"mac": mac, "name": event.get("name"), "rssi": event.get("rssi")}
+            )
+        self.seq += 1
+        return {"type": "delta", "seq": self.seq, "devices": devices, "lost": lost}
+
+    def push(self, frame: dict) -> None:
+        """Queue a frame, collapsing the backlog into a snapshot when full."""
+        if self._outbox.full():
+            while not self._outbox.empty():
+                self._outbox.get_nowait()
+            self.resyncs += 1
+            if frame["type"] != "snapshot":
+                frame = self.snapshot()
+        self._outbox.put_nowait(frame)
+
+    async def produce(self) -> None:
+        self.push(self.snapshot())
+        while True:
+            await asyncio.sleep(self.tick)
+            frame = self.delta()
+            if frame is not None:
+                self.push(frame)
+
+    async def send(self, ws) -> None:
+        while True:
+            frame = await self._outbox.get()
+            await ws.send_text(json.dumps(frame, default=str))
+            self.sent += 1
+
+    def close(self) -> None:
+        self._sub.close()
+
+    def stats(self) -> dict:
+        return {
+            "seq": self.seq,
+            "sent": self.sent,
+            "snapshots": self.snapshots,
+            "resyncs": self.resyncs,
+            "buffered": self._outbox.qsize(),
+            "subscription": self._sub.stats(),
+        }
+
+
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
+    feed = DeltaFeed(EVENT_BUS, STATE, WS_TICK, WS_SEND_BUFFER)
+    tasks = [
+        asyncio.ensure_future(feed.produce()),
+        asyncio.ensure_future(feed.send(ws)),
+    ]
     try:
-        while True:
-            event = await EVENT_BUS.get()
-            await ws.send_json(event)
-    except asyncio.CancelledError:
-        pass
+        # frames go out from the tasks; the endpoint only waits for the client
+        # to go away so it can stop them straight away
+        while (await ws.receive())["type"] != "websocket.disconnect":
+            pass
     finally:
-        await ws.close()
+        for task in tasks:
+            task.cancel()
+        feed.close()
+        logger.debug("WebSocket feed closed: %s", feed.stats())
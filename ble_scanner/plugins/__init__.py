@@ -23,12 +23,12 @@ from typing import AsyncIterator, Dict, Optional, Set, Type
 __all__ = [
     "RawPacket",
     "RadioBackend",
-
     "BlueZBackend",
     "UbertoothBackend",
     "NrfBackend",
     "BtlejackBackend",
     "get_backend",
+    "parse_sniffer_line",
 ]
 
 
@@ -41,6 +41,7 @@ class RawPacket:
     channel: Optional[int]
     rssi: Optional[int]
     address: Optional[str] = None
+    address_type: Optional[str] = None
     access_addr: Optional[str] = None
     handle: Optional[int] = None
     pdu_type: Optional[str] = None
@@ -70,22 +71,10 @@ _BACKENDS: Dict[str, Type[RadioBackend]] = {}
 
 def get_backend(name: str) -> Optional[Type[RadioBackend]]:
     """Return backend class by name."""
-
-
-    modules: Dict[str, str] = {
-        "bluez": "ble_scanner.plugins.bluez",
-        "ubertooth": "ble_scanner.plugins.ubertooth",
-        "nrf": "ble_scanner.plugins.nrf",
-        "btlejack": "ble_scanner.plugins.btlejack",
-    }
-    module_name = modules.get(name.lower())
-
     key = name.lower()
     if key in _BACKENDS:
         return _BACKENDS[key]
-
     module_name = _MODULES.get(key)
-
     if module_name is None:
         return None
     module = importlib.import_module(module_name)
@@ -94,11 +83,61 @@ def get_backend(name: str) -> Optional[Type[RadioBackend]]:
     return backend
 
 
+_FIELDS = {
+    "ch": "channel",
+    "channel": "channel",
+    "aa": "access_addr",
+    "access_addr": "access_addr",
+    "phy": "phy",
+    "handle": "handle",
+    "pdu": "pdu_type",
+    "pdu_type": "pdu_type",
+    "type": "address_type",
+    "data": "payload",
+    "payload": "payload",
+}
 
 
-from .bluez import Backend as BlueZBackend
-from .ubertooth import Backend as UbertoothBackend
-from .nrf import Backend as NrfBackend
-from .btlejack import Backend as BtlejackBackend
-
+def parse_sniffer_line(line: str, phy: str = "LE1M") -> Optional[RawPacket]:
+    """Parse ``ADDRESS [key=value ...] RSSI`` as printed by sniffer tools.
 
+    Recognised keys are ``ch``, ``aa``, ``phy``, ``handle``, ``pdu``,
+    ``type`` and ``data`` (hex payload). Without ``data`` the raw line is
+    kept as the payload so nothing captured is lost.
+    """
+    parts = line.strip().split()
+    if len(parts) < 2:
+        return None
+    try:
+        rssi = int(parts[-1])
+    except ValueError:
+        return None
+    fields: Dict[str, object] = {"phy": phy}
+    for token in parts[1:-1]:
+        key, sep, value = token.partition("=")
+        name = _FIELDS.get(key.lower())
+        if not sep or name is None:
+            continue
+        try:
+            if name in ("channel", "handle"):
+                fields[name] = int(value, 0)
+            elif name == "payload":
+                fields[name] = bytes.fromhex(value)
+            else:
+                fields[name] = value
+        except ValueError:
+            continue
+    fields.setdefault("payload", line.strip().encode())
+    return RawPacket(
+        timestamp=datetime.now(),
+        channel=fields.pop("channel", None),
+        rssi=rssi,
+        address=parts[0],
+        **fields,
+    )
+
+
+from .bluez import Backend as BlueZBackend  # noqa: E402
+from .btlejack import Backend as BtlejackBackend  # noqa: E402
+from .nrf import Backend as NrfBackend  # noqa: E402
+from .ubertooth import Backend as UbertoothBackend  # noqa: E402
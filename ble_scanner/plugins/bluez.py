@@ -20,6 +20,9 @@ from typing import AsyncIterator
 
 from bleak import BleakScanner
 
+from core.address import reported_address_type
+from core.stream import DROP_OLDEST, AdvertisementStream
+
 from . import RadioBackend, RawPacket
 
 
@@ -29,10 +32,23 @@ class Backend(RadioBackend):
     name = "bluez"
     capabilities = {"advertising"}
 
-    def __init__(self, timeout: int = 5) -> None:
+    def __init__(
+        self,
+        timeout: int = 5,
+        stream: bool = False,
+        queue_size: int = 1000,
+        overflow: str = DROP_OLDEST,
+    ) -> None:
         self.timeout = timeout
+        self.stream = stream
+        self.queue_size = queue_size
+        self.overflow = overflow
 
     async def scan(self) -> AsyncIterator[RawPacket]:
+        if self.stream:
+            async for packet in self._scan_stream():
+                yield packet
+            return
         while True:
             devices = await BleakScanner.discover(timeout=self.timeout)
             now = datetime.now()
@@ -43,6 +59,25 @@ class Backend(RadioBackend):
                     channel=None,
                     rssi=dev.rssi,
                     address=dev.address,
+                    address_type=reported_address_type(dev),
                     payload=b"",
                 )
             await asyncio.sleep(0)
+
+    async def _scan_stream(self) -> AsyncIterator[RawPacket]:
+        """Yield every advertisement from a long-lived scanner."""
+        async with AdvertisementStream(
+            self.queue_size, self.overflow, scanner_factory=BleakScanner
+        ) as stream:
+            while True:
+                adv = await stream.get()
+                payload = b"".join(adv.manufacturer_data.values())
+                yield RawPacket(
+                    timestamp=datetime.fromtimestamp(adv.timestamp),
+                    phy="LE1M",
+                    channel=None,
+                    rssi=adv.rssi,
+                    address=adv.address,
+                    address_type=reported_address_type(adv.device),
+                    payload=payload,
+                )
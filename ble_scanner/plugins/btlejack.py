@@ -1,34 +1,31 @@
-
-from __future__ import annotations
-
-import asyncio
-from datetime import datetime
-from typing import AsyncIterator
-
 """Btlejack radio backend."""
 
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
 from __future__ import annotations
 
 import asyncio
-import re
-from datetime import datetime
-from typing import AsyncIterator, Iterable, Optional
-
+from typing import AsyncIterator
 
-from . import RadioBackend, RawPacket
+from . import RadioBackend, RawPacket, parse_sniffer_line
 
 
 class Backend(RadioBackend):
-
-    """BtleJack implementation of :class:`RadioBackend`."""
-
     """Btlejack implementation of :class:`RadioBackend`."""
 
-
     name = "btlejack"
     capabilities = {"advertising"}
 
-
     def __init__(self, command: str = "btlejack") -> None:
         self.command = command
 
@@ -41,54 +38,10 @@ class Backend(RadioBackend):
         assert proc.stdout is not None
         try:
             async for raw in proc.stdout:
-                line = raw.decode().strip()
-                if not line:
-                    continue
-                parts = line.split()
-                if len(parts) < 2:
-                    continue
-                addr, rssi = parts[0], int(parts[-1])
-
-    def __init__(self, command: Iterable[str] | None = None) -> None:
-        self.command = list(command) if command else ["btlejack", "-f"]
-
-    def _parse_line(self, line: str) -> tuple[Optional[str], Optional[int]]:
-        match = re.search(r"([0-9A-Fa-f:]{11,17}).*?(-?\d+)", line)
-        if match:
-            return match.group(1), int(match.group(2))
-        return None, None
-
-    async def scan(self) -> AsyncIterator[RawPacket]:
-        proc = await asyncio.create_subprocess_exec(
-            *self.command,
-            stdout=asyncio.subprocess.PIPE,
-        )
-        try:
-            while True:
-                line = await proc.stdout.readline()
-                if not line:
-                    break
-                address, rssi = self._parse_line(line.decode(errors="ignore"))
-
-                yield RawPacket(
-                    timestamp=datetime.now(),
-                    phy="LE1M",
-                    channel=None,
-                    rssi=rssi,
-
-                    address=addr,
-                    payload=b"",
-                )
-                await asyncio.sleep(0)
+                packet = parse_sniffer_line(raw.decode(errors="ignore"))
+                if packet is not None:
+                    yield packet
         finally:
-            proc.kill()
-            await proc.wait()
-
-                    address=address,
-                    payload=line.rstrip(b"\n"),
-                )
-        finally:
-            if proc.returncode is None:
+            if getattr(proc, "returncode", None) is None:
                 proc.kill()
                 await proc.wait()
-
@@ -6,10 +6,12 @@ from typing import List
 
 import typer
 
+import config
 from active.hid_replay import replay as hid_replay
 from core import aggregator
 from core.exporter import export_data
 from core.scanner import EVENT_BUS, run_scanner
+from core.stream import SCAN_MODES
 from core.utils import setup_logging
 from external_api import shodan_lookup, wigle_lookup
 from mqtt_client import setup as mqtt_setup
@@ -21,6 +23,13 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 
+def _scan_mode(value: str) -> str:
+    # checked here so every backend rejects it, not only run_scanner
+    if value not in SCAN_MODES:
+        raise typer.BadParameter(f"must be one of {', '.join(SCAN_MODES)}")
+    return value
+
+
 @app.command()
 def scan(
     interval: int = 5,
@@ -29,6 +38,15 @@ def scan(
     processes: int = 0,
     threaded_scan: bool = False,
     backend: str = "bleak",
+    mode: str = typer.Option(
+        "poll",
+        callback=_scan_mode,
+        help="poll: discover() every interval; stream: continuous scan",
+    ),
+    queue_size: int = config.STREAM_QUEUE_SIZE,
+    overflow: str = typer.Option(
+        config.STREAM_OVERFLOW, help="drop-oldest or drop-newest"
+    ),
 ):
     """Run BLE scanner."""
     load_plugins()
@@ -45,6 +63,9 @@ def scan(
                     processes,
                     stop_event=stop_event,
                     threaded_scan=threaded_scan,
+                    mode=mode,
+                    queue_size=queue_size,
+                    overflow=overflow,
                 ),
             )
         else:
@@ -55,9 +76,16 @@ def scan(
             if backend_cls is None:
                 logger.error("Unknown backend %s", backend)
                 return
-            task = asyncio.create_task(
-                run_radio_backend(backend_cls(interval), stop_event=stop_event)
-            )
+            if backend == "bluez":
+                radio = backend_cls(
+                    interval,
+                    stream=mode == "stream",
+                    queue_size=queue_size,
+                    overflow=overflow,
+                )
+            else:
+                radio = backend_cls()
+            task = asyncio.create_task(run_radio_backend(radio, stop_event=stop_event))
         try:
             await task
         finally:
@@ -74,9 +102,9 @@ def listen():
     """Consume events from the bus and print them."""
 
     async def _listen():
-        while True:
-            event = await EVENT_BUS.get()
-            logger.info("%s", event)
+        async with EVENT_BUS.subscribe() as sub:
+            async for event in sub:
+                logger.info("%s", event)
 
     asyncio.run(_listen())
 
@@ -119,18 +147,64 @@ def aggregate(
 
 @app.command()
 def export(
-    fmt: str = typer.Option("json", "--format", "-f", help="json, csv, sqlite"),
+    fmt: str = typer.Option(
+        "json",
+        "--format",
+        "-f",
+        help="json, jsonl, csv, sqlite, columnar, parquet, npz",
+    ),
     output: Path = typer.Argument(Path("export.out")),
     limit: int = 100,
+    gzip: bool = typer.Option(False, "--gzip", help="Compress text formats"),
+    compact: bool = typer.Option(
+        False, "--compact", help="Snapshot sqlite with VACUUM INTO"
+    ),
 ):
     """Export the local database."""
     from core.db import init_db
 
     init_db()
-    export_data(fmt, output, limit)
+
+    def progress(copied: int, total: int) -> None:
+        percent = 100 * copied // total if total else 100
+        typer.echo(f"\rCopied {copied}/{total} pages ({percent}%)", nl=False)
+        if copied >= total:
+            typer.echo()
+
+    export_data(fmt, output, limit, compress=gzip, progress=progress, compact=compact)
     typer.echo(f"Exported to {output}")
 
 
+@app.command()
+def vacuum():
+    """Convert the database to incremental auto-vacuum (one full VACUUM)."""
+    from core.retention import enable_incremental_vacuum
+
+    if enable_incremental_vacuum():
+        typer.echo("Database converted; retention now releases free pages")
+    else:
+        typer.echo("Database already uses incremental auto-vacuum")
+
+
+@app.command()
+def vendor_compile(
+    sources: List[Path] = typer.Argument(
+        None, help="IEEE MA-L/MA-M/MA-S CSV or prefix JSON files"
+    ),
+    output: Path = typer.Option(Path(config.VENDOR_INDEX_PATH), "--output", "-o"),
+):
+    """Compile vendor registries into the binary OUI index."""
+    from vendor_lookup import compile_vendor_index
+
+    sources = sources or [Path("master_mac.csv"), Path("vendor_prefixes.json")]
+    sources = [s for s in sources if s.exists()]
+    if not sources:
+        typer.echo("No vendor sources found", err=True)
+        raise typer.Exit(code=1)
+    count = compile_vendor_index(sources, output)
+    typer.echo(f"Compiled {count} prefixes into {output}")
+
+
 @app.command()
 def hid_replay(address: str, char_uuid: str, packet_file: Path):
     """Replay HID notifications from PACKET_FILE."""
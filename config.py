@@ -1,4 +1,5 @@
 import os
+
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,10 +10,115 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Database configuration
 DB_PATH = os.path.join(BASE_DIR, "ble_scanner.db")
+DB_PROFILE = os.getenv("DB_PROFILE", "fast")  # durable, fast or legacy
+DB_READ_POOL_SIZE = int(
+    os.getenv("DB_READ_POOL_SIZE", "4")
+)  # read-only connections shared by API handlers
+API_QUERY_TIMEOUT = float(
+    os.getenv("API_QUERY_TIMEOUT", "10")
+)  # seconds an API read may run before it is interrupted
+API_EXPORT_STREAMS = int(
+    os.getenv("API_EXPORT_STREAMS", str(max(1, DB_READ_POOL_SIZE // 2)))
+)  # concurrent streaming exports; each holds a read connection throughout
+WRITE_BEHIND_BATCH = int(
+    os.getenv("WRITE_BEHIND_BATCH", "500")
+)  # buffered sightings that trigger a flush
+WRITE_BEHIND_INTERVAL = float(
+    os.getenv("WRITE_BEHIND_INTERVAL", "1.0")
+)  # seconds between write-behind flushes
+WRITE_BEHIND_MAX_PENDING = int(
+    os.getenv("WRITE_BEHIND_MAX_PENDING", "50000")
+)  # buffered sightings kept while flushes fail before the oldest are dropped
+DEVICE_STATE_CAPACITY = int(
+    os.getenv("DEVICE_STATE_CAPACITY", "64")
+)  # recent RSSI samples kept in memory per device
+
+RAW_PARTITION_DIR = os.getenv(
+    "RAW_PARTITION_DIR", os.path.join(BASE_DIR, "raw_partitions")
+)  # one SQLite file of raw packets per time slice
+RAW_PARTITION_SPAN = os.getenv("RAW_PARTITION_SPAN", "day")  # day or hour
+RAW_CAPTURE_BATCH = int(
+    os.getenv("RAW_CAPTURE_BATCH", "2000")
+)  # raw packets per insert transaction
+RAW_CAPTURE_INTERVAL = float(
+    os.getenv("RAW_CAPTURE_INTERVAL", "0.5")
+)  # seconds between raw packet flushes
+RAW_CAPTURE_MAX_PENDING = int(
+    os.getenv("RAW_CAPTURE_MAX_PENDING", "100000")
+)  # buffered raw packets before the oldest are dropped
+
+EXPORT_CHUNK_SIZE = int(
+    os.getenv("EXPORT_CHUNK_SIZE", "1000")
+)  # devices fetched per chunk while exporting
+EXPORT_ROW_GROUP = int(
+    os.getenv("EXPORT_ROW_GROUP", "100000")
+)  # sightings per row group in columnar exports
+EXPORT_BACKUP_PAGES = int(
+    os.getenv("EXPORT_BACKUP_PAGES", "1024")
+)  # pages copied per step of an online SQLite backup
+EXPORT_BACKUP_PAUSE = float(
+    os.getenv("EXPORT_BACKUP_PAUSE", "0.01")
+)  # seconds to sleep between backup steps
+
+# Retention configuration (days per table, 0 keeps rows forever)
+RETENTION_DEVICE_DAYS = int(os.getenv("RETENTION_DEVICE_DAYS", "30"))
+RETENTION_SIGHTING_DAYS = int(os.getenv("RETENTION_SIGHTING_DAYS", "30"))
+RETENTION_RAWPACKET_DAYS = int(os.getenv("RETENTION_RAWPACKET_DAYS", "7"))
+RETENTION_DECODEDEVENT_DAYS = int(os.getenv("RETENTION_DECODEDEVENT_DAYS", "30"))
+RETENTION_ROLLUP_MINUTE_DAYS = int(os.getenv("RETENTION_ROLLUP_MINUTE_DAYS", "30"))
+RETENTION_ROLLUP_HOUR_DAYS = int(os.getenv("RETENTION_ROLLUP_HOUR_DAYS", "365"))
+RETENTION_INTERVAL = float(
+    os.getenv("RETENTION_INTERVAL", "3600")
+)  # seconds between retention runs
+RETENTION_CHUNK = int(
+    os.getenv("RETENTION_CHUNK", "1000")
+)  # rows deleted per transaction
+RETENTION_VACUUM_PAGES = int(
+    os.getenv("RETENTION_VACUUM_PAGES", "1000")
+)  # free pages released per incremental_vacuum step
+
+# Vendor lookup configuration
+VENDOR_INDEX_PATH = os.getenv(
+    "VENDOR_INDEX_PATH", os.path.join(BASE_DIR, "vendor_index.bin")
+)  # compiled OUI index, rebuilt when master_mac.csv changes
+VENDOR_LRU_SIZE = int(os.getenv("VENDOR_LRU_SIZE", "4096"))
 
 # Bluetooth scanning configuration
 SCAN_INTERVAL = 5  # seconds between each scan
 BLUETOOTH_INTERFACE = "hci0"  # default Bluetooth interface
+STREAM_QUEUE_SIZE = int(
+    os.getenv("STREAM_QUEUE_SIZE", "1000")
+)  # advertisements buffered in continuous scan mode
+STREAM_OVERFLOW = os.getenv(
+    "STREAM_OVERFLOW", "drop-oldest"
+)  # drop-oldest or drop-newest when the stream queue is full
+EVENT_SUBSCRIBER_QUEUE = int(
+    os.getenv("EVENT_SUBSCRIBER_QUEUE", "1000")
+)  # events buffered per event bus subscriber
+EVENT_SUBSCRIBER_POLICY = os.getenv(
+    "EVENT_SUBSCRIBER_POLICY", "drop-oldest"
+)  # drop-oldest, drop-newest or block when a subscriber falls behind
+EVENT_SUBSCRIBER_PENDING = int(
+    os.getenv("EVENT_SUBSCRIBER_PENDING", "1000")
+)  # events a "block" subscriber holds beyond its queue before dropping
+LIFECYCLE_RSSI_DELTA = int(
+    os.getenv("LIFECYCLE_RSSI_DELTA", "5")
+)  # dBm change that emits a "changed" event
+LIFECYCLE_TIMEOUT = float(
+    os.getenv("LIFECYCLE_TIMEOUT", "60")
+)  # seconds without a sighting before a device is "lost"
+STATS_HOURS = int(
+    os.getenv("STATS_HOURS", "24")
+)  # hourly activity buckets kept for /api/stats
+STATS_PERSIST_INTERVAL = float(
+    os.getenv("STATS_PERSIST_INTERVAL", "60")
+)  # seconds between saves of the stats counters
+STATS_KNOWN_DEVICES = int(
+    os.getenv("STATS_KNOWN_DEVICES", "100000")
+)  # recently seen MACs remembered to count each device once
+RESPONSE_CACHE_SIZE = int(
+    os.getenv("RESPONSE_CACHE_SIZE", "256")
+)  # rendered responses kept per web process
 HUMAN_RSSI_THRESHOLD = int(
     os.getenv("HUMAN_RSSI_THRESHOLD", "-70")
 )  # RSSI threshold for human presence
@@ -20,6 +126,15 @@ HUMAN_RSSI_THRESHOLD = int(
 # Web interface configuration
 WEB_HOST = "0.0.0.0"
 WEB_PORT = 4128
+WS_TICK = float(
+    os.getenv("WS_TICK", "0.25")
+)  # seconds between coalesced WebSocket delta frames
+WS_SEND_BUFFER = int(
+    os.getenv("WS_SEND_BUFFER", "8")
+)  # frames queued per client before it is resynced with a snapshot
+WS_PER_MESSAGE_DEFLATE = (
+    os.getenv("WS_PER_MESSAGE_DEFLATE", "1") == "1"
+)  # negotiate permessage-deflate compression
 DEBUG_MODE = True
 
 # Logging configuration
@@ -34,6 +149,30 @@ WHATSAPP_API_URL = os.getenv("WHATSAPP_API_URL", "")
 WHATSAPP_AUTH_TOKEN = os.getenv("WHATSAPP_AUTH_TOKEN", "")
 WHATSAPP_FROM = os.getenv("WHATSAPP_FROM", "")
 WHATSAPP_TO = os.getenv("WHATSAPP_TO", "")
+NOTIFY_DIGEST_WINDOW = float(
+    os.getenv("NOTIFY_DIGEST_WINDOW", "30")
+)  # seconds of new-device events batched into one message
+NOTIFY_DEVICE_COOLDOWN = float(
+    os.getenv("NOTIFY_DEVICE_COOLDOWN", "3600")
+)  # minimum seconds between notifications for the same device
+NOTIFY_CHANNEL_COOLDOWN = float(
+    os.getenv("NOTIFY_CHANNEL_COOLDOWN", "10")
+)  # minimum seconds between messages on one channel
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "1000"))
+NOTIFY_RETRIES = int(os.getenv("NOTIFY_RETRIES", "3"))
+
+# MQTT outbox configuration
+MQTT_BATCH_SIZE = int(os.getenv("MQTT_BATCH_SIZE", "100"))  # events per message
+MQTT_BATCH_FORMAT = os.getenv("MQTT_BATCH_FORMAT", "json")  # json or ndjson
+MQTT_FLUSH_INTERVAL = float(
+    os.getenv("MQTT_FLUSH_INTERVAL", "1.0")
+)  # seconds between outbox flushes
+MQTT_BUFFER_MAX = int(
+    os.getenv("MQTT_BUFFER_MAX", "10000")
+)  # events held in memory before the oldest are spilled to the spool
+MQTT_SPOOL_MAX_BYTES = int(
+    os.getenv("MQTT_SPOOL_MAX_BYTES", str(50 * 1024**2))
+)  # on-disk spool cap while the broker is unreachable
 
 # External API configuration
 SHODAN_API_KEY = os.getenv("SHODAN_API_KEY", "")
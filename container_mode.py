@@ -3,12 +3,12 @@ import logging
 
 import uvicorn
 
+import config
 from api.app import app
 from core.scanner import run_scanner
-from plugins import load_plugins
-from mqtt_client import setup as mqtt_setup
 from core.utils import setup_logging
-import config
+from mqtt_client import setup as mqtt_setup
+from plugins import load_plugins
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -24,6 +24,7 @@ async def main() -> None:
         host=config.WEB_HOST,
         port=config.WEB_PORT,
         log_level="info",
+        ws_per_message_deflate=config.WS_PER_MESSAGE_DEFLATE,
     )
     await asyncio.gather(scanner_task, server_task)
 
@@ -1 +1,20 @@
-__all__ = ["scanner", "db", "aggregator", "exporter"]
+__all__ = [
+    "scanner",
+    "db",
+    "aggregator",
+    "exporter",
+    "persistence",
+    "state",
+    "stream",
+    "lifecycle",
+    "bus",
+    "address",
+    "retention",
+    "partitions",
+    "capture",
+    "rollups",
+    "stats",
+    "cache",
+    "async_db",
+    "search",
+]
@@ -0,0 +1,91 @@
+"""Bluetooth LE device address classification.
+
+A public address carries an IEEE OUI and is worth a vendor lookup. Random
+addresses do not: their top two bits select the sub-type and the remaining
+bits are random or derived from an IRK, so any "vendor" would be noise.
+
+``11``  random static
+``01``  resolvable private (RPA)
+``00``  non-resolvable private
+``10``  reserved
+
+Whether an address is public or random is carried by the TxAdd bit of the
+advertising PDU, which only the backend can see; backends report it as
+``"public"`` or ``"random"``. Without that hint an address whose OUI is in
+the vendor tables is left unclassified. Otherwise the top two bits decide:
+``11`` and ``01`` mark a random static or resolvable address, and a set
+locally-administered bit marks any address as random, since the IEEE never
+assigns such OUIs. Only a ``00``/``10`` address with that bit clear looks
+exactly like an unlisted public OUI and stays unclassified.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional, Union
+
+PUBLIC = "public"
+RANDOM_STATIC = "random-static"
+RESOLVABLE_PRIVATE = "resolvable-private"
+NON_RESOLVABLE_PRIVATE = "non-resolvable-private"
+RANDOM_TYPES = frozenset({RANDOM_STATIC, RESOLVABLE_PRIVATE, NON_RESOLVABLE_PRIVATE})
+
+_SUBTYPES = {
+    0b11: RANDOM_STATIC,
+    0b01: RESOLVABLE_PRIVATE,
+    0b00: NON_RESOLVABLE_PRIVATE,
+}
+
+
+def _first_octet(address: str) -> Optional[int]:
+    digits = "".join(c for c in address[:3] if c not in ":-.")[:2]
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def classify_address(
+    address: str,
+    reported: Union[str, bool, None] = None,
+    known_oui: Optional[Callable[[str], bool]] = None,
+) -> Optional[str]:
+    """Return the address type of ``address`` or ``None`` if unknown.
+
+    ``reported`` is the backend's view of the TxAdd bit: ``"public"`` /
+    ``"random"`` (case-insensitive) or a boolean that is ``True`` for random.
+    ``known_oui`` tells whether the address's OUI is a registered one; it is
+    only consulted when there is no ``reported`` hint.
+    """
+    octet = _first_octet(address)
+    if octet is None:
+        return None
+    if isinstance(reported, str):
+        reported = reported.lower()
+        if reported in (PUBLIC, *RANDOM_TYPES):
+            return reported
+        if reported != "random":
+            reported = None
+    if reported == PUBLIC or reported is False:
+        return PUBLIC
+    if reported is None:
+        if known_oui is not None and known_oui(address):
+            return None
+        if octet >> 6 not in (0b11, 0b01) and not octet & 0x02:
+            return None
+    # reserved sub-type 0b10 is still random; treat it as non-resolvable
+    return _SUBTYPES.get(octet >> 6, NON_RESOLVABLE_PRIVATE)
+
+
+def is_random(address_type: Optional[str]) -> bool:
+    return address_type in RANDOM_TYPES
+
+
+def reported_address_type(device) -> Optional[str]:
+    """Return the address type a Bleak ``BLEDevice`` was reported with."""
+    details = getattr(device, "details", None)
+    if isinstance(details, dict):
+        props = details.get("props") or {}
+        address_type = props.get("AddressType")
+        if isinstance(address_type, str):
+            return address_type
+    return None
@@ -0,0 +1,141 @@
+"""Non-blocking database reads for the async API.
+
+Blocking read functions from :mod:`core.db` and friends run on a dedicated
+thread pool sized to the read connection pool, so a slow query or a long
+export never holds up the event loop (and with it every WebSocket client).
+Each call gets a timeout and a cancel flag: when the timeout expires, the
+awaiting request is cancelled or the HTTP client disconnects, the flag is
+set and SQLite's progress handler interrupts the statement still running
+on the read connection.
+
+A streaming read keeps its pooled connection until it ends, so at most
+``API_EXPORT_STREAMS`` may run at once (see :data:`STREAM_SLOTS`); the
+rest of the read pool stays free for ordinary requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from config import API_EXPORT_STREAMS, API_QUERY_TIMEOUT, DB_READ_POOL_SIZE
+from core import db as core_db
+
+T = TypeVar("T")
+
+READ_EXECUTOR: Optional[ThreadPoolExecutor] = None
+# taken before a streaming read starts and released once it is closed
+STREAM_SLOTS = threading.BoundedSemaphore(API_EXPORT_STREAMS)
+_lock = threading.Lock()
+
+
+class QueryTimeout(TimeoutError):
+    """A read did not finish within its timeout and was interrupted."""
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its read was running."""
+
+
+def _executor() -> ThreadPoolExecutor:
+    global READ_EXECUTOR
+    with _lock:
+        if READ_EXECUTOR is None:
+            READ_EXECUTOR = ThreadPoolExecutor(
+                max_workers=DB_READ_POOL_SIZE, thread_name_prefix="db-read"
+            )
+        return READ_EXECUTOR
+
+
+def _call(cancel: threading.Event, fn: Callable[..., T], args, kwargs) -> T:
+    core_db.set_query_cancel(cancel)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        core_db.set_query_cancel(None)
+
+
+def _consume(future: "asyncio.Future") -> None:
+    # results of abandoned reads (usually "interrupted") are dropped
+    if not future.cancelled():
+        future.exception()
+
+
+async def _disconnected(request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(0.1)
+
+
+async def run_read(
+    fn: Callable[..., T],
+    *args: Any,
+    timeout: Optional[float] = API_QUERY_TIMEOUT,
+    request=None,
+    **kwargs: Any,
+) -> T:
+    """Run ``fn(*args, **kwargs)`` on the read executor and await its result.
+
+    Raises :class:`QueryTimeout` after ``timeout`` seconds and
+    :class:`ClientDisconnected` if ``request``'s client goes away first; in
+    both cases, and on cancellation, the running query is interrupted.
+    """
+    cancel = threading.Event()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor(), _call, cancel, fn, args, kwargs)
+    future.add_done_callback(_consume)
+    watcher = asyncio.ensure_future(_disconnected(request)) if request else None
+    try:
+        done, _ = await asyncio.wait(
+            {future, watcher} - {None},
+            timeout=timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if future in done:
+            return future.result()
+        if watcher is not None and watcher in done:
+            raise ClientDisconnected()
+        raise QueryTimeout(f"Query exceeded {timeout}s")
+    finally:
+        if not future.done():
+            cancel.set()
+        if watcher is not None:
+            watcher.cancel()
+
+
+async def iterate_read(
+    iterator: Iterator[T], timeout: Optional[float] = API_QUERY_TIMEOUT
+) -> AsyncIterator[T]:
+    """Drive a blocking iterator on the read executor one item at a time.
+
+    ``timeout`` applies to each item and raises :class:`QueryTimeout`. When
+    iteration ends for any reason the step still running is interrupted and
+    waited for, then the iterator is closed on the executor, which releases
+    its connection.
+    """
+    done = object()
+    cancel = threading.Event()
+    loop = asyncio.get_running_loop()
+    step: Optional[asyncio.Future] = None
+    try:
+        while True:
+            step = loop.run_in_executor(
+                _executor(), _call, cancel, next, (iterator, done), {}
+            )
+            step.add_done_callback(_consume)
+            try:
+                item = await asyncio.wait_for(asyncio.shield(step), timeout)
+            except asyncio.TimeoutError:
+                raise QueryTimeout(f"Query exceeded {timeout}s") from None
+            if item is done:
+                return
+            yield item
+    finally:
+        cancel.set()
+        if step is not None and not step.done():
+            # closing a generator that is still executing would fail
+            await asyncio.wait({step})
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await loop.run_in_executor(_executor(), close)
@@ -0,0 +1,189 @@
+"""Fan-out publish/subscribe event bus.
+
+Every subscriber owns a bounded queue, so each event reaches every consumer
+and a slow consumer only affects itself. What happens when a subscriber's
+queue is full is chosen per subscriber:
+
+``drop-oldest``
+    discard the oldest queued event to make room.
+``drop-newest``
+    discard the incoming event.
+``block``
+    keep events in order; delivery to this subscriber waits for room. The
+    publisher itself is never stalled by :meth:`EventBus.publish_nowait`:
+    events wait in a pending list of at most ``pending`` entries, beyond
+    which they are dropped. :meth:`EventBus.publish` instead waits until
+    the subscriber has room.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+BLOCK = "block"
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class Subscription:
+    """A subscriber's bounded queue together with its lag and drop counters."""
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        sid: int,
+        maxsize: int,
+        policy: str,
+        pending: int = 1000,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unsupported overflow policy {policy}")
+        self.id = sid
+        self.policy = policy
+        self.delivered = 0
+        self.dropped = 0
+        self.max_lag = 0
+        self._bus = bus
+        self.pending = pending
+        self._queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize)
+        # "block" events waiting for queue room, oldest first
+        self._waiting: Deque[dict] = deque()
+        self._room = asyncio.Event()
+        self._closed = False
+
+    @property
+    def lag(self) -> int:
+        """Number of events published but not yet consumed."""
+        return self._queue.qsize() + len(self._waiting)
+
+    def _offer(self, event: dict) -> None:
+        if self.policy == BLOCK and (self._waiting or self._queue.full()):
+            if len(self._waiting) >= self.pending:
+                self.dropped += 1
+                return
+            # queue behind earlier waiting events to keep ordering
+            self._waiting.append(event)
+        elif self._queue.full():
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return
+            self._queue.get_nowait()
+            self._queue.put_nowait(event)
+        else:
+            self._queue.put_nowait(event)
+        self.max_lag = max(self.max_lag, self.lag)
+
+    async def _put(self, event: dict) -> None:
+        if self.policy == BLOCK:
+            while (self._waiting or self._queue.full()) and not self._closed:
+                self._room.clear()
+                await self._room.wait()
+            if self._closed:
+                return
+            self._queue.put_nowait(event)
+            self.max_lag = max(self.max_lag, self.lag)
+        else:
+            self._offer(event)
+
+    def _delivered(self) -> None:
+        self.delivered += 1
+        while self._waiting and not self._queue.full():
+            self._queue.put_nowait(self._waiting.popleft())
+        self._room.set()
+
+    async def get(self) -> dict:
+        event = await self._queue.get()
+        self._delivered()
+        return event
+
+    def get_nowait(self) -> dict:
+        event = self._queue.get_nowait()
+        self._delivered()
+        return event
+
+    def close(self) -> None:
+        """Unsubscribe and discard anything still waiting for delivery."""
+        self._bus.unsubscribe(self)
+        self._closed = True
+        self._waiting.clear()
+        self._room.set()
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "policy": self.policy,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+        }
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> dict:
+        return await self.get()
+
+    async def __aenter__(self) -> "Subscription":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+
+class EventBus:
+    """Broadcast each published event to every current subscriber."""
+
+    def __init__(
+        self, maxsize: int = 1000, policy: str = DROP_OLDEST, pending: int = 1000
+    ) -> None:
+        self.maxsize = maxsize
+        self.policy = policy
+        self.pending = pending
+        self.published = 0
+        self._ids = itertools.count(1)
+        self._subscribers: Dict[int, Subscription] = {}
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(
+        self, maxsize: Optional[int] = None, policy: Optional[str] = None
+    ) -> Subscription:
+        sub = Subscription(
+            self,
+            next(self._ids),
+            self.maxsize if maxsize is None else maxsize,
+            policy or self.policy,
+            self.pending,
+        )
+        self._subscribers[sub.id] = sub
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.pop(sub.id, None)
+
+    def publish_nowait(self, event: dict) -> None:
+        """Deliver ``event`` to all subscribers without ever waiting."""
+        self.published += 1
+        for sub in tuple(self._subscribers.values()):
+            sub._offer(event)
+
+    async def publish(self, event: dict) -> None:
+        """Deliver ``event``, waiting for room at ``block`` subscribers."""
+        self.published += 1
+        for sub in tuple(self._subscribers.values()):
+            await sub._put(event)
+
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "subscribers": [s.stats() for s in self._subscribers.values()],
+        }
@@ -0,0 +1,145 @@
+"""Response cache invalidated by a global data generation.
+
+The persistence layer calls :func:`bump_generation` after every committed
+batch. :func:`data_generation` combines that counter with SQLite's
+``PRAGMA data_version``, which also moves when another process (such as a
+scanner feeding a separately started dashboard) commits to the same file.
+Both counters restart after a restart, so the token also carries a random
+per-process epoch; ETags issued by an earlier process never match.
+
+:class:`ResponseCache` keeps rendered response bodies per request key
+together with the generation they were rendered at. A repeat request is
+answered from memory, or with ``304 Not Modified`` when the client's
+``If-None-Match`` matches, until the generation moves on.
+"""
+
+from __future__ import annotations
+
+import secrets
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from config import RESPONSE_CACHE_SIZE
+from core import db as core_db
+
+_lock = threading.Lock()
+_epoch = secrets.token_hex(4)
+_generation = 0
+_watch_path: Optional[str] = None
+_watch_conn: Optional[sqlite3.Connection] = None
+
+
+def bump_generation() -> int:
+    """Mark cached responses stale after a committed write."""
+    global _generation
+    with _lock:
+        _generation += 1
+        return _generation
+
+
+def _data_version() -> int:
+    global _watch_path, _watch_conn, _generation
+    path = core_db.get_engine().url.database
+    if not path or path == ":memory:":
+        return 0
+    if _watch_path != path:
+        if _watch_conn is not None:
+            _watch_conn.close()
+        # a dedicated connection: data_version only moves for other writers
+        _watch_conn = sqlite3.connect(path, check_same_thread=False)
+        _watch_path = path
+        _generation += 1
+    return _watch_conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def data_generation() -> str:
+    """Return a token that changes whenever committed data changes."""
+    with _lock:
+        version = _data_version()
+        return f"{_epoch}.{_generation}.{version}"
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    media_type: str
+    etag: str
+    generation: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """LRU of rendered responses that are valid for one data generation."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(key: str, generation: str) -> str:
+        return f'"{generation}-{zlib.crc32(key.encode()):08x}"'
+
+    def respond(
+        self,
+        key: str,
+        if_none_match: Optional[str],
+        render: Callable[[], Tuple[bytes, str, Dict[str, str]]],
+    ) -> Tuple[int, CachedResponse]:
+        """Return ``(status, response)`` for ``key``, rendering only on a miss.
+
+        ``render`` returns the body, media type and extra headers. The status
+        is 304 when ``if_none_match`` already names the current ETag.
+        """
+        generation = data_generation()
+        etag = self.etag(key, generation)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation != generation:
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+                self.not_modified += 1
+                if entry is not None:
+                    return 304, entry
+                return 304, CachedResponse(b"", "", etag, generation)
+            if entry is not None:
+                self.hits += 1
+                return 200, entry
+            self.misses += 1
+        body, media_type, headers = render()
+        entry = CachedResponse(body, media_type, etag, generation, headers)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return 200, entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        served = self.hits + self.not_modified
+        total = served + self.misses
+        return served / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "generation": data_generation(),
+        }
@@ -0,0 +1,171 @@
+"""Raw-capture persistence stage for radio backends.
+
+Every :class:`ble_scanner.plugins.RawPacket` a sniffer yields is buffered
+and written in batches: one ``executemany`` insert per batch (and per time
+partition, see :mod:`core.partitions`), run in an executor so the event
+loop keeps draining the sniffer. All packets of a run are linked to one
+``CaptureSession`` row. If storage falls behind by more than
+``max_pending`` packets the oldest are dropped and counted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Optional
+
+from sqlalchemy import insert, update
+
+from config import RAW_CAPTURE_BATCH, RAW_CAPTURE_INTERVAL, RAW_CAPTURE_MAX_PENDING
+from core.db import get_engine, insert_raw_packets
+from core.models import CaptureSession
+
+logger = logging.getLogger(__name__)
+
+
+class RawCaptureWriter:
+    """Batch raw packets of one capture session into storage."""
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        max_batch: int = RAW_CAPTURE_BATCH,
+        flush_interval: float = RAW_CAPTURE_INTERVAL,
+        max_pending: int = RAW_CAPTURE_MAX_PENDING,
+    ) -> None:
+        self.backend = backend
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.session_id: Optional[int] = None
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._pending: Deque[dict] = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def open_session(self, now: Optional[datetime] = None) -> int:
+        """Create the ``CaptureSession`` row packets are linked to."""
+        with get_engine().begin() as conn:
+            result = conn.execute(
+                insert(CaptureSession.__table__).values(
+                    start_time=now or datetime.now(), backend=self.backend, packets=0
+                )
+            )
+        self.session_id = result.inserted_primary_key[0]
+        return self.session_id
+
+    def close_session(self, now: Optional[datetime] = None) -> None:
+        if self.session_id is None:
+            return
+        table = CaptureSession.__table__
+        with get_engine().begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.id == self.session_id)
+                .values(end_time=now or datetime.now(), packets=self.written)
+            )
+
+    def add(self, packet) -> None:
+        """Queue one backend packet without blocking."""
+        row = {
+            "timestamp": packet.timestamp,
+            "phy": packet.phy,
+            "channel": packet.channel,
+            "rssi": packet.rssi,
+            "address": packet.address,
+            "payload": packet.payload,
+            "access_addr": packet.access_addr,
+            "handle": packet.handle,
+            "pdu_type": packet.pdu_type,
+            "session_id": self.session_id,
+        }
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(row)
+            self.received += 1
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write buffered packets in batches of ``max_batch``."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    count = min(len(self._pending), self.max_batch)
+                    batch = [self._pending.popleft() for _ in range(count)]
+                if not batch:
+                    return written
+                start = time.perf_counter()
+                try:
+                    insert_raw_packets(batch)
+                except Exception as exc:
+                    self.errors += 1
+                    logger.error("Raw capture flush failed: %s", exc)
+                    with self._lock:
+                        # the deque drops its oldest packets when full, as
+                        # add() does; those are the front of the failed batch
+                        overflow = max(
+                            0, len(self._pending) + len(batch) - self._pending.maxlen
+                        )
+                        self.dropped += overflow
+                        self._pending.extendleft(reversed(batch[overflow:]))
+                    return written
+                latency = time.perf_counter() - start
+                self.flushes += 1
+                self.written += len(batch)
+                self.last_latency = latency
+                self.max_latency = max(self.max_latency, latency)
+                written += len(batch)
+
+    def snapshot(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "received": self.received,
+            "written": self.written,
+            "dropped": self.dropped,
+            "buffer_depth": self.depth,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "last_flush_latency": self.last_latency,
+            "max_flush_latency": self.max_latency,
+        }
+
+    async def run(self, stop_event: asyncio.Event, executor=None) -> None:
+        """Flush on size/time triggers until ``stop_event`` is set."""
+        loop = asyncio.get_running_loop()
+        if self.session_id is None:
+            await loop.run_in_executor(executor, self.open_session)
+        try:
+            while not stop_event.is_set():
+                stop_wait = asyncio.ensure_future(stop_event.wait())
+                wake_wait = asyncio.ensure_future(self._wakeup.wait())
+                await asyncio.wait(
+                    {stop_wait, wake_wait},
+                    timeout=self.flush_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                stop_wait.cancel()
+                wake_wait.cancel()
+                self._wakeup.clear()
+                await loop.run_in_executor(executor, self.flush)
+        finally:
+            self.flush()
+            self.close_session()
+            logger.info("Raw capture stopped: %s", self.snapshot())
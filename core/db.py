@@ -1,43 +1,167 @@
-
-"""Database helper functions using SQLModel ORM."""
-
-from datetime import datetime, timedelta
-from pathlib import Path
-from typing import Generator, List, Optional
-
-from sqlmodel import SQLModel, Session, create_engine, select, delete
-
-"""SQLite helper functions using SQLModel ORM."""
-
-from datetime import datetime, timedelta
-from pathlib import Path
-from typing import Iterable, List, Optional
-
-from sqlmodel import SQLModel, create_engine, Session, select, delete, text
-
-
-from config import DB_PATH
-from .models import Device
-
+"""SQLite helper functions using SQLModel ORM.
+
+Connections are tuned by a :class:`StorageProfile`. All writes go through a
+single writer connection (:func:`get_engine`); API handlers read through a
+separate pool of read-only connections (:func:`get_read_engine`). With WAL
+enabled, readers keep working while the scanner commits.
+"""
+
+import base64
+import binascii
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, tuple_
+from sqlalchemy.pool import QueuePool
+
+from config import (
+    DB_PATH,
+    DB_PROFILE,
+    DB_READ_POOL_SIZE,
+    RAW_PARTITION_DIR,
+    RAW_PARTITION_SPAN,
+)
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from .models import Device, Sighting
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """PRAGMA settings applied to every new SQLite connection."""
+
+    name: str
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024**2
+    cache_size: int = -64000  # negative values are KiB
+    busy_timeout: int = 5000  # milliseconds
+    temp_store: str = "MEMORY"
+    auto_vacuum: str = "INCREMENTAL"  # only applies to new database files
+
+    def pragmas(self, readonly: bool = False) -> List[str]:
+        pragmas = [
+            f"PRAGMA busy_timeout={self.busy_timeout}",
+            f"PRAGMA cache_size={self.cache_size}",
+            f"PRAGMA mmap_size={self.mmap_size}",
+            f"PRAGMA temp_store={self.temp_store}",
+        ]
+        if readonly:
+            pragmas.append("PRAGMA query_only=ON")
+        else:
+            # the journal mode is stored in the file; only the writer sets it
+            pragmas.insert(0, f"PRAGMA journal_mode={self.journal_mode}")
+            pragmas.insert(0, f"PRAGMA auto_vacuum={self.auto_vacuum}")
+            pragmas.append(f"PRAGMA synchronous={self.synchronous}")
+        return pragmas
+
+
+PROFILES: Dict[str, StorageProfile] = {
+    # WAL, but every commit is fsynced: survives power loss
+    "durable": StorageProfile(
+        "durable",
+        synchronous="FULL",
+        mmap_size=64 * 1024**2,
+        cache_size=-16000,
+        temp_store="DEFAULT",
+    ),
+    # WAL with NORMAL sync: may lose the last commits on power loss only
+    "fast": StorageProfile("fast"),
+    # SQLite defaults with a rollback journal, kept for comparison
+    "legacy": StorageProfile(
+        "legacy",
+        journal_mode="DELETE",
+        synchronous="FULL",
+        mmap_size=0,
+        cache_size=-2000,
+        temp_store="DEFAULT",
+        auto_vacuum="NONE",
+    ),
+}
+
+
+_query = threading.local()
+
+
+def set_query_cancel(cancel: Optional[threading.Event]) -> None:
+    """Let reads on this thread be aborted by setting ``cancel``."""
+    _query.cancel = cancel
+
+
+def _query_cancelled() -> int:
+    # SQLite progress handler: a non-zero result interrupts the statement
+    cancel = getattr(_query, "cancel", None)
+    return 1 if cancel is not None and cancel.is_set() else 0
+
+
+def create_sqlite_engine(
+    path: str, profile: StorageProfile, readonly: bool = False, pool_size: int = 1
+):
+    """Create an engine whose connections are configured by ``profile``."""
+    engine = create_engine(
+        f"sqlite:///{path}",
+        echo=False,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=max(profile.busy_timeout / 1000, 30),
+        connect_args={"check_same_thread": False},
+    )
+    pragmas = profile.pragmas(readonly)
+
+    @event.listens_for(engine, "connect")
+    def _apply_profile(dbapi_conn, _record) -> None:
+        cursor = dbapi_conn.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+        if readonly:
+            dbapi_conn.set_progress_handler(_query_cancelled, 1000)
+
+    return engine
+
+
+PROFILE = PROFILES[DB_PROFILE]
+_engine = create_sqlite_engine(DB_PATH, PROFILE)
+_read_engine = create_sqlite_engine(
+    DB_PATH, PROFILE, readonly=True, pool_size=DB_READ_POOL_SIZE
+)
+_raw_store = None
+
+
+def configure(
+    path: str = DB_PATH,
+    profile: str = DB_PROFILE,
+    read_pool_size: int = DB_READ_POOL_SIZE,
+) -> StorageProfile:
+    """Rebind the writer and reader engines to ``path`` using ``profile``."""
+    global PROFILE, _engine, _read_engine, _raw_store
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown storage profile {profile}")
+    _engine.dispose()
+    _read_engine.dispose()
+    if _raw_store is not None:
+        _raw_store.close()
+        _raw_store = None
+    PROFILE = PROFILES[profile]
+    _engine = create_sqlite_engine(path, PROFILE)
+    _read_engine = create_sqlite_engine(
+        path, PROFILE, readonly=True, pool_size=read_pool_size
+    )
+    return PROFILE
 
 
 def get_engine():
-    return create_engine(f"sqlite:///{DB_PATH}")
-
-
-def init_db() -> None:
-    SQLModel.metadata.create_all(get_engine())
-
-
-def get_session() -> Generator[Session, None, None]:
-    with Session(get_engine()) as session:
-        yield session
-
-_engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+    """Return the engine owning the single writer connection."""
+    return _engine
 
 
-def get_engine():
-    return _engine
+def get_read_engine():
+    """Return the read-only engine; rebind both engines with :func:`configure`."""
+    return _read_engine
 
 
 def init_db() -> None:
@@ -45,44 +169,179 @@ def init_db() -> None:
     SQLModel.metadata.create_all(_engine)
 
 
+def purge_old_entries(days: Optional[int] = None):
+    """Apply retention once; ``days`` overrides every per-table policy."""
+    from core.retention import RetentionJob, default_policies
 
-def purge_old_entries(days: int = 30) -> None:
-    """Remove outdated entries and shrink DB if oversized."""
-    cutoff = datetime.now() - timedelta(days=days)
-
-    with Session(get_engine()) as session:
-        session.exec(delete(Device).where(Device.last_seen < cutoff))
-        session.commit()
-        if Path(DB_PATH).exists() and Path(DB_PATH).stat().st_size > 1 * 1024**3:
-            session.connection().exec_driver_sql("VACUUM")
-
-    with Session(_engine) as session:
-        session.exec(delete(Device).where(Device.last_seen < cutoff))
-        session.commit()
-    if Path(DB_PATH).stat().st_size > 1 * 1024**3:
-        with _engine.connect() as conn:
-            conn.execute(text("VACUUM"))
+    return RetentionJob(default_policies(days)).run_once()
 
 
 def get_session() -> Session:
     return Session(_engine)
 
 
-
-def get_devices(limit: Optional[int] = None, offset: int = 0) -> List[dict]:
-    """Return devices as list of dicts."""
-
-    with Session(get_engine()) as session:
-        stmt = select(Device).order_by(Device.last_seen.desc())
+def get_read_session() -> Session:
+    return Session(get_read_engine())
+
+
+def get_raw_store():
+    """Return the time-partitioned ``RawPacket`` store."""
+    global _raw_store
+    if _raw_store is None:
+        from core.partitions import RawPartitionStore
+
+        _raw_store = RawPartitionStore(RAW_PARTITION_DIR, RAW_PARTITION_SPAN)
+    return _raw_store
+
+
+def insert_raw_packets(rows: Iterable[dict]) -> int:
+    """Store raw packet rows in their time partitions."""
+    return get_raw_store().write(rows)
+
+
+def get_raw_packets(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    address: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> List[dict]:
+    """Return raw packets in ``[start, end)`` from the matching partitions."""
+    return get_raw_store().query(start, end, address, limit)
+
+
+def get_history(macs: Iterable[str], conn=None) -> Dict[str, List[dict]]:
+    """Return the RSSI history of each MAC from the ``Sighting`` table.
+
+    Pass ``conn`` to read on a connection the caller already holds instead
+    of checking out a second one from the read pool.
+    """
+    history: Dict[str, List[dict]] = {}
+    macs = list(macs)
+    if not macs:
+        return history
+    if conn is None:
+        with get_read_engine().connect() as conn:
+            return get_history(macs, conn)
+    # chunked to stay below SQLite's bound-parameter limit
+    for i in range(0, len(macs), 500):
+        stmt = (
+            select(Sighting.mac, Sighting.ts, Sighting.rssi)
+            .where(Sighting.mac.in_(macs[i : i + 500]))
+            .order_by(Sighting.mac, Sighting.ts)
+        )
+        for mac, ts, rssi in conn.execute(stmt):
+            history.setdefault(mac, []).append({"t": ts.isoformat(), "rssi": rssi})
+    return history
+
+
+def encode_cursor(last_seen: Optional[datetime], mac: str) -> str:
+    """Return an opaque token pointing just past ``(last_seen, mac)``."""
+    raw = json.dumps([last_seen.isoformat() if last_seen else None, mac])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[Optional[datetime], str]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` if invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        last_seen, mac = json.loads(raw)
+        return (datetime.fromisoformat(last_seen) if last_seen else None), str(mac)
+    except (TypeError, ValueError, binascii.Error) as exc:
+        raise ValueError(f"Invalid cursor {token!r}") from exc
+
+
+def get_devices(
+    limit: Optional[int] = None, cursor: Optional[str] = None, history: bool = False
+) -> List[dict]:
+    """Return devices newest first, optionally with their RSSI history.
+
+    Rows are ordered by ``(last_seen, mac)`` descending and ``cursor`` (from
+    :func:`get_device_page`) resumes after a previous page by seeking the
+    ``ix_device_last_seen_mac`` index, so every page costs the same.
+    """
+    order = (Device.last_seen.desc(), Device.mac.desc())
+    last_seen, mac = decode_cursor(cursor) if cursor else (None, None)
+    with get_read_session() as session:
+        if cursor and last_seen is None:
+            stmt = select(Device).where(Device.last_seen.is_(None), Device.mac < mac)
+        else:
+            stmt = select(Device)
+            if cursor:
+                # a single row-value comparison lets SQLite seek the index
+                stmt = stmt.where(
+                    tuple_(Device.last_seen, Device.mac) < (last_seen, mac)
+                )
         if limit is not None:
-            stmt = stmt.limit(limit).offset(offset)
-        results = session.exec(stmt).all()
-        return [d.dict() for d in results]
-
-    with Session(_engine) as session:
-        stmt = select(Device).order_by(Device.last_seen.desc())
-        if limit is not None:
-            stmt = stmt.offset(offset).limit(limit)
-        rows = session.exec(stmt).all()
-        return [d.dict() for d in rows]
-
+            stmt = stmt.limit(limit)
+        rows = [d.dict() for d in session.exec(stmt.order_by(*order)).all()]
+        if cursor and last_seen is not None and (limit is None or len(rows) < limit):
+            # NULL timestamps sort last and are not reached by the comparison
+            stmt = select(Device).where(Device.last_seen.is_(None)).order_by(*order)
+            if limit is not None:
+                stmt = stmt.limit(limit - len(rows))
+            rows += [d.dict() for d in session.exec(stmt).all()]
+    if history:
+        histories = get_history(r["mac"] for r in rows)
+        for row in rows:
+            row["rssi_history"] = histories.get(row["mac"], [])
+    return rows
+
+
+def iter_devices(
+    limit: Optional[int] = None, chunk_size: int = 1000, history: bool = False
+) -> Iterator[List[dict]]:
+    """Yield devices newest first in chunks of at most ``chunk_size``.
+
+    Rows come from one server-side cursor, so memory stays bounded by the
+    chunk size however many devices are read.
+    """
+    stmt = select(Device).order_by(Device.last_seen.desc(), Device.mac.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    with get_read_engine().connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=chunk_size
+        ).execute(stmt)
+        for partition in result.mappings().partitions(chunk_size):
+            rows = [dict(row) for row in partition]
+            if history:
+                histories = get_history((r["mac"] for r in rows), conn)
+                for row in rows:
+                    row["rssi_history"] = histories.get(row["mac"], [])
+            yield rows
+
+
+def iter_sightings(
+    chunk_size: int = 100_000,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[List[tuple]]:
+    """Yield ``(mac, ts, rssi)`` sighting rows in chunks, ordered by MAC and time.
+
+    The order matches ``ix_sighting_mac_ts`` so SQLite walks the covering
+    index without sorting, and rows stream from a server-side cursor.
+    """
+    stmt = select(Sighting.mac, Sighting.ts, Sighting.rssi).order_by(
+        Sighting.mac, Sighting.ts
+    )
+    if start is not None:
+        stmt = stmt.where(Sighting.ts >= start)
+    if end is not None:
+        stmt = stmt.where(Sighting.ts < end)
+    with get_read_engine().connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=chunk_size
+        ).execute(stmt)
+        for partition in result.partitions(chunk_size):
+            yield [tuple(row) for row in partition]
+
+
+def get_device_page(
+    limit: int = 100, cursor: Optional[str] = None, history: bool = False
+) -> Tuple[List[dict], Optional[str]]:
+    """Return one page of devices and the cursor of the next page, if any."""
+    rows = get_devices(limit + 1, cursor, history)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1]["last_seen"], rows[-1]["mac"])
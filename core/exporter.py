@@ -1,36 +1,305 @@
-import json
 import csv
+import io
+import json
+import os
 import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+import zlib
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import vendor_lookup
+from config import (
+    EXPORT_BACKUP_PAGES,
+    EXPORT_BACKUP_PAUSE,
+    EXPORT_CHUNK_SIZE,
+    EXPORT_ROW_GROUP,
+)
+from core.address import is_random
+from core.db import get_engine, iter_devices, iter_sightings
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+STREAM_FORMATS = ("json", "jsonl", "csv")
+COLUMNAR_FORMATS = ("columnar", "parquet", "npz")
+CSV_HEADERS = [
+    "mac_address",
+    "device_name",
+    "first_seen",
+    "last_seen",
+    "frequency_count",
+    "rssi",
+    "manufacturer",
+    "rssi_history",
+]
+MEDIA_TYPES = {
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _fill_vendors(devices: list) -> list:
+    """Resolve missing vendors with one bulk lookup against the OUI index."""
+    index = vendor_lookup.VENDOR_INDEX
+    missing = [
+        d for d in devices if not d["vendor"] and not is_random(d["address_type"])
+    ]
+    if index is not None and missing:
+        for device, vendor in zip(
+            missing, index.lookup_many([d["mac"] for d in missing])
+        ):
+            device["vendor"] = vendor
+    return devices
+
+
+def _csv_row(device: dict) -> dict:
+    return {
+        "mac_address": device["mac"],
+        "device_name": device["last_name"],
+        "first_seen": device["first_seen"],
+        "last_seen": device["last_seen"],
+        "frequency_count": device["sighting_count"],
+        "rssi": device["last_rssi"],
+        "manufacturer": device["vendor"],
+        "rssi_history": json.dumps(device["rssi_history"]),
+    }
+
+
+def _encode(fmt: str, chunks: Iterable[List[dict]]) -> Iterator[str]:
+    """Serialise device chunks incrementally as JSON, JSON Lines or CSV."""
+    if fmt == "jsonl":
+        for chunk in chunks:
+            yield "".join(json.dumps(d, default=str) + "\n" for d in chunk)
+    elif fmt == "json":
+        sep = "[\n"
+        for chunk in chunks:
+            for device in chunk:
+                yield sep + json.dumps(device, default=str)
+                sep = ",\n"
+        yield "[]\n" if sep == "[\n" else "\n]\n"
+    else:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_HEADERS)
+        writer.writeheader()
+        for chunk in chunks:
+            writer.writerows(_csv_row(d) for d in chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+
+def stream_export(
+    fmt: str,
+    limit: Optional[int] = None,
+    compress: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield an export as encoded (optionally gzip-compressed) byte chunks."""
+    fmt = fmt.lower()
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Unsupported format {fmt}")
+    chunks = (
+        _fill_vendors(chunk) for chunk in iter_devices(limit, chunk_size, history=True)
+    )
+    gzip = zlib.compressobj(wbits=31) if compress else None
+    for text in _encode(fmt, chunks):
+        data = text.encode()
+        if gzip is not None:
+            data = gzip.compress(data)
+        if data:
+            yield data
+    if gzip is not None:
+        yield gzip.flush()
+
+
+def _columns(rows: List[tuple]):
+    """Split ``(mac, ts, rssi)`` rows into a MAC list and typed arrays."""
+    macs, stamps, rssi = zip(*rows)
+    ts = np.array(stamps, dtype="datetime64[us]")
+    values = np.clip(np.array(rssi, dtype=np.int16), -128, 127).astype(np.int8)
+    return list(macs), ts, values
+
+
+def _write_parquet(dest: Path, chunks: Iterable[List[tuple]]) -> int:
+    schema = pa.schema(
+        [("mac", pa.string()), ("ts", pa.timestamp("us")), ("rssi", pa.int8())]
+    )
+    total = 0
+    # every chunk becomes one row group; mac is dictionary-encoded on disk
+    with pq.ParquetWriter(str(dest), schema, compression="zstd") as writer:
+        for rows in chunks:
+            macs, ts, rssi = _columns(rows)
+            writer.write_table(
+                pa.table({"mac": macs, "ts": ts, "rssi": rssi}, schema=schema)
+            )
+            total += len(rows)
+    return total
+
+
+def _write_npz(dest: Path, chunks: Iterable[List[tuple]]) -> int:
+    """Write an ``.npz`` of ``macs``, ``mac_code``, ``ts`` and ``rssi`` arrays.
+
+    Columns are spooled to temporary files chunk by chunk and then copied
+    into the archive behind an ``.npy`` header, so only the MAC dictionary
+    is held in memory.
+    """
+    dtypes = {"mac_code": np.int32, "ts": np.int64, "rssi": np.int8}
+    codes: Dict[str, int] = {}
+    total = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        spools = {name: open(Path(tmp) / name, "w+b") for name in dtypes}
+        try:
+            for rows in chunks:
+                macs, ts, rssi = _columns(rows)
+                mac_code = np.array(
+                    [codes.setdefault(m, len(codes)) for m in macs], dtype=np.int32
+                )
+                spools["mac_code"].write(mac_code.tobytes())
+                spools["ts"].write(ts.astype(np.int64).tobytes())
+                spools["rssi"].write(rssi.tobytes())
+                total += len(rows)
+            with zipfile.ZipFile(dest, "w", zipfile.ZIP_STORED) as archive:
+                with archive.open("macs.npy", "w", force_zip64=True) as out:
+                    np.lib.format.write_array(out, np.array(list(codes), dtype=str))
+                for name, dtype in dtypes.items():
+                    spool = spools[name]
+                    spool.seek(0)
+                    header = {
+                        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                        "fortran_order": False,
+                        "shape": (total,),
+                    }
+                    with archive.open(f"{name}.npy", "w", force_zip64=True) as out:
+                        np.lib.format.write_array_header_1_0(out, header)
+                        shutil.copyfileobj(spool, out)
+        finally:
+            for spool in spools.values():
+                spool.close()
+    return total
+
+
+def export_sightings(
+    dest: Path, fmt: str = "columnar", chunk_size: int = EXPORT_ROW_GROUP
+) -> int:
+    """Export every sighting to a columnar file; return the row count.
+
+    ``parquet`` needs ``pyarrow``; ``columnar`` picks Parquet when it is
+    installed and falls back to ``npz`` otherwise. Rows are written one
+    group of ``chunk_size`` at a time.
+    """
+    fmt = fmt.lower()
+    if fmt == "columnar":
+        fmt = "parquet" if pq is not None else "npz"
+    if fmt == "parquet" and pq is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    if fmt not in ("parquet", "npz"):
+        raise ValueError(f"Unsupported format {fmt}")
+    if np is None:
+        raise RuntimeError("Columnar export requires numpy")
+    chunks = iter_sightings(chunk_size)
+    if fmt == "parquet":
+        return _write_parquet(dest, chunks)
+    return _write_npz(dest, chunks)
+
+
+def snapshot_sqlite(
+    dest: Path,
+    pages: int = EXPORT_BACKUP_PAGES,
+    pause: float = EXPORT_BACKUP_PAUSE,
+    progress: Optional[Callable[[int, int], None]] = None,
+    compact: bool = False,
+) -> Path:
+    """Write a consistent copy of the live database to ``dest``.
+
+    Uses SQLite's online backup API ``pages`` pages at a time, sleeping
+    ``pause`` seconds between steps. The copy runs inside one read
+    transaction on the source, so it sees a single WAL snapshot: the
+    scanner's writer keeps committing and the backup is never restarted
+    (with the ``legacy`` rollback journal, writers wait for it instead).
+    With ``compact`` the copy is made with ``VACUUM INTO`` instead, which
+    drops free pages but runs as a single read transaction. ``progress`` is
+    called with ``(copied, total)`` page counts.
+    """
+    dest = Path(dest)
+    partial = dest.with_name(dest.name + ".part")
+    partial.unlink(missing_ok=True)
+    source = sqlite3.connect(
+        Path(get_engine().url.database).resolve().as_uri() + "?mode=ro", uri=True
+    )
+    try:
+        if compact:
+            source.execute("VACUUM INTO ?", (str(partial),))
+            if progress is not None:
+                total = (
+                    os.path.getsize(partial)
+                    // source.execute("PRAGMA page_size").fetchone()[0]
+                )
+                progress(total, total)
+        else:
+
+            def step(status, remaining, total):
+                if progress is not None:
+                    progress(total - remaining, total)
+                if remaining:
+                    time.sleep(pause)
+
+            target = sqlite3.connect(partial)
+            try:
+                # pin the snapshot; without it a commit restarts the copy
+                source.execute("BEGIN")
+                source.execute("SELECT 1 FROM sqlite_master").fetchone()
+                source.backup(target, pages=pages, progress=step)
+            finally:
+                target.close()
+                source.rollback()
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        source.close()
+    os.replace(partial, dest)
+    return dest
 
-from core.db import get_devices
-from config import DB_PATH
 
+def export_data(
+    fmt: str,
+    dest: Path,
+    limit: Optional[int] = None,
+    compress: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+    compact: bool = False,
+) -> Path:
+    """Export device records to JSON, JSON Lines, CSV or SQLite.
 
-def export_data(fmt: str, dest: Path, limit: Optional[int] = None) -> Path:
-    """Export device records to JSON, CSV or SQLite."""
+    Text formats are written chunk by chunk, gzip-compressed if ``compress``.
+    Columnar formats export all sightings instead (see
+    :func:`export_sightings`) and ``sqlite`` takes an online snapshot of the
+    whole database (see :func:`snapshot_sqlite`); ``limit`` and
+    ``compress`` do not apply to either.
+    """
     fmt = fmt.lower()
-    data = get_devices(limit)
-    if fmt == "json":
-        dest.write_text(json.dumps(data, indent=2))
-    elif fmt == "csv":
-        headers = [
-            "mac_address",
-            "device_name",
-            "first_seen",
-            "last_seen",
-            "frequency_count",
-            "rssi",
-            "manufacturer",
-            "rssi_history",
-        ]
-        with dest.open("w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(data)
+    if fmt in COLUMNAR_FORMATS:
+        export_sightings(dest, fmt)
+    elif fmt in STREAM_FORMATS:
+        with dest.open("wb") as f:
+            for data in stream_export(fmt, limit, compress):
+                f.write(data)
     elif fmt == "sqlite":
-        shutil.copy(Path(DB_PATH), dest)
+        snapshot_sqlite(dest, progress=progress, compact=compact)
     else:
         raise ValueError(f"Unsupported format {fmt}")
     return dest
@@ -0,0 +1,182 @@
+"""Device lifecycle tracking with change-only events.
+
+:class:`LifecycleTracker` sits between ingestion and ``broadcast_event``. It
+turns the raw stream of sightings into three kinds of events:
+
+``appeared``
+    first sighting of a MAC, or first sighting after it was lost.
+``changed``
+    RSSI moved by at least ``rssi_delta`` dBm since the last reported value,
+    or the advertised name or payload changed.
+``lost``
+    the MAC has not been seen for ``timeout`` seconds.
+
+Expiry is driven by a hashed timing wheel so each tick only touches the
+devices whose deadline falls into the current slot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+APPEARED = "appeared"
+CHANGED = "changed"
+LOST = "lost"
+
+
+class TimingWheel:
+    """Hashed timing wheel mapping keys to expiry deadlines.
+
+    Keys are hashed into ``slots`` buckets by deadline tick. Advancing the
+    wheel only inspects the buckets for the ticks that elapsed; keys whose
+    deadline was pushed back are lazily moved to their new bucket.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512) -> None:
+        self.tick = tick
+        self._slots: List[Set[str]] = [set() for _ in range(slots)]
+        self._deadlines: Dict[str, int] = {}
+        self._current: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def _tick_for(self, when: float) -> int:
+        return int(when // self.tick)
+
+    def schedule(self, key: str, when: float) -> None:
+        """Set or move the deadline of ``key``."""
+        deadline = self._tick_for(when)
+        if key not in self._deadlines:
+            self._slots[deadline % len(self._slots)].add(key)
+        # an existing key stays in its old bucket until that bucket is
+        # visited; it is then re-hashed using the updated deadline
+        self._deadlines[key] = deadline
+
+    def cancel(self, key: str) -> None:
+        self._deadlines.pop(key, None)
+
+    def advance(self, now: float) -> List[str]:
+        """Move the wheel to ``now`` and return the keys that expired."""
+        target = self._tick_for(now)
+        if self._current is None:
+            self._current = target - 1
+        expired: List[str] = []
+        # never sweep more than one full revolution per call
+        start = max(self._current + 1, target - len(self._slots) + 1)
+        for tick in range(start, target + 1):
+            bucket = self._slots[tick % len(self._slots)]
+            if not bucket:
+                continue
+            keep: Set[str] = set()
+            for key in bucket:
+                deadline = self._deadlines.get(key)
+                if deadline is None:
+                    continue
+                if deadline <= target:
+                    del self._deadlines[key]
+                    expired.append(key)
+                elif deadline % len(self._slots) == tick % len(self._slots):
+                    keep.add(key)
+                else:
+                    self._slots[deadline % len(self._slots)].add(key)
+            bucket.clear()
+            bucket.update(keep)
+        self._current = target
+        return expired
+
+
+class _Tracked:
+    __slots__ = ("rssi", "name", "payload", "last_seen")
+
+    def __init__(self, rssi: int, name, payload, last_seen: float) -> None:
+        self.rssi = rssi
+        self.name = name
+        self.payload = payload
+        self.last_seen = last_seen
+
+
+def _payload(event: dict) -> tuple:
+    return (repr(event.get("ibeacon")), repr(event.get("eddystone")))
+
+
+class LifecycleTracker:
+    """Track each MAC and emit only lifecycle transitions."""
+
+    def __init__(
+        self, rssi_delta: int = 5, timeout: float = 60.0, tick: float = 1.0
+    ) -> None:
+        self.rssi_delta = rssi_delta
+        self.timeout = timeout
+        self.wheel = TimingWheel(tick)
+        self._devices: Dict[str, _Tracked] = {}
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def observe(self, event: dict, now: Optional[float] = None) -> Optional[dict]:
+        """Return a lifecycle event for ``event`` or ``None`` if unchanged."""
+        now = time.time() if now is None else now
+        mac = event["address"]
+        rssi = event.get("rssi")
+        name = event.get("name")
+        payload = _payload(event)
+        self.wheel.schedule(mac, now + self.timeout)
+        tracked = self._devices.get(mac)
+        if tracked is None:
+            self._devices[mac] = _Tracked(rssi, name, payload, now)
+            return {**event, "event": APPEARED}
+        tracked.last_seen = now
+        changed = (
+            (name and name != tracked.name)
+            or payload != tracked.payload
+            or (
+                rssi is not None
+                and (
+                    tracked.rssi is None or abs(rssi - tracked.rssi) >= self.rssi_delta
+                )
+            )
+        )
+        if not changed:
+            return None
+        tracked.rssi = rssi
+        tracked.name = name or tracked.name
+        tracked.payload = payload
+        return {**event, "event": CHANGED}
+
+    def expire(self, now: Optional[float] = None) -> List[dict]:
+        """Advance the timing wheel and return ``lost`` events."""
+        now = time.time() if now is None else now
+        lost = []
+        for mac in self.wheel.advance(now):
+            tracked = self._devices.pop(mac, None)
+            if tracked is None:
+                continue
+            lost.append(
+                {
+                    "event": LOST,
+                    "address": mac,
+                    "name": tracked.name,
+                    "rssi": tracked.rssi,
+                    "last_seen": datetime.fromtimestamp(tracked.last_seen).isoformat(),
+                }
+            )
+        return lost
+
+    async def run(
+        self, stop_event: asyncio.Event, emit: Callable[[dict], None]
+    ) -> None:
+        """Tick the wheel until ``stop_event`` is set, emitting lost events."""
+        while not stop_event.is_set():
+            for event in self.expire():
+                emit(event)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.wheel.tick)
+            except asyncio.TimeoutError:
+                pass
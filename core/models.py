@@ -1,67 +1,75 @@
+from __future__ import annotations
 
 from datetime import datetime
 from typing import Optional
 
-from sqlmodel import SQLModel
-from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, ForeignKey
+from sqlalchemy import Index
+
+from sqlmodel import Field, SQLModel
+
 
+class Device(SQLModel, table=True):
+    __table_args__ = (Index("ix_device_last_seen_mac", "last_seen", "mac"),)
 
-class Device(SQLModel):
-    __tablename__ = "devices"
-    mac = Column(String, primary_key=True)
-    vendor = Column(String)
-    first_seen = Column(DateTime, default=datetime.utcnow)
-    last_seen = Column(DateTime, default=datetime.utcnow)
-    rssi_history = Column(String, default="[]")
+    mac: str = Field(primary_key=True)
+    vendor: Optional[str] = None
+    address_type: Optional[str] = None
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    # latest-sighting summary maintained by core.persistence on every write
+    last_rssi: Optional[int] = None
+    last_name: Optional[str] = None
+    sighting_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    max_rssi: Optional[int] = None
 
 
-class RawPacket(SQLModel):
-    __tablename__ = "rawpacket"
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    device_mac = Column(String, ForeignKey("devices.mac"))
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    rssi = Column(Integer)
-    data = Column(LargeBinary)
+# search indexes (see core.search); vendor is matched case-insensitively
+Index("ix_device_vendor_last_seen", Device.vendor.collate("NOCASE"), Device.last_seen)
+Index(
+    "ix_device_address_type_last_seen",
+    Device.address_type,
+    Device.last_seen,
+    Device.mac,
+)
+Index("ix_device_last_rssi_last_seen", Device.last_rssi, Device.last_seen)
 
 
-class DecodedEvent(SQLModel):
-    __tablename__ = "decodedevent"
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    packet_id = Column(Integer, ForeignKey("rawpacket.id"))
-    event_type = Column(String)
-    data = Column(String)
+class Sighting(SQLModel, table=True):
+    __table_args__ = (Index("ix_sighting_mac_ts", "mac", "ts"),)
 
+    id: Optional[int] = Field(default=None, primary_key=True)
+    mac: str
+    ts: datetime
+    rssi: int
 
-class CaptureSession(SQLModel):
-    __tablename__ = "capturesession"
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    started_at = Column(DateTime, default=datetime.utcnow)
-    ended_at = Column(DateTime, nullable=True)
-    description = Column(String, nullable=True)
 
+class RssiMinute(SQLModel, table=True):
+    """Per-device RSSI aggregate of one 1-minute bucket (see core.rollups)."""
 
-class AlertRule(SQLModel):
-    __tablename__ = "alertrule"
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    name = Column(String)
-    condition = Column(String)
-    enabled = Column(Integer, default=1)
+    mac: str = Field(primary_key=True)
+    bucket: datetime = Field(primary_key=True, index=True)
+    count: int = 0
+    min_rssi: int = 0
+    max_rssi: int = 0
+    sum_rssi: int = 0
+    sum_sq: int = 0
 
-from __future__ import annotations
-from datetime import datetime
-from typing import Optional
-from sqlmodel import Field, SQLModel
 
+class RssiHour(SQLModel, table=True):
+    """Per-device RSSI aggregate of one 1-hour bucket (see core.rollups)."""
 
-class Device(SQLModel, table=True):
     mac: str = Field(primary_key=True)
-    vendor: Optional[str] = None
-    first_seen: Optional[datetime] = None
-    last_seen: Optional[datetime] = None
-    rssi_history: Optional[str] = None
+    bucket: datetime = Field(primary_key=True, index=True)
+    count: int = 0
+    min_rssi: int = 0
+    max_rssi: int = 0
+    sum_rssi: int = 0
+    sum_sq: int = 0
 
 
 class RawPacket(SQLModel, table=True):
+    """Raw sniffer packet; rows live in time partitions (see core.partitions)."""
+
     id: Optional[int] = Field(default=None, primary_key=True)
     timestamp: datetime
     phy: Optional[str] = None
@@ -69,12 +77,29 @@ class RawPacket(SQLModel, table=True):
     rssi: Optional[int] = None
     address: Optional[str] = None
     payload: Optional[bytes] = None
+    access_addr: Optional[str] = None
+    handle: Optional[int] = None
+    pdu_type: Optional[str] = None
+    session_id: Optional[int] = Field(default=None, foreign_key="capturesession.id")
+
+
+class RawPartition(SQLModel, table=True):
+    """Catalog entry for one time-partitioned raw packet file."""
+
+    name: str = Field(primary_key=True)
+    start_time: datetime
+    end_time: datetime
+    rows: int = 0
+    first_ts: Optional[datetime] = None
+    last_ts: Optional[datetime] = None
 
 
 class CaptureSession(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     start_time: datetime
     end_time: Optional[datetime] = None
+    backend: Optional[str] = None
+    packets: int = 0
 
 
 class DecodedEvent(SQLModel, table=True):
@@ -85,9 +110,26 @@ class DecodedEvent(SQLModel, table=True):
     data: Optional[str] = None
 
 
+class ScannerStats(SQLModel, table=True):
+    """Single row of dashboard counters saved by core.stats."""
+
+    id: int = Field(default=1, primary_key=True)
+    total_devices: int = 0
+    total_visits: int = 0
+    total_events: int = 0
+    last_detection: Optional[datetime] = None
+
+
+class ActivityHour(SQLModel, table=True):
+    """Devices and visits seen during one hour (see core.stats)."""
+
+    hour: datetime = Field(primary_key=True)
+    unique_devices: int = 0
+    visits: int = 0
+
+
 class AlertRule(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     pattern: str
     threshold: Optional[int] = None
-
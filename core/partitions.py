@@ -0,0 +1,217 @@
+"""Time-partitioned storage for raw sniffer packets.
+
+Raw packets are written to one SQLite file per day (or hour) holding a
+``rawpacket`` table with the same schema as :class:`core.models.RawPacket`.
+The main database keeps a catalog (:class:`core.models.RawPartition`) with
+each partition's time bounds and row count. Range queries look up the
+catalog, ``ATTACH`` only the overlapping files and read them in time order;
+retention drops whole partitions by unlinking their files, which costs the
+same no matter how many rows they hold.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, null, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from core import db as core_db
+from core.models import RawPacket, RawPartition
+
+logger = logging.getLogger(__name__)
+
+SPANS = {"day": timedelta(days=1), "hour": timedelta(hours=1)}
+_NAME_FORMATS = {"day": "raw_%Y%m%d", "hour": "raw_%Y%m%d%H"}
+_ALIAS = "raw_part"
+
+
+def partition_bounds(ts: datetime, span: str = "day") -> Tuple[datetime, datetime]:
+    """Return the ``[start, end)`` interval of the partition holding ``ts``."""
+    if span == "hour":
+        start = ts.replace(minute=0, second=0, microsecond=0)
+    else:
+        start = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + SPANS[span]
+
+
+def _sync_columns(conn) -> None:
+    """Add ``RawPacket`` columns missing from an older partition file."""
+    present = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(rawpacket)")}
+    for column in RawPacket.__table__.columns:
+        if column.name not in present:
+            type_ = column.type.compile(dialect=conn.dialect)
+            conn.exec_driver_sql(
+                f"ALTER TABLE rawpacket ADD COLUMN {column.name} {type_}"
+            )
+
+
+class RawPartitionStore:
+    """Write, query and expire raw packets across partition files."""
+
+    def __init__(self, directory, span: str = "day", max_open: int = 4) -> None:
+        if span not in SPANS:
+            raise ValueError(f"Unsupported partition span {span}")
+        self.directory = Path(directory)
+        self.span = span
+        self.max_open = max_open
+        self._writers: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def name_for(self, start: datetime) -> str:
+        return start.strftime(_NAME_FORMATS[self.span])
+
+    def path_for(self, name: str) -> Path:
+        return self.directory / f"{name}.db"
+
+    def _writer(self, name: str):
+        engine = self._writers.get(name)
+        if engine is not None:
+            self._writers.move_to_end(name)
+            return engine
+        self.directory.mkdir(parents=True, exist_ok=True)
+        engine = core_db.create_sqlite_engine(str(self.path_for(name)), core_db.PROFILE)
+        with engine.begin() as conn:
+            RawPacket.__table__.create(conn, checkfirst=True)
+            _sync_columns(conn)
+        self._writers[name] = engine
+        # only the newest partitions receive writes; close the rest
+        while len(self._writers) > self.max_open:
+            self._writers.popitem(last=False)[1].dispose()
+        return engine
+
+    def write(self, rows: Iterable[dict]) -> int:
+        """Insert packet rows, one transaction per partition touched."""
+        groups: Dict[datetime, List[dict]] = {}
+        for row in rows:
+            start, _ = partition_bounds(row["timestamp"], self.span)
+            groups.setdefault(start, []).append(row)
+        written = 0
+        with self._lock:
+            for start, batch in sorted(groups.items()):
+                name = self.name_for(start)
+                with self._writer(name).begin() as conn:
+                    conn.execute(insert(RawPacket.__table__), batch)
+                self._record(name, start, batch)
+                written += len(batch)
+        return written
+
+    def _record(self, name: str, start: datetime, batch: List[dict]) -> None:
+        table = RawPartition.__table__
+        stamps = [row["timestamp"] for row in batch]
+        stmt = sqlite_insert(table).values(
+            name=name,
+            start_time=start,
+            end_time=start + SPANS[self.span],
+            rows=len(batch),
+            first_ts=min(stamps),
+            last_ts=max(stamps),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={
+                "rows": table.c.rows + stmt.excluded.rows,
+                "first_ts": func.min(table.c.first_ts, stmt.excluded.first_ts),
+                "last_ts": func.max(table.c.last_ts, stmt.excluded.last_ts),
+            },
+        )
+        with core_db.get_engine().begin() as conn:
+            conn.execute(stmt)
+
+    def partitions(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[dict]:
+        """Return catalog entries overlapping ``[start, end)``, oldest first."""
+        table = RawPartition.__table__
+        stmt = select(table).order_by(table.c.start_time)
+        if start is not None:
+            stmt = stmt.where(table.c.end_time > start)
+        if end is not None:
+            stmt = stmt.where(table.c.start_time < end)
+        with core_db.get_read_engine().connect() as conn:
+            return [dict(row) for row in conn.execute(stmt).mappings()]
+
+    def query(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        address: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Return packets in ``[start, end)`` reading only matching partitions."""
+        table = RawPacket.__table__
+        results: List[dict] = []
+        parts = self.partitions(start, end)
+        with core_db.get_read_engine().connect() as conn:
+            for part in parts:
+                path = self.path_for(part["name"])
+                if not path.exists():
+                    continue
+                if limit is not None and len(results) >= limit:
+                    break
+                conn.exec_driver_sql(f"ATTACH DATABASE ? AS {_ALIAS}", (str(path),))
+                try:
+                    present = {
+                        row[1]
+                        for row in conn.exec_driver_sql(
+                            f"PRAGMA {_ALIAS}.table_info(rawpacket)"
+                        )
+                    }
+                    stmt = select(
+                        *(
+                            c if c.name in present else null().label(c.name)
+                            for c in table.columns
+                        )
+                    ).order_by(table.c.timestamp, table.c.id)
+                    if start is not None:
+                        stmt = stmt.where(table.c.timestamp >= start)
+                    if end is not None:
+                        stmt = stmt.where(table.c.timestamp < end)
+                    if address is not None:
+                        stmt = stmt.where(table.c.address == address)
+                    if limit is not None:
+                        stmt = stmt.limit(limit - len(results))
+                    scoped = conn.execution_options(schema_translate_map={None: _ALIAS})
+                    results.extend(dict(r) for r in scoped.execute(stmt).mappings())
+                finally:
+                    conn.commit()
+                    conn.exec_driver_sql(f"DETACH DATABASE {_ALIAS}")
+        return results
+
+    def count(self) -> int:
+        """Total rows according to the catalog."""
+        return sum(part["rows"] for part in self.partitions())
+
+    def drop_before(self, cutoff: datetime) -> Tuple[int, int]:
+        """Unlink partitions that end at or before ``cutoff``.
+
+        Returns the number of partitions and rows removed.
+        """
+        table = RawPartition.__table__
+        expired = [p for p in self.partitions() if p["end_time"] <= cutoff]
+        rows = 0
+        with self._lock:
+            for part in expired:
+                engine = self._writers.pop(part["name"], None)
+                if engine is not None:
+                    engine.dispose()
+                path = self.path_for(part["name"])
+                for suffix in ("", "-wal", "-shm"):
+                    Path(f"{path}{suffix}").unlink(missing_ok=True)
+                with core_db.get_engine().begin() as conn:
+                    conn.execute(delete(table).where(table.c.name == part["name"]))
+                rows += part["rows"]
+                logger.info(
+                    "Dropped raw partition %s (%d rows)", part["name"], part["rows"]
+                )
+        return len(expired), rows
+
+    def close(self) -> None:
+        with self._lock:
+            while self._writers:
+                self._writers.popitem()[1].dispose()
@@ -0,0 +1,282 @@
+"""Write-behind persistence stage for scanner sightings.
+
+Sightings are collected in memory, coalesced per MAC and written to SQLite
+in one transaction whenever the buffer fills up or the flush interval
+elapses: a bulk ``INSERT ... ON CONFLICT DO UPDATE`` for ``Device`` rows,
+an append-only ``executemany`` into ``Sighting`` and a merge into the RSSI
+rollups (see :mod:`core.rollups`). The upsert also maintains the
+latest-sighting columns of ``Device`` (last RSSI and name, sighting count,
+strongest RSSI) so list views never have to read the history. A failed
+batch is put back in the buffer; past ``max_pending`` sightings the oldest
+are dropped and counted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from config import WRITE_BEHIND_MAX_PENDING
+from core.cache import bump_generation
+from core.db import get_engine
+from core.models import Device, Sighting
+from core.rollups import update_rollups
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingDevice:
+    """Sightings of one MAC accumulated since the last flush."""
+
+    vendor: Optional[str]
+    first_seen: datetime
+    last_seen: datetime
+    history: List[Tuple[datetime, int]] = field(default_factory=list)
+    address_type: Optional[str] = None
+    name: Optional[str] = None
+
+
+@dataclass
+class FlushStats:
+    """Counters describing the write-behind stage."""
+
+    flushes: int = 0
+    devices_written: int = 0
+    sightings_written: int = 0
+    errors: int = 0
+    dropped: int = 0
+    last_latency: float = 0.0
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.flushes if self.flushes else 0.0
+
+
+def _upsert_statement():
+    table = Device.__table__
+    stmt = insert(table)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.mac],
+        set_={
+            "last_seen": excluded.last_seen,
+            "vendor": func.coalesce(excluded.vendor, table.c.vendor),
+            "address_type": func.coalesce(excluded.address_type, table.c.address_type),
+            "last_rssi": excluded.last_rssi,
+            "last_name": func.coalesce(excluded.last_name, table.c.last_name),
+            "sighting_count": table.c.sighting_count + excluded.sighting_count,
+            "max_rssi": func.max(
+                func.coalesce(table.c.max_rssi, excluded.max_rssi), excluded.max_rssi
+            ),
+        },
+    )
+
+
+def write_devices(pending: Dict[str, _PendingDevice]) -> int:
+    """Upsert devices, append sightings and roll them up in one transaction."""
+    if not pending:
+        return 0
+    rows = [
+        {
+            "mac": mac,
+            "vendor": dev.vendor,
+            "address_type": dev.address_type,
+            "first_seen": dev.first_seen,
+            "last_seen": dev.last_seen,
+            "last_rssi": dev.history[-1][1],
+            "last_name": dev.name,
+            "sighting_count": len(dev.history),
+            "max_rssi": max(rssi for _, rssi in dev.history),
+        }
+        for mac, dev in pending.items()
+    ]
+    sightings = [
+        {"mac": mac, "ts": ts, "rssi": rssi}
+        for mac, dev in pending.items()
+        for ts, rssi in dev.history
+    ]
+    with get_engine().begin() as conn:
+        conn.execute(_upsert_statement(), rows)
+        conn.execute(insert(Sighting.__table__), sightings)
+        update_rollups(conn, sightings)
+    bump_generation()
+    return len(rows)
+
+
+def write_sighting(
+    address: str,
+    rssi: int,
+    vendor: Optional[str],
+    timestamp: Optional[datetime] = None,
+    address_type: Optional[str] = None,
+    name: Optional[str] = None,
+) -> None:
+    """Persist a single sighting immediately, bypassing the buffer."""
+    now = timestamp or datetime.now()
+    dev = _PendingDevice(vendor, now, now, address_type=address_type, name=name)
+    dev.history.append((now, rssi))
+    write_devices({address: dev})
+
+
+class WriteBehindWriter:
+    """Buffer sightings in memory and persist them in batches."""
+
+    def __init__(
+        self,
+        max_batch: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+    ) -> None:
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, max_batch)
+        self.stats = FlushStats()
+        self._pending: Dict[str, _PendingDevice] = {}
+        self._sightings = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        """Number of buffered sightings not yet written."""
+        return self._sightings
+
+    @property
+    def pending_devices(self) -> int:
+        return len(self._pending)
+
+    def add(
+        self,
+        address: str,
+        rssi: int,
+        vendor: Optional[str],
+        timestamp: Optional[datetime] = None,
+        address_type: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        """Queue a sighting; repeated sightings of a MAC are coalesced."""
+        now = timestamp or datetime.now()
+        with self._lock:
+            dev = self._pending.get(address)
+            if dev is None:
+                dev = self._pending[address] = _PendingDevice(
+                    vendor, now, now, address_type=address_type, name=name
+                )
+            else:
+                dev.last_seen = now
+                if vendor is not None:
+                    dev.vendor = vendor
+                if address_type is not None:
+                    dev.address_type = address_type
+                if name is not None:
+                    dev.name = name
+            dev.history.append((now, rssi))
+            self._sightings += 1
+            full = self._sightings >= self.max_batch
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write all buffered sightings and return the number of devices."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                sightings, self._sightings = self._sightings, 0
+            if not pending:
+                return 0
+            start = time.perf_counter()
+            try:
+                written = write_devices(pending)
+            except Exception as exc:
+                self.stats.errors += 1
+                logger.error("Write-behind flush failed: %s", exc)
+                self._requeue(pending, sightings)
+                return 0
+            latency = time.perf_counter() - start
+            self.stats.flushes += 1
+            self.stats.devices_written += written
+            self.stats.sightings_written += sightings
+            self.stats.last_latency = latency
+            self.stats.max_latency = max(self.stats.max_latency, latency)
+            self.stats.total_latency += latency
+            return written
+
+    def _requeue(self, pending: Dict[str, _PendingDevice], sightings: int) -> None:
+        with self._lock:
+            for mac, dev in pending.items():
+                newer = self._pending.get(mac)
+                if newer is not None:
+                    dev.last_seen = newer.last_seen
+                    dev.vendor = newer.vendor or dev.vendor
+                    dev.address_type = newer.address_type or dev.address_type
+                    dev.name = newer.name or dev.name
+                    dev.history.extend(newer.history)
+                self._pending[mac] = dev
+            self._sightings += sightings
+            overflow = self._sightings - self.max_pending
+            if overflow > 0:
+                self._drop_oldest(overflow)
+
+    def _drop_oldest(self, count: int) -> None:
+        # each history is in time order, so a device loses a prefix of it
+        oldest = heapq.nsmallest(
+            count,
+            ((ts, mac) for mac, dev in self._pending.items() for ts, _ in dev.history),
+        )
+        for mac, dropped in Counter(mac for _, mac in oldest).items():
+            dev = self._pending[mac]
+            del dev.history[:dropped]
+            if not dev.history:
+                del self._pending[mac]
+        self._sightings -= count
+        self.stats.dropped += count
+        logger.warning("Write-behind buffer full: dropped %d sightings", count)
+
+    def snapshot(self) -> dict:
+        """Return buffer depth and flush latency statistics."""
+        return {
+            "buffer_depth": self.depth,
+            "pending_devices": self.pending_devices,
+            "flushes": self.stats.flushes,
+            "devices_written": self.stats.devices_written,
+            "sightings_written": self.stats.sightings_written,
+            "errors": self.stats.errors,
+            "dropped": self.stats.dropped,
+            "last_flush_latency": self.stats.last_latency,
+            "max_flush_latency": self.stats.max_latency,
+            "avg_flush_latency": self.stats.avg_latency,
+        }
+
+    async def run(self, stop_event: asyncio.Event, executor=None) -> None:
+        """Flush on size/time triggers until ``stop_event`` is set."""
+        loop = asyncio.get_running_loop()
+        try:
+            while not stop_event.is_set():
+                stop_wait = asyncio.ensure_future(stop_event.wait())
+                wake_wait = asyncio.ensure_future(self._wakeup.wait())
+                await asyncio.wait(
+                    {stop_wait, wake_wait},
+                    timeout=self.flush_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                stop_wait.cancel()
+                wake_wait.cancel()
+                self._wakeup.clear()
+                await loop.run_in_executor(executor, self.flush)
+        finally:
+            self.flush()
+            logger.info("Write-behind stopped: %s", self.snapshot())
@@ -0,0 +1,256 @@
+"""Incremental background retention for the scanner database.
+
+Expired rows are deleted per table in bounded chunks: each chunk picks the
+next ``chunk`` expired rowids, deletes that rowid range in its own short
+transaction and then releases the writer connection, so ingestion is never
+locked out for long. Space is reclaimed gradually with
+``PRAGMA incremental_vacuum(N)`` instead of a full ``VACUUM``, which would
+lock the database and need twice its size in free disk space.
+
+Incremental vacuuming requires ``auto_vacuum=INCREMENTAL``. Storage profiles
+set it on connect, which takes effect for newly created databases; older
+files keep reusing their free pages but are not shrunk until they are
+converted once with :func:`enable_incremental_vacuum` (``ble-scan vacuum``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, literal_column, select
+
+from config import (
+    RETENTION_CHUNK,
+    RETENTION_DECODEDEVENT_DAYS,
+    RETENTION_DEVICE_DAYS,
+    RETENTION_INTERVAL,
+    RETENTION_RAWPACKET_DAYS,
+    RETENTION_ROLLUP_HOUR_DAYS,
+    RETENTION_ROLLUP_MINUTE_DAYS,
+    RETENTION_SIGHTING_DAYS,
+    RETENTION_VACUUM_PAGES,
+)
+from core.cache import bump_generation
+from core.db import get_engine, get_raw_store
+from core.models import DecodedEvent, Device, RawPacket, RssiHour, RssiMinute, Sighting
+
+logger = logging.getLogger(__name__)
+
+_ROWID = literal_column("rowid")
+
+
+@dataclass
+class RetentionPolicy:
+    """Delete rows of ``table`` whose ``column`` is older than ``days``."""
+
+    table: str
+    column: str
+    days: int
+
+
+@dataclass
+class RetentionReport:
+    """Outcome of one retention run."""
+
+    removed: Dict[str, int] = field(default_factory=dict)
+    partitions_dropped: int = 0
+    pages_freed: int = 0
+    free_pages: int = 0
+    duration: float = 0.0
+
+    @property
+    def rows_removed(self) -> int:
+        return sum(self.removed.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "removed": dict(self.removed),
+            "rows_removed": self.rows_removed,
+            "partitions_dropped": self.partitions_dropped,
+            "pages_freed": self.pages_freed,
+            "free_pages": self.free_pages,
+            "duration": self.duration,
+        }
+
+
+def default_policies(days: Optional[int] = None) -> List[RetentionPolicy]:
+    """Return the configured policies, or ``days`` for every table."""
+    configured = [
+        (Device, "last_seen", RETENTION_DEVICE_DAYS),
+        (Sighting, "ts", RETENTION_SIGHTING_DAYS),
+        (RawPacket, "timestamp", RETENTION_RAWPACKET_DAYS),
+        (DecodedEvent, "timestamp", RETENTION_DECODEDEVENT_DAYS),
+        # RSSI rollups outlive the sightings they summarise
+        (RssiMinute, "bucket", RETENTION_ROLLUP_MINUTE_DAYS),
+        (RssiHour, "bucket", RETENTION_ROLLUP_HOUR_DAYS),
+    ]
+    return [
+        RetentionPolicy(model.__tablename__, column, default if days is None else days)
+        for model, column, default in configured
+    ]
+
+
+_TABLES = {
+    m.__tablename__: m.__table__
+    for m in (Device, Sighting, RawPacket, DecodedEvent, RssiMinute, RssiHour)
+}
+
+
+def auto_vacuum_mode() -> int:
+    """Return ``PRAGMA auto_vacuum`` of the database: 0 none, 1 full, 2 incremental."""
+    with get_engine().connect() as conn:
+        raw = conn.connection.driver_connection
+        return raw.execute("PRAGMA auto_vacuum").fetchone()[0]
+
+
+def enable_incremental_vacuum() -> bool:
+    """Switch an existing database to ``auto_vacuum=INCREMENTAL``.
+
+    Needs one full ``VACUUM``, which locks the database and temporarily
+    needs free disk space for a copy of it, so it is not done automatically.
+    Returns ``False`` if the database was already incremental.
+    """
+    with get_engine().connect() as conn:
+        raw = conn.connection.driver_connection
+        if raw.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        raw.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        raw.execute("VACUUM")
+        return raw.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+class RetentionJob:
+    """Apply retention policies in small transactions on a schedule."""
+
+    def __init__(
+        self,
+        policies: Optional[List[RetentionPolicy]] = None,
+        chunk: int = RETENTION_CHUNK,
+        vacuum_pages: int = RETENTION_VACUUM_PAGES,
+        interval: float = RETENTION_INTERVAL,
+        pause: float = 0.0,
+    ) -> None:
+        self.policies = default_policies() if policies is None else policies
+        self.chunk = chunk
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self.pause = pause
+        self.runs = 0
+        self.last_report: Optional[RetentionReport] = None
+        self._warned_vacuum = False
+
+    def _yield(self) -> None:
+        # between chunks the writer connection is back in the pool
+        time.sleep(self.pause)
+
+    def purge_table(self, policy: RetentionPolicy, now: datetime) -> int:
+        """Delete expired rows of one table chunk by chunk."""
+        if policy.days <= 0:
+            return 0
+        table = _TABLES[policy.table]
+        column = table.c[policy.column]
+        cutoff = now - timedelta(days=policy.days)
+        removed = 0
+        after = 0
+        while True:
+            with get_engine().begin() as conn:
+                rowids = (
+                    conn.execute(
+                        select(_ROWID)
+                        .select_from(table)
+                        .where(_ROWID > after, column < cutoff)
+                        .order_by(_ROWID)
+                        .limit(self.chunk)
+                    )
+                    .scalars()
+                    .all()
+                )
+                if not rowids:
+                    return removed
+                result = conn.execute(
+                    delete(table).where(
+                        _ROWID.between(rowids[0], rowids[-1]), column < cutoff
+                    )
+                )
+            removed += result.rowcount
+            after = rowids[-1]
+            self._yield()
+
+    def reclaim(self) -> tuple:
+        """Release free pages in steps; return ``(freed, still_free)``."""
+        freed = 0
+        while True:
+            with get_engine().begin() as conn:
+                raw = conn.connection.driver_connection
+                free = raw.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free:
+                    return freed, free
+                if raw.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    if not self._warned_vacuum:
+                        self._warned_vacuum = True
+                        logger.warning(
+                            "Database was created without incremental "
+                            "auto-vacuum; %d free pages cannot be released. "
+                            "Run `ble-scan vacuum` once to convert it.",
+                            free,
+                        )
+                    return freed, free
+                # each step of incremental_vacuum is a row; fetch them all
+                raw.execute(
+                    f"PRAGMA incremental_vacuum({self.vacuum_pages})"
+                ).fetchall()
+                left = raw.execute("PRAGMA freelist_count").fetchone()[0]
+            freed += free - left
+            if left == free:
+                return freed, left
+            self._yield()
+
+    def run_once(self, now: Optional[datetime] = None) -> RetentionReport:
+        """Apply every policy once and reclaim the freed pages."""
+        now = now or datetime.now()
+        start = time.perf_counter()
+        report = RetentionReport()
+        for policy in self.policies:
+            try:
+                report.removed[policy.table] = self.purge_table(policy, now)
+                if policy.table == RawPacket.__tablename__ and policy.days > 0:
+                    # partitioned raw packets expire a whole file at a time
+                    dropped, rows = get_raw_store().drop_before(
+                        now - timedelta(days=policy.days)
+                    )
+                    report.partitions_dropped += dropped
+                    report.removed[policy.table] += rows
+            except Exception as exc:
+                logger.error("Retention failed for %s: %s", policy.table, exc)
+        if report.rows_removed:
+            bump_generation()
+        report.pages_freed, report.free_pages = self.reclaim()
+        report.duration = time.perf_counter() - start
+        self.runs += 1
+        self.last_report = report
+        logger.info("Retention run: %s", report.to_dict())
+        return report
+
+    def snapshot(self) -> dict:
+        return {
+            "runs": self.runs,
+            "last": self.last_report.to_dict() if self.last_report else None,
+        }
+
+    async def run(self, stop_event: asyncio.Event, executor=None) -> None:
+        """Run immediately, then every ``interval`` seconds until stopped."""
+        loop = asyncio.get_running_loop()
+        while not stop_event.is_set():
+            try:
+                await loop.run_in_executor(executor, self.run_once)
+            except Exception as exc:
+                logger.error("Retention run failed: %s", exc)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,193 @@
+"""Per-device RSSI rollups maintained on the ingest path.
+
+Every batch of sightings written by :mod:`core.persistence` is also folded
+into 1-minute (``RssiMinute``) and 1-hour (``RssiHour``) buckets holding
+count, min, max, sum and sum of squares, in the same transaction. The three
+tiers are kept for different periods (see :mod:`core.retention`), and
+:func:`query_rssi` answers a range query from the coarsest tier that still
+has the requested resolution and reaches back far enough.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.dialects.sqlite import insert
+
+from config import (
+    RETENTION_ROLLUP_HOUR_DAYS,
+    RETENTION_ROLLUP_MINUTE_DAYS,
+    RETENTION_SIGHTING_DAYS,
+)
+from core.db import get_read_engine
+from core.models import RssiHour, RssiMinute, Sighting
+
+EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class Tier:
+    """One storage resolution of RSSI data and how long it is kept."""
+
+    name: str
+    model: type
+    column: str
+    seconds: int
+    days: int
+
+
+# finest first; raw sightings have no bucket of their own
+TIERS = (
+    Tier("raw", Sighting, "ts", 1, RETENTION_SIGHTING_DAYS),
+    Tier("minute", RssiMinute, "bucket", 60, RETENTION_ROLLUP_MINUTE_DAYS),
+    Tier("hour", RssiHour, "bucket", 3600, RETENTION_ROLLUP_HOUR_DAYS),
+)
+ROLLUPS = (RssiMinute, RssiHour)
+
+
+def floor_time(ts: datetime, seconds: int) -> datetime:
+    """Round ``ts`` down to a multiple of ``seconds`` since the epoch."""
+    micros = (ts - EPOCH) // timedelta(microseconds=1)
+    return EPOCH + timedelta(microseconds=micros - micros % (seconds * 1_000_000))
+
+
+def aggregate(
+    sightings: Iterable[dict], seconds: int
+) -> Dict[Tuple[str, datetime], List[int]]:
+    """Fold ``{"mac", "ts", "rssi"}`` rows into ``[count, min, max, sum, sq]``."""
+    buckets: Dict[Tuple[str, datetime], List[int]] = {}
+    for row in sightings:
+        rssi = row["rssi"]
+        key = (row["mac"], floor_time(row["ts"], seconds))
+        agg = buckets.get(key)
+        if agg is None:
+            buckets[key] = [1, rssi, rssi, rssi, rssi * rssi]
+        else:
+            agg[0] += 1
+            agg[1] = min(agg[1], rssi)
+            agg[2] = max(agg[2], rssi)
+            agg[3] += rssi
+            agg[4] += rssi * rssi
+    return buckets
+
+
+def _merge_statement(model):
+    table = model.__table__
+    stmt = insert(table)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.mac, table.c.bucket],
+        set_={
+            "count": table.c.count + excluded.count,
+            "min_rssi": func.min(table.c.min_rssi, excluded.min_rssi),
+            "max_rssi": func.max(table.c.max_rssi, excluded.max_rssi),
+            "sum_rssi": table.c.sum_rssi + excluded.sum_rssi,
+            "sum_sq": table.c.sum_sq + excluded.sum_sq,
+        },
+    )
+
+
+def update_rollups(conn, sightings: List[dict]) -> None:
+    """Merge a batch of sightings into every rollup table on ``conn``."""
+    if not sightings:
+        return
+    for tier in TIERS:
+        if tier.model not in ROLLUPS:
+            continue
+        rows = [
+            {
+                "mac": mac,
+                "bucket": bucket,
+                "count": agg[0],
+                "min_rssi": agg[1],
+                "max_rssi": agg[2],
+                "sum_rssi": agg[3],
+                "sum_sq": agg[4],
+            }
+            for (mac, bucket), agg in aggregate(sightings, tier.seconds).items()
+        ]
+        conn.execute(_merge_statement(tier.model), rows)
+
+
+def choose_tier(
+    start: datetime, resolution: int, now: Optional[datetime] = None
+) -> Tier:
+    """Return the coarsest tier that has ``resolution`` and still holds ``start``.
+
+    When only coarser tiers reach back to ``start`` the finest of those is
+    used, and the buckets come out coarser than requested.
+    """
+    now = now or datetime.now()
+    holding = [t for t in TIERS if t.days <= 0 or start >= now - timedelta(days=t.days)]
+    for tier in reversed(holding):
+        if resolution % tier.seconds == 0:
+            return tier
+    return holding[0] if holding else TIERS[-1]
+
+
+def query_rssi(
+    mac: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    resolution: int = 60,
+    now: Optional[datetime] = None,
+) -> Tuple[str, List[dict]]:
+    """Return ``(tier name, buckets)`` of RSSI statistics for one device.
+
+    Buckets are ``resolution`` seconds wide and cover ``[start, end)``; each
+    holds ``t``, ``count``, ``min``, ``max``, ``mean`` and ``std``.
+    """
+    if resolution <= 0:
+        raise ValueError("resolution must be positive")
+    now = now or datetime.now()
+    end = end or now
+    tier = choose_tier(start, resolution, now)
+    table = tier.model.__table__
+    column = table.c[tier.column]
+    seconds = cast(func.strftime("%s", column), Integer)
+    bucket = (seconds - seconds % resolution).label("bucket")
+    if tier.model is Sighting:
+        stats = (
+            func.count(),
+            func.min(table.c.rssi),
+            func.max(table.c.rssi),
+            func.sum(table.c.rssi),
+            func.sum(table.c.rssi * table.c.rssi),
+        )
+    else:
+        stats = (
+            func.sum(table.c.count),
+            func.min(table.c.min_rssi),
+            func.max(table.c.max_rssi),
+            func.sum(table.c.sum_rssi),
+            func.sum(table.c.sum_sq),
+        )
+    stmt = (
+        select(bucket, *stats)
+        .where(
+            table.c.mac == mac,
+            column >= floor_time(start, tier.seconds),
+            column < end,
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    buckets = []
+    with get_read_engine().connect() as conn:
+        for epoch, count, low, high, total, squares in conn.execute(stmt):
+            mean = total / count
+            buckets.append(
+                {
+                    "t": EPOCH + timedelta(seconds=epoch),
+                    "count": count,
+                    "min": low,
+                    "max": high,
+                    "mean": mean,
+                    "std": math.sqrt(max(squares / count - mean * mean, 0.0)),
+                }
+            )
+    return tier.name, buckets
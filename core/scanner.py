@@ -1,38 +1,70 @@
 import asyncio
-import json
 import logging
-
-from sqlmodel import Session, select
+from collections import OrderedDict
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
 
 from bleak import BleakScanner
 from mac_vendor_lookup import MacLookup
 
-from sqlmodel import Session
-
-from core.db import get_engine, init_db, purge_old_entries
-from core.models import Device
-from core.db import init_db, purge_old_entries
+import vendor_lookup
+from config import (
+    DEVICE_STATE_CAPACITY,
+    EVENT_SUBSCRIBER_PENDING,
+    EVENT_SUBSCRIBER_POLICY,
+    EVENT_SUBSCRIBER_QUEUE,
+    LIFECYCLE_RSSI_DELTA,
+    LIFECYCLE_TIMEOUT,
+    STREAM_OVERFLOW,
+    STREAM_QUEUE_SIZE,
+    VENDOR_INDEX_PATH,
+    VENDOR_LRU_SIZE,
+    WRITE_BEHIND_BATCH,
+    WRITE_BEHIND_INTERVAL,
+)
+from core.address import classify_address, is_random, reported_address_type
+from core.bus import EventBus
+from core.capture import RawCaptureWriter
+from core.db import init_db
+from core.lifecycle import APPEARED, LOST, LifecycleTracker
+from core.persistence import WriteBehindWriter, write_sighting
+from core.retention import RetentionJob
+from core.state import DeviceRegistry
+from core.stats import StatsService
+from core.stream import SCAN_MODES, AdvertisementStream
 from core.utils import setup_logging
-from mqtt_client import publish_event
-from notifications import send_all_notifications
+from mqtt_client import OUTBOX, publish_event
+from notifications import NotificationDispatcher
 from plugins import dispatch_event
-from vendor_lookup import load_vendor_data, lookup_vendor
+from vendor_lookup import VENDOR_CACHE, load_vendor_data, load_vendor_index
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-EVENT_BUS: "asyncio.Queue[dict]" = asyncio.Queue()
+EVENT_BUS = EventBus(
+    EVENT_SUBSCRIBER_QUEUE, EVENT_SUBSCRIBER_POLICY, EVENT_SUBSCRIBER_PENDING
+)
 THREAD_EXECUTOR: ThreadPoolExecutor | None = None
+# retention and stats persistence; kept off THREAD_EXECUTOR so a long purge
+# never queues ahead of the write-behind flushes
+MAINTENANCE_EXECUTOR: ThreadPoolExecutor | None = None
 PROCESS_EXECUTOR: ProcessPoolExecutor | None = None
-
-VENDOR_CACHE: Dict[str, str] = {}
-MAC_LOOKUP = MacLookup()
+WRITER: WriteBehindWriter | None = None
+STATE = DeviceRegistry(DEVICE_STATE_CAPACITY)
+STREAM: AdvertisementStream | None = None
+LIFECYCLE = LifecycleTracker(LIFECYCLE_RSSI_DELTA, LIFECYCLE_TIMEOUT)
+NOTIFIER = NotificationDispatcher()
+RETENTION = RetentionJob()
+STATS = StatsService()
+CAPTURE: RawCaptureWriter | None = None
+
+MAC_LOOKUP: MacLookup | None = None
+# online lookup results by OUI, including misses (stored as None)
+ONLINE_VENDOR_CACHE: "OrderedDict[str, Optional[str]]" = OrderedDict()
 
 MASTER_MAC_PATH = Path("master_mac.csv")
+VENDOR_JSON_PATH = Path("vendor_prefixes.json")
 
 
 def init_executors(threads: int, processes: int) -> None:
@@ -44,33 +76,129 @@ def init_executors(threads: int, processes: int) -> None:
     )
 
 
+def init_writer(
+    max_batch: int = WRITE_BEHIND_BATCH, flush_interval: float = WRITE_BEHIND_INTERVAL
+) -> WriteBehindWriter:
+    """Create the write-behind stage used by :func:`update_device`."""
+    global WRITER
+    WRITER = WriteBehindWriter(max_batch=max_batch, flush_interval=flush_interval)
+    return WRITER
+
+
+def _start_pipeline(
+    stop_event: asyncio.Event, executor: ThreadPoolExecutor | None = None
+) -> "list[asyncio.Task[None]]":
+    """Start the background stages that run alongside ingestion."""
+    global MAINTENANCE_EXECUTOR
+    writer = init_writer()
+    MAINTENANCE_EXECUTOR = ThreadPoolExecutor(
+        max_workers=2, thread_name_prefix="maintenance"
+    )
+    return [
+        asyncio.create_task(writer.run(stop_event, executor)),
+        asyncio.create_task(LIFECYCLE.run(stop_event, broadcast_event)),
+        asyncio.create_task(NOTIFIER.run(stop_event)),
+        asyncio.create_task(OUTBOX.run(stop_event)),
+        asyncio.create_task(RETENTION.run(stop_event, MAINTENANCE_EXECUTOR)),
+        asyncio.create_task(STATS.run(stop_event, MAINTENANCE_EXECUTOR)),
+    ]
+
+
+async def _load_stats() -> None:
+    """Restore the dashboard counters before the first event is observed."""
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, STATS.load)
+    except Exception as exc:
+        logger.error("Loading stats failed: %s", exc)
+
+
+async def _stop_pipeline(
+    stop_event: asyncio.Event, tasks: "list[asyncio.Task[None]]"
+) -> None:
+    """Let the background stages drain and detach the writer."""
+    global WRITER, MAINTENANCE_EXECUTOR
+    stop_event.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    WRITER = None
+    if MAINTENANCE_EXECUTOR is not None:
+        MAINTENANCE_EXECUTOR.shutdown(wait=False)
+        MAINTENANCE_EXECUTOR = None
+
+
 def broadcast_event(event: dict) -> None:
-    """Send event to the queue, plugins and MQTT broker."""
-    EVENT_BUS.put_nowait(event)
+    """Send event to stats, bus subscribers, plugins, MQTT and notifications."""
+    if event.get("event") == LOST:
+        # rotated random addresses never come back; free their ring buffers
+        STATE.remove(event["address"])
+    STATS.observe(event)
+    EVENT_BUS.publish_nowait(event)
     dispatch_event(event)
     publish_event(event)
-    try:
-        send_all_notifications(f"New BLE device {event.get('address')}")
-    except Exception as exc:  # pragma: no cover - network errors
-        logger.error("Notification error: %s", exc)
+    if event.get("event") == APPEARED:
+        NOTIFIER.submit(event["address"])
+
+
+def ingest_event(event: dict) -> None:
+    """Pass a sighting through the lifecycle stage and broadcast transitions."""
+    lifecycle_event = LIFECYCLE.observe(event)
+    if lifecycle_event is not None:
+        broadcast_event(lifecycle_event)
 
 
 def load_vendor_cache(path: Path = MASTER_MAC_PATH) -> None:
-    """Load vendor prefixes from builtin list and optional CSV file."""
-    load_vendor_data(path)
-    logger.info("Loaded %d vendors", len(VENDOR_CACHE))
+    """Load builtin vendor prefixes and open the compiled OUI index.
+
+    The index is rebuilt from ``path`` and ``vendor_prefixes.json`` only when
+    one of them is newer than the compiled file.
+    """
+    load_vendor_data(VENDOR_JSON_PATH)
+    index = load_vendor_index(
+        Path(VENDOR_INDEX_PATH), [path, VENDOR_JSON_PATH], VENDOR_LRU_SIZE
+    )
+    logger.info(
+        "Loaded %d vendors (%d indexed)",
+        len(VENDOR_CACHE),
+        len(index) if index is not None else 0,
+    )
+
+
+def _mac_lookup(address: str) -> Optional[str]:
+    """Online lookup run in an executor; only the address is pickled."""
+    global MAC_LOOKUP
+    if MAC_LOOKUP is None:
+        MAC_LOOKUP = MacLookup()
+    try:
+        return MAC_LOOKUP.lookup(address)
+    except Exception:
+        return None
+
+
+def _known_oui(address: str) -> bool:
+    """Return whether the local vendor tables list the OUI of ``address``."""
+    if address.upper().replace(":", "")[:6] in VENDOR_CACHE:
+        return True
+    index = vendor_lookup.VENDOR_INDEX
+    return index is not None and index.lookup(address) is not None
 
 
 async def vendor_for_mac(address: str) -> Optional[str]:
-    """Return vendor for a MAC using cache or online lookup."""
+    """Return vendor for a MAC using cache, compiled index or online lookup."""
     prefix = address.upper().replace(":", "")[:6]
     if prefix in VENDOR_CACHE:
         return VENDOR_CACHE[prefix]
-    if PROCESS_EXECUTOR is None:
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, MAC_LOOKUP.lookup, address)
+    if vendor_lookup.VENDOR_INDEX is not None:
+        vendor = vendor_lookup.VENDOR_INDEX.lookup(address)
+        if vendor is not None:
+            return vendor
+    if prefix in ONLINE_VENDOR_CACHE:
+        ONLINE_VENDOR_CACHE.move_to_end(prefix)
+        return ONLINE_VENDOR_CACHE[prefix]
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(PROCESS_EXECUTOR, MAC_LOOKUP.lookup, address)
+    vendor = await loop.run_in_executor(PROCESS_EXECUTOR, _mac_lookup, address)
+    ONLINE_VENDOR_CACHE[prefix] = vendor
+    if len(ONLINE_VENDOR_CACHE) > VENDOR_LRU_SIZE:
+        ONLINE_VENDOR_CACHE.popitem(last=False)
+    return vendor
 
 
 async def direction_finding_stub(device) -> Optional[float]:
@@ -111,51 +239,28 @@ def parse_eddystone(data: bytes) -> Optional[Dict[str, str]]:
 
 
 def _update_device_sync(
-    address: str, _name: str, rssi: int, vendor: Optional[str]
+    address: str,
+    name: Optional[str],
+    rssi: int,
+    vendor: Optional[str],
+    address_type: Optional[str] = None,
 ) -> None:
-    from core.db import get_engine  # imported here to avoid circular import
-    from core.models import Device
-
     try:
-        with Session(get_engine()) as session:
-            now = datetime.now()
-            device = session.get(Device, address)
-            if device:
-                history = json.loads(device.rssi_history or "[]")
-                history.append({"t": now.isoformat(), "rssi": rssi})
-                device.last_seen = now
-                device.vendor = vendor
-                device.rssi_history = json.dumps(history)
-            else:
-                device = Device(
-
-        engine = get_engine()
-        now = datetime.now()
-        with Session(engine) as session:
-            result = session.exec(select(Device).where(Device.mac == address)).first()
-            if result:
-                history = json.loads(result.rssi_history or "[]")
-                history.append({"t": now.isoformat(), "rssi": rssi})
-                result.last_seen = now
-                result.vendor = vendor
-                result.rssi_history = json.dumps(history)
-            else:
-                result = Device(
-                    mac=address,
-                    vendor=vendor,
-                    first_seen=now,
-                    last_seen=now,
-                    rssi_history=json.dumps([{"t": now.isoformat(), "rssi": rssi}]),
-                )
-                session.add(device)
-                session.add(result)
-            session.commit()
+        write_sighting(address, rssi, vendor, address_type=address_type, name=name)
     except Exception as exc:
         logger.error("DB error: %s", exc)
 
 
-async def update_device(address: str, name: str, rssi: int) -> None:
-    vendor = await vendor_for_mac(address)
+async def update_device(
+    address: str, name: Optional[str], rssi: int, address_type: Optional[str] = None
+) -> None:
+    """Record a sighting; ``name`` is the advertised name, if any."""
+    # random addresses carry no OUI, so there is no vendor to look up
+    vendor = None if is_random(address_type) else await vendor_for_mac(address)
+    STATE.update(address, rssi, name=name, vendor=vendor, address_type=address_type)
+    if WRITER is not None:
+        WRITER.add(address, rssi, vendor, address_type=address_type, name=name)
+        return
     loop = asyncio.get_running_loop()
     await loop.run_in_executor(
         THREAD_EXECUTOR,
@@ -164,6 +269,7 @@ async def update_device(address: str, name: str, rssi: int) -> None:
         name,
         rssi,
         vendor,
+        address_type,
     )
 
 
@@ -178,28 +284,53 @@ async def _discover_devices(threaded: bool) -> list:
     return await BleakScanner.discover()
 
 
+async def process_advertisement(
+    address: str,
+    name: Optional[str],
+    rssi: int,
+    manufacturer_data: Dict[int, bytes],
+    device=None,
+    address_type: Optional[str] = None,
+) -> None:
+    """Persist one advertisement and broadcast it to consumers.
+
+    ``address_type`` is the backend-reported ``public``/``random`` flag; when
+    omitted it is read from ``device`` if the platform exposes it.
+    """
+    address_type = classify_address(
+        address, address_type or reported_address_type(device), _known_oui
+    )
+    await update_device(address, name, rssi, address_type)
+    ibeacon = None
+    eddystone = None
+    for cid, payload in manufacturer_data.items():
+        if cid == 0x004C:  # Apple iBeacon
+            ibeacon = parse_ibeacon(bytes(payload))
+        if cid == 0xFEAA:  # Eddystone
+            eddystone = parse_eddystone(bytes(payload))
+    ingest_event(
+        {
+            "address": address,
+            "address_type": address_type,
+            "name": name,
+            "rssi": rssi,
+            "aoa": await direction_finding_stub(device),
+            "ibeacon": ibeacon,
+            "eddystone": eddystone,
+        }
+    )
+
+
 async def scan_once(threaded_scan: bool = False) -> None:
     devices = await _discover_devices(threaded_scan)
     for dev in devices:
         if dev.address and dev.rssi is not None:
-            await update_device(dev.address, dev.name or "Unknown", dev.rssi)
-            ibeacon = None
-            eddystone = None
-            mfg_data = dev.metadata.get("manufacturer_data", {})
-            for cid, payload in mfg_data.items():
-                if cid == 0x004C:  # Apple iBeacon
-                    ibeacon = parse_ibeacon(bytes(payload))
-                if cid == 0xFEAA:  # Eddystone
-                    eddystone = parse_eddystone(bytes(payload))
-            broadcast_event(
-                {
-                    "address": dev.address,
-                    "name": dev.name,
-                    "rssi": dev.rssi,
-                    "aoa": await direction_finding_stub(dev),
-                    "ibeacon": ibeacon,
-                    "eddystone": eddystone,
-                }
+            await process_advertisement(
+                dev.address,
+                dev.name,
+                dev.rssi,
+                dev.metadata.get("manufacturer_data", {}),
+                dev,
             )
 
 
@@ -214,6 +345,31 @@ async def _worker(
             pass
 
 
+async def _stream_worker(
+    stream: AdvertisementStream, stop_event: asyncio.Event
+) -> None:
+    while not stop_event.is_set():
+        try:
+            adv = await asyncio.wait_for(stream.get(), timeout=1)
+        except asyncio.TimeoutError:
+            continue
+        if adv.address and adv.rssi is not None:
+            await process_advertisement(
+                adv.address, adv.name, adv.rssi, adv.manufacturer_data, adv.device
+            )
+
+
+async def _run_stream(
+    workers: int, stop_event: asyncio.Event, queue_size: int, overflow: str
+) -> None:
+    global STREAM
+    STREAM = AdvertisementStream(queue_size, overflow)
+    async with STREAM:
+        await asyncio.gather(
+            *(_stream_worker(STREAM, stop_event) for _ in range(workers))
+        )
+
+
 async def run_scanner(
     interval: int = 5,
     workers: int = 1,
@@ -221,17 +377,34 @@ async def run_scanner(
     processes: int = 0,
     stop_event: asyncio.Event | None = None,
     threaded_scan: bool = False,
+    mode: str = "poll",
+    queue_size: int = STREAM_QUEUE_SIZE,
+    overflow: str = STREAM_OVERFLOW,
 ) -> None:
+    """Run the scanner.
+
+    ``mode="poll"`` calls ``BleakScanner.discover()`` every ``interval``
+    seconds. ``mode="stream"`` keeps one scanner running and processes each
+    advertisement as it arrives through a bounded queue.
+    """
+    if mode not in SCAN_MODES:
+        raise ValueError(f"Unsupported scan mode {mode}")
     load_vendor_cache()
     init_db()
-    purge_old_entries()
     init_executors(threads, processes)
     if stop_event is None:
         stop_event = asyncio.Event()
-    tasks = [
-        asyncio.create_task(_worker(interval, stop_event, threaded_scan))
-        for _ in range(workers)
-    ]
+    await _load_stats()
+    pipeline = _start_pipeline(stop_event, THREAD_EXECUTOR)
+    if mode == "stream":
+        tasks = [
+            asyncio.create_task(_run_stream(workers, stop_event, queue_size, overflow))
+        ]
+    else:
+        tasks = [
+            asyncio.create_task(_worker(interval, stop_event, threaded_scan))
+            for _ in range(workers)
+        ]
     try:
         await asyncio.gather(*tasks)
     except asyncio.CancelledError:
@@ -239,6 +412,7 @@ async def run_scanner(
             t.cancel()
         await asyncio.gather(*tasks, return_exceptions=True)
     finally:
+        await _stop_pipeline(stop_event, pipeline)
         logger.info("Scanner stopped")
 
 
@@ -246,26 +420,39 @@ async def run_radio_backend(
     backend: "ble_scanner.plugins.RadioBackend",
     stop_event: asyncio.Event | None = None,
 ) -> None:
-    """Run scanner using a radio backend."""
+    """Run scanner using a radio backend.
 
+    Every packet is stored in full by the raw-capture stage under a new
+    ``CaptureSession``; packets with an address also feed device tracking.
+    """
+    global CAPTURE
     load_vendor_cache()
     init_db()
-    purge_old_entries()
     if stop_event is None:
         stop_event = asyncio.Event()
+    CAPTURE = RawCaptureWriter(getattr(backend, "name", type(backend).__name__))
+    CAPTURE.open_session()
+    await _load_stats()
+    pipeline = _start_pipeline(stop_event)
+    pipeline.append(asyncio.create_task(CAPTURE.run(stop_event)))
 
     async def _consume() -> None:
         async for packet in backend.scan():
             if stop_event.is_set():
                 break
+            CAPTURE.add(packet)
             if packet.address and packet.rssi is not None:
-                await update_device(packet.address, packet.address, packet.rssi)
+                address_type = classify_address(
+                    packet.address, packet.address_type, _known_oui
+                )
+                await update_device(packet.address, None, packet.rssi, address_type)
                 event = {
                     "address": packet.address,
+                    "address_type": address_type,
                     "rssi": packet.rssi,
                     "timestamp": packet.timestamp.isoformat(),
                 }
-                broadcast_event(event)
+                ingest_event(event)
 
     task = asyncio.create_task(_consume())
     try:
@@ -273,3 +460,4 @@ async def run_radio_backend(
     finally:
         task.cancel()
         await asyncio.gather(task, return_exceptions=True)
+        await _stop_pipeline(stop_event, pipeline)
@@ -0,0 +1,113 @@
+"""Filtered device search backed by composite indexes on ``Device``.
+
+:func:`build_search` turns a :class:`DeviceFilter` into a single ``SELECT``
+whose predicates are all index-friendly: prefixes become half-open ranges
+instead of ``LIKE`` or function calls, address-type groups become ``IN``
+lists, and nothing wraps a column except the ``NOCASE`` collation the vendor
+index is built with. Every filter has an index it can drive:
+
+``mac_prefix``    the primary key
+``vendor``        ``ix_device_vendor_last_seen`` (case-insensitive prefix)
+``address_type``  ``ix_device_address_type_last_seen``
+``since/until``   ``ix_device_last_seen_mac``
+``rssi_min/max``  ``ix_device_last_rssi_last_seen`` (latest RSSI)
+
+When several filters are given SQLite picks one of these indexes and checks
+the remaining predicates on the rows it finds.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import and_, select
+
+from core.address import PUBLIC, RANDOM_TYPES
+from core.db import get_read_engine
+from core.models import Device
+
+# sorts after any character that can follow a prefix, so ``< prefix + MAX``
+# bounds every string starting with ``prefix``
+_MAX_CHAR = "\U0010ffff"
+ADDRESS_TYPES = frozenset({PUBLIC, "random", *RANDOM_TYPES})
+# RSSI is stored as a signed byte; a one-sided RSSI range is closed with
+# these so SQLite weighs it like any other bounded index range
+RSSI_MIN, RSSI_MAX = -128, 127
+
+
+@dataclass
+class DeviceFilter:
+    """Search criteria; ``None`` fields do not filter."""
+
+    vendor: Optional[str] = None
+    rssi_min: Optional[int] = None
+    rssi_max: Optional[int] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    address_type: Optional[str] = None
+    mac_prefix: Optional[str] = None
+
+
+def normalize_mac_prefix(prefix: str) -> str:
+    """Return ``prefix`` in the stored ``AA:BB:CC`` form.
+
+    Separators (``:``, ``-``, ``.``) are optional and case is ignored, so
+    ``c47c``, ``C4-7C`` and ``C4:7C`` are the same prefix. Raises
+    ``ValueError`` for anything that is not hexadecimal.
+    """
+    digits = "".join(c for c in prefix if c not in ":-.").upper()
+    if not digits or len(digits) > 12:
+        raise ValueError(f"Invalid MAC prefix {prefix!r}")
+    try:
+        int(digits, 16)
+    except ValueError:
+        raise ValueError(f"Invalid MAC prefix {prefix!r}") from None
+    return ":".join(digits[i : i + 2] for i in range(0, len(digits), 2))
+
+
+def _prefix(column, prefix: str):
+    return and_(column >= prefix, column < prefix + _MAX_CHAR)
+
+
+def build_search(criteria: DeviceFilter, limit: int = 100):
+    """Return the ``SELECT`` for ``criteria``, newest devices first.
+
+    Raises ``ValueError`` for an unknown address type or a malformed MAC
+    prefix.
+    """
+    where = []
+    if criteria.mac_prefix:
+        where.append(_prefix(Device.mac, normalize_mac_prefix(criteria.mac_prefix)))
+    if criteria.vendor:
+        where.append(_prefix(Device.vendor.collate("NOCASE"), criteria.vendor))
+    if criteria.address_type:
+        kind = criteria.address_type.lower()
+        if kind not in ADDRESS_TYPES:
+            raise ValueError(f"Unknown address type {criteria.address_type}")
+        if kind == "random":
+            where.append(Device.address_type.in_(sorted(RANDOM_TYPES)))
+        else:
+            where.append(Device.address_type == kind)
+    if criteria.since is not None:
+        where.append(Device.last_seen >= criteria.since)
+    if criteria.until is not None:
+        where.append(Device.last_seen < criteria.until)
+    if criteria.rssi_min is not None or criteria.rssi_max is not None:
+        low = RSSI_MIN if criteria.rssi_min is None else criteria.rssi_min
+        high = RSSI_MAX if criteria.rssi_max is None else criteria.rssi_max
+        where.append(Device.last_rssi.between(low, high))
+    return (
+        select(Device)
+        .where(*where)
+        .order_by(Device.last_seen.desc(), Device.mac.desc())
+        .limit(limit)
+    )
+
+
+def search_devices(criteria: DeviceFilter, limit: int = 100) -> List[dict]:
+    """Return up to ``limit`` devices matching ``criteria``."""
+    stmt = build_search(criteria, limit)
+    with get_read_engine().connect() as conn:
+        return [dict(row) for row in conn.execute(stmt).mappings()]
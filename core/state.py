@@ -0,0 +1,178 @@
+"""In-memory view of the devices the scanner is currently seeing.
+
+Every sighting updates a :class:`DeviceState` before it is handed to the
+persistence stage, so read paths can answer "what is around right now"
+without touching SQLite. Each entry keeps its recent RSSI samples in a
+fixed-capacity ring buffer backed by ``array`` so memory per device is
+bounded regardless of how long the device has been seen.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def _clamp_rssi(rssi: int) -> int:
+    return max(-128, min(127, int(rssi)))
+
+
+class DeviceState:
+    """Latest known state of one MAC plus a ring buffer of recent RSSI."""
+
+    __slots__ = (
+        "mac",
+        "last_rssi",
+        "last_name",
+        "vendor",
+        "address_type",
+        "first_seen",
+        "last_seen",
+        "_rssi",
+        "_ts",
+        "_head",
+        "_count",
+    )
+
+    def __init__(self, mac: str, capacity: int, now: float) -> None:
+        self.mac = mac
+        self.last_rssi: Optional[int] = None
+        self.last_name: Optional[str] = None
+        self.vendor: Optional[str] = None
+        self.address_type: Optional[str] = None
+        self.first_seen = now
+        self.last_seen = now
+        self._rssi = array("b", bytes(capacity))
+        self._ts = array("I", [0]) * capacity
+        self._head = 0
+        self._count = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._rssi)
+
+    def record(
+        self,
+        rssi: int,
+        now: float,
+        name: Optional[str] = None,
+        vendor: Optional[str] = None,
+        address_type: Optional[str] = None,
+    ) -> None:
+        """Store a sighting, overwriting the oldest sample when full."""
+        rssi = _clamp_rssi(rssi)
+        self._rssi[self._head] = rssi
+        self._ts[self._head] = int(now)
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        self.last_rssi = rssi
+        self.last_seen = now
+        if name:
+            self.last_name = name
+        if vendor is not None:
+            self.vendor = vendor
+        if address_type is not None:
+            self.address_type = address_type
+
+    def history(self) -> List[Tuple[int, int]]:
+        """Return buffered ``(epoch_seconds, rssi)`` pairs, oldest first."""
+        start = (self._head - self._count) % self.capacity
+        return [
+            (self._ts[i % self.capacity], self._rssi[i % self.capacity])
+            for i in range(start, start + self._count)
+        ]
+
+    def nbytes(self) -> int:
+        """Approximate memory used by this entry."""
+        return sys.getsizeof(self) + sys.getsizeof(self._rssi) + sys.getsizeof(self._ts)
+
+    def to_dict(self, history: bool = False) -> dict:
+        data = {
+            "mac": self.mac,
+            "vendor": self.vendor,
+            "address_type": self.address_type,
+            "name": self.last_name,
+            "rssi": self.last_rssi,
+            "first_seen": datetime.fromtimestamp(self.first_seen).isoformat(),
+            "last_seen": datetime.fromtimestamp(self.last_seen).isoformat(),
+        }
+        if history:
+            data["rssi_history"] = [
+                {"t": datetime.fromtimestamp(ts).isoformat(), "rssi": rssi}
+                for ts, rssi in self.history()
+            ]
+        return data
+
+
+class DeviceRegistry:
+    """Thread-safe map of MAC to :class:`DeviceState`."""
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self._devices: Dict[str, DeviceState] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __contains__(self, mac: str) -> bool:
+        return mac in self._devices
+
+    def update(
+        self,
+        mac: str,
+        rssi: int,
+        name: Optional[str] = None,
+        vendor: Optional[str] = None,
+        now: Optional[float] = None,
+        address_type: Optional[str] = None,
+    ) -> DeviceState:
+        """Record a sighting and return the device's state."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._devices.get(mac)
+            if state is None:
+                state = self._devices[mac] = DeviceState(mac, self.capacity, now)
+            state.record(rssi, now, name, vendor, address_type)
+            return state
+
+    def get(self, mac: str) -> Optional[DeviceState]:
+        return self._devices.get(mac)
+
+    def recent(self, limit: Optional[int] = None) -> List[DeviceState]:
+        """Return states ordered by most recently seen."""
+        with self._lock:
+            states = sorted(
+                self._devices.values(), key=lambda s: s.last_seen, reverse=True
+            )
+        return states if limit is None else states[:limit]
+
+    def remove(self, mac: str) -> Optional[DeviceState]:
+        with self._lock:
+            return self._devices.pop(mac, None)
+
+    def prune(self, max_age: float, now: Optional[float] = None) -> int:
+        """Forget devices not seen for ``max_age`` seconds."""
+        cutoff = (time.time() if now is None else now) - max_age
+        with self._lock:
+            stale = [m for m, s in self._devices.items() if s.last_seen < cutoff]
+            for mac in stale:
+                del self._devices[mac]
+        return len(stale)
+
+    def memory_usage(self) -> dict:
+        """Report the number of tracked devices and their memory footprint."""
+        with self._lock:
+            states = list(self._devices.values())
+        total = sum(s.nbytes() for s in states) + sys.getsizeof(self._devices)
+        return {
+            "devices": len(states),
+            "capacity": self.capacity,
+            "bytes": total,
+            "bytes_per_device": total // len(states) if states else 0,
+        }
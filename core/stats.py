@@ -0,0 +1,263 @@
+"""Dashboard statistics kept up to date from the event stream.
+
+:class:`StatsService` is fed every event passed to
+``core.scanner.broadcast_event`` and maintains the totals and hourly
+activity the dashboard polls from ``/api/stats``. Reads are served from
+memory and never touch the database; the counters are saved periodically
+and loaded before ingest starts. A database without saved counters is
+seeded once from ``Device`` and the hourly RSSI rollups. A web process
+without a scanner of its own follows the saved counters instead.
+
+New devices are recognised against the ``known`` most recently seen MACs,
+so memory stays bounded; a device that returns after dropping out of that
+window is counted again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Set
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.sqlite import insert
+
+from config import STATS_HOURS, STATS_KNOWN_DEVICES, STATS_PERSIST_INTERVAL
+from core.db import get_engine, get_read_engine
+from core.lifecycle import APPEARED, LOST
+from core.models import ActivityHour, Device, RssiHour, ScannerStats
+
+logger = logging.getLogger(__name__)
+
+
+class _Hour:
+    __slots__ = ("devices", "base", "visits")
+
+    def __init__(self, base: int = 0, visits: int = 0) -> None:
+        self.devices: Set[str] = set()
+        # devices counted before a restart; their MACs are not kept
+        self.base = base
+        self.visits = visits
+
+    @property
+    def unique_devices(self) -> int:
+        return self.base + len(self.devices)
+
+
+class StatsService:
+    """Incrementally maintained device, visit and hourly activity counters."""
+
+    def __init__(
+        self,
+        hours: int = STATS_HOURS,
+        interval: float = STATS_PERSIST_INTERVAL,
+        known: int = STATS_KNOWN_DEVICES,
+    ) -> None:
+        self.hours = hours
+        self.interval = interval
+        self.known = known
+        self.total_devices = 0
+        self.total_visits = 0
+        self.total_events = 0
+        self.last_detection: Optional[datetime] = None
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        self._hourly: "OrderedDict[datetime, _Hour]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._saved_version = 0
+        self._cache: Optional[dict] = None
+        self._cache_version = -1
+
+    def observe(self, event: dict, now: Optional[datetime] = None) -> None:
+        """Account for one broadcast event."""
+        kind = event.get("event")
+        mac = event.get("address")
+        now = now or datetime.now()
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            self.total_events += 1
+            if mac and kind != LOST:
+                self.last_detection = now
+                if mac in self._known:
+                    self._known.move_to_end(mac)
+                else:
+                    self._known[mac] = None
+                    self.total_devices += 1
+                    if len(self._known) > self.known:
+                        self._known.popitem(last=False)
+                bucket = self._bucket(hour)
+                bucket.devices.add(mac)
+                if kind == APPEARED:
+                    self.total_visits += 1
+                    bucket.visits += 1
+            self._version += 1
+
+    def _bucket(self, hour: datetime) -> _Hour:
+        bucket = self._hourly.get(hour)
+        if bucket is None:
+            bucket = self._hourly[hour] = _Hour()
+            while len(self._hourly) > self.hours:
+                self._hourly.popitem(last=False)
+        return bucket
+
+    def snapshot(self) -> dict:
+        """Return the ``/api/stats`` payload; rebuilt only after changes."""
+        with self._lock:
+            if self._cache_version != self._version:
+                self._cache = {
+                    "stats": {
+                        "total_devices": self.total_devices,
+                        "total_visits": self.total_visits,
+                        "total_events": self.total_events,
+                        "last_detection": (
+                            self.last_detection.isoformat()
+                            if self.last_detection
+                            else None
+                        ),
+                    },
+                    "hourly": [
+                        {
+                            "hour": hour.isoformat(),
+                            "unique_devices": bucket.unique_devices,
+                            "visits": bucket.visits,
+                        }
+                        for hour, bucket in self._hourly.items()
+                    ],
+                }
+                self._cache_version = self._version
+            return self._cache
+
+    def load(self, now: Optional[datetime] = None) -> None:
+        """Restore saved counters, seeding them from the database if absent."""
+        now = now or datetime.now()
+        since = now.replace(minute=0, second=0, microsecond=0) - timedelta(
+            hours=self.hours - 1
+        )
+        with get_read_engine().connect() as conn:
+            recent = conn.execute(
+                select(Device.mac)
+                .order_by(Device.last_seen.desc(), Device.mac.desc())
+                .limit(self.known)
+            ).scalars()
+            known = OrderedDict.fromkeys(reversed(list(recent)))
+            saved = conn.execute(select(ScannerStats)).mappings().first()
+            if saved is not None:
+                totals = (
+                    saved["total_devices"],
+                    saved["total_visits"],
+                    saved["total_events"],
+                    saved["last_detection"],
+                )
+                hourly = conn.execute(
+                    select(
+                        ActivityHour.hour,
+                        ActivityHour.unique_devices,
+                        ActivityHour.visits,
+                    )
+                    .where(ActivityHour.hour >= since)
+                    .order_by(ActivityHour.hour)
+                ).all()
+            else:
+                count, last = conn.execute(
+                    select(func.count(), func.max(Device.last_seen))
+                ).one()
+                totals = (count, count, 0, last)
+                hourly = conn.execute(
+                    select(RssiHour.bucket, func.count(), literal(0))
+                    .where(RssiHour.bucket >= since)
+                    .group_by(RssiHour.bucket)
+                    .order_by(RssiHour.bucket)
+                ).all()
+        with self._lock:
+            self._known = known
+            (
+                self.total_devices,
+                self.total_visits,
+                self.total_events,
+                self.last_detection,
+            ) = totals
+            self._hourly = OrderedDict(
+                (hour, _Hour(devices, visits)) for hour, devices, visits in hourly
+            )
+            self._version += 1
+            self._saved_version = self._version
+
+    def save(self) -> bool:
+        """Write the counters and hourly buckets if they changed."""
+        with self._lock:
+            if self._saved_version == self._version:
+                return False
+            version = self._version
+            totals = {
+                "id": 1,
+                "total_devices": self.total_devices,
+                "total_visits": self.total_visits,
+                "total_events": self.total_events,
+                "last_detection": self.last_detection,
+            }
+            hourly = [
+                {
+                    "hour": hour,
+                    "unique_devices": bucket.unique_devices,
+                    "visits": bucket.visits,
+                }
+                for hour, bucket in self._hourly.items()
+            ]
+        stats = insert(ScannerStats.__table__).values(totals)
+        stats = stats.on_conflict_do_update(
+            index_elements=["id"], set_={k: v for k, v in totals.items() if k != "id"}
+        )
+        with get_engine().begin() as conn:
+            conn.execute(stats)
+            if hourly:
+                stmt = insert(ActivityHour.__table__)
+                conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["hour"],
+                        set_={
+                            "unique_devices": stmt.excluded.unique_devices,
+                            "visits": stmt.excluded.visits,
+                        },
+                    ),
+                    hourly,
+                )
+                conn.execute(
+                    delete(ActivityHour).where(ActivityHour.hour < hourly[0]["hour"])
+                )
+        with self._lock:
+            self._saved_version = max(self._saved_version, version)
+        return True
+
+    def follow(self, stop: threading.Event) -> None:
+        """Reload the saved counters every ``interval`` seconds until stopped.
+
+        For a web process that serves ``/api/stats`` while a scanner in
+        another process observes the events and saves them.
+        """
+        while not stop.wait(self.interval):
+            try:
+                self.load()
+            except Exception as exc:
+                logger.error("Reloading stats failed: %s", exc)
+
+    async def run(self, stop_event: asyncio.Event, executor=None) -> None:
+        """Save every ``interval`` seconds until stopped.
+
+        Call :meth:`load` first, before any event is observed.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while not stop_event.is_set():
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    await loop.run_in_executor(executor, self.save)
+                except Exception as exc:
+                    logger.error("Saving stats failed: %s", exc)
+        finally:
+            logger.info("Stats stopped: %s", self.snapshot()["stats"])
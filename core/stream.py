@@ -0,0 +1,121 @@
+"""Continuous advertisement streaming built on a long-lived ``BleakScanner``.
+
+Instead of restarting the radio with ``BleakScanner.discover()`` every
+interval, :class:`AdvertisementStream` keeps one scanner running and pushes
+every advertisement reported to its ``detection_callback`` into a bounded
+queue. When consumers fall behind the configured overflow policy decides
+which advertisement is discarded, and the drop is counted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from bleak import BleakScanner
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop-oldest"
+DROP_NEWEST = "drop-newest"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST)
+# ``run_scanner`` modes: periodic discover() calls or one continuous scanner
+SCAN_MODES = ("poll", "stream")
+
+
+@dataclass
+class Advertisement:
+    """One advertisement as reported by the detection callback."""
+
+    address: str
+    name: Optional[str]
+    rssi: int
+    manufacturer_data: Dict[int, bytes] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+    device: object = None
+
+
+class AdvertisementQueue:
+    """Bounded queue with an overflow policy and drop counters."""
+
+    def __init__(self, maxsize: int = 1000, overflow: str = DROP_OLDEST) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy {overflow}")
+        self.overflow = overflow
+        self.received = 0
+        self.dropped = 0
+        self._queue: "asyncio.Queue[Advertisement]" = asyncio.Queue(maxsize)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def put(self, adv: Advertisement) -> bool:
+        """Enqueue without blocking; return ``False`` if ``adv`` was dropped."""
+        self.received += 1
+        if self._queue.full():
+            self.dropped += 1
+            if self.overflow == DROP_NEWEST:
+                return False
+            self._queue.get_nowait()
+        self._queue.put_nowait(adv)
+        return True
+
+    async def get(self) -> Advertisement:
+        return await self._queue.get()
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "depth": self.qsize(),
+            "overflow": self.overflow,
+        }
+
+
+class AdvertisementStream:
+    """Run a ``BleakScanner`` continuously and queue every advertisement."""
+
+    def __init__(
+        self,
+        queue_size: int = 1000,
+        overflow: str = DROP_OLDEST,
+        scanner_factory=BleakScanner,
+    ) -> None:
+        self.queue = AdvertisementQueue(queue_size, overflow)
+        self._scanner_factory = scanner_factory
+        self._scanner = None
+
+    def _on_advertisement(self, device, adv) -> None:
+        self.queue.put(
+            Advertisement(
+                address=device.address,
+                name=adv.local_name or getattr(device, "name", None),
+                rssi=adv.rssi,
+                manufacturer_data=dict(adv.manufacturer_data or {}),
+                device=device,
+            )
+        )
+
+    async def start(self) -> None:
+        self._scanner = self._scanner_factory(detection_callback=self._on_advertisement)
+        await self._scanner.start()
+        logger.info("Continuous scan started")
+
+    async def stop(self) -> None:
+        if self._scanner is not None:
+            await self._scanner.stop()
+            self._scanner = None
+        logger.info("Continuous scan stopped: %s", self.queue.stats())
+
+    async def __aenter__(self) -> "AdvertisementStream":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def get(self) -> Advertisement:
+        return await self.queue.get()
@@ -1,24 +1,30 @@
 """Minimal Flask dashboard for BLE scans."""
 
 import asyncio
-import json
 import signal
-import json
-from sqlmodel import Session, select
-from typing import List
-
-from flask import Flask, redirect, render_template_string, request, url_for
 
-from sqlmodel import Session, select
-
-from core.db import get_engine
+from flask import (
+    Flask,
+    Response,
+    abort,
+    jsonify,
+    redirect,
+    render_template_string,
+    request,
+    url_for,
+)
+
+from core.cache import ResponseCache
+from core.db import get_device_page, get_read_engine
 from core.models import Device
 from core.utils import setup_logging
+from sqlmodel import Session, select
 
 setup_logging()
 app = Flask(__name__)
 
 STOP_EVENT: asyncio.Event | None = None
+RESPONSE_CACHE = ResponseCache()
 
 TEMPLATE = """
 <!doctype html>
@@ -34,70 +40,44 @@ TEMPLATE = """
 """
 
 
-@app.route("/")
-def index():
-    with Session(get_engine()) as session:
-        stmt = select(Device).order_by(Device.last_seen.desc()).limit(20)
-        results = []
-        for dev in session.exec(stmt):
-            hist = json.loads(dev.rssi_history or "[]")
-            rssi = hist[-1]["rssi"] if hist else None
-            results.append({
-                "mac": dev.mac,
-                "vendor": dev.vendor,
-                "last_seen": dev.last_seen,
-                "rssi": rssi,
-            })
-    return render_template_string(TEMPLATE, devices=results)
-    from core.db import get_engine
-    from core.models import Device
-
-    engine = get_engine()
-    with Session(engine) as session:
-        stmt = select(Device).order_by(Device.last_seen.desc()).limit(20)
-        rows = session.exec(stmt).all()
-        devices = [
-            {
-                "mac": d.mac,
-                "vendor": d.vendor,
-                "last_seen": d.last_seen,
-                "rssi": (json.loads(d.rssi_history or "[]") or [{}])[-1].get("rssi"),
-            }
-            for d in rows
-        ]
-    return render_template_string(TEMPLATE, devices=devices)
-
+def _cached(render_html):
+    """Serve ``render_html()`` through the response cache for this URL."""
+    status, cached = RESPONSE_CACHE.respond(
+        request.full_path,
+        request.headers.get("If-None-Match"),
+        lambda: (render_html().encode(), "text/html", {}),
+    )
+    response = Response(
+        cached.body if status == 200 else b"",
+        status=status,
+        mimetype=cached.media_type or None,
+    )
+    response.headers["ETag"] = cached.etag
+    return response
 
-@app.get("/history")
-def history():
-    page = int(request.args.get("page", "1"))
-    per_page = 20
-    offset = (page - 1) * per_page
-    with Session(get_engine()) as session:
-        stmt = (
-            select(Device)
-            .order_by(Device.last_seen.desc())
-            .limit(per_page)
-            .offset(offset)
-        )
-        rows = [r.dict() for r in session.exec(stmt)]
-    from core.db import get_engine
-    from core.models import Device
 
-    engine = get_engine()
-    with Session(engine) as session:
+def _render_index() -> str:
+    with Session(get_read_engine()) as session:
         stmt = (
-            select(Device.mac, Device.vendor, Device.last_seen)
+            select(Device.mac, Device.vendor, Device.last_seen, Device.last_rssi)
             .order_by(Device.last_seen.desc())
-            .offset(offset)
-            .limit(per_page)
+            .limit(20)
         )
-        rows = [
-            {"mac": d.mac, "vendor": d.vendor, "last_seen": d.last_seen}
-            for d in session.exec(stmt)
+        devices = [
+            {"mac": mac, "vendor": vendor, "last_seen": last_seen, "rssi": rssi}
+            for mac, vendor, last_seen, rssi in session.execute(stmt)
         ]
-    next_url = url_for("history", page=page + 1)
-    prev_url = url_for("history", page=page - 1) if page > 1 else None
+    return render_template_string(TEMPLATE, devices=devices)
+
+
+@app.route("/")
+def index():
+    return _cached(_render_index)
+
+
+def _render_history(cursor) -> str:
+    per_page = 20
+    rows, next_cursor = get_device_page(per_page, cursor)
     html = (
         "<h1>History</h1><ul>"
         + "".join(
@@ -105,12 +85,27 @@ def history():
         )
         + "</ul>"
     )
-    html += f'<a href="{next_url}">Next</a>'
-    if prev_url:
-        html += f' | <a href="{prev_url}">Prev</a>'
+    if next_cursor:
+        html += f'<a href="{url_for("history", cursor=next_cursor)}">Next</a>'
+    if cursor:
+        html += f' | <a href="{url_for("history")}">First</a>'
     return html
 
 
+@app.get("/history")
+def history():
+    cursor = request.args.get("cursor")
+    try:
+        return _cached(lambda: _render_history(cursor))
+    except ValueError:
+        abort(400)
+
+
+@app.get("/cache")
+def cache_stats():
+    return jsonify(RESPONSE_CACHE.snapshot())
+
+
 @app.route("/shutdown")
 def shutdown():
     if STOP_EVENT:
@@ -1,6 +1,21 @@
+import asyncio
 import json
 import logging
 import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from config import (
+    BASE_DIR,
+    MQTT_BATCH_FORMAT,
+    MQTT_BATCH_SIZE,
+    MQTT_BUFFER_MAX,
+    MQTT_FLUSH_INTERVAL,
+    MQTT_SPOOL_MAX_BYTES,
+)
 
 try:
     import paho.mqtt.client as mqtt
@@ -14,6 +29,7 @@ MQTT_TLS = os.getenv("MQTT_TLS", "0") == "1"
 MQTT_TLS_CA = os.getenv("MQTT_TLS_CA")
 MQTT_TLS_CERT = os.getenv("MQTT_TLS_CERT")
 MQTT_TLS_KEY = os.getenv("MQTT_TLS_KEY")
+MQTT_SPOOL_PATH = os.getenv("MQTT_SPOOL_PATH", os.path.join(BASE_DIR, "mqtt_spool.db"))
 _client = mqtt.Client() if mqtt else None
 
 
@@ -23,7 +39,10 @@ def setup() -> None:
         return
     try:
         if MQTT_TLS:
-            _client.tls_set(ca_certs=MQTT_TLS_CA, certfile=MQTT_TLS_CERT, keyfile=MQTT_TLS_KEY)
+            _client.tls_set(
+                ca_certs=MQTT_TLS_CA, certfile=MQTT_TLS_CERT, keyfile=MQTT_TLS_KEY
+            )
+        _client.on_connect = OUTBOX.on_connect
         _client.connect(MQTT_BROKER)
         _client.loop_start()
         logger.info("Connected to MQTT broker %s", MQTT_BROKER)
@@ -31,11 +50,238 @@ def setup() -> None:
         logger.error("MQTT connect failed: %s", exc)
 
 
+class Spool:
+    """SQLite-backed FIFO of payloads that could not be published.
+
+    Once the stored payloads exceed ``max_bytes`` the oldest are discarded.
+    Their total size is summed once when the file is opened and then kept
+    up to date by every push, eviction and removal.
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.discarded = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._bytes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS spool "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, payload BLOB NOT NULL)"
+            )
+            self._bytes = self._conn.execute(
+                "SELECT coalesce(sum(length(payload)), 0) FROM spool"
+            ).fetchone()[0]
+        return self._conn
+
+    def push(self, payload: bytes) -> None:
+        with self._lock, self._db() as conn:
+            conn.execute("INSERT INTO spool (payload) VALUES (?)", (payload,))
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                row = conn.execute(
+                    "SELECT id, length(payload) FROM spool ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                conn.execute("DELETE FROM spool WHERE id = ?", (row[0],))
+                self._bytes -= row[1]
+                self.discarded += 1
+
+    def peek(self, limit: int) -> List[tuple]:
+        with self._lock:
+            return (
+                self._db()
+                .execute("SELECT id, payload FROM spool ORDER BY id LIMIT ?", (limit,))
+                .fetchall()
+            )
+
+    def remove(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        with self._lock, self._db() as conn:
+            # only the removed id range is summed, via the primary key
+            removed = conn.execute(
+                "SELECT coalesce(sum(length(payload)), 0) FROM spool WHERE id <= ?",
+                (max(ids),),
+            ).fetchone()[0]
+            conn.execute("DELETE FROM spool WHERE id <= ?", (max(ids),))
+            self._bytes -= removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._db()
+            rows = conn.execute("SELECT count(*) FROM spool").fetchone()[0]
+            return {
+                "rows": rows,
+                "bytes": self._bytes,
+                "discarded": self.discarded,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class MqttOutbox:
+    """Batch events into MQTT messages and spool them while offline.
+
+    :meth:`add` only appends to an in-memory buffer. Every ``flush_interval``
+    seconds the buffer is encoded as batches of up to ``batch_size`` events
+    (a JSON array or newline-delimited JSON) and published. Batches that
+    cannot be published go to the :class:`Spool`, which is replayed in order
+    as soon as the broker is reachable again. If ``max_buffer`` events pile
+    up before a flush gets to them, the oldest batch is spilled to the spool
+    straight away.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        topic: str = MQTT_TOPIC,
+        batch_size: int = MQTT_BATCH_SIZE,
+        flush_interval: float = MQTT_FLUSH_INTERVAL,
+        fmt: str = MQTT_BATCH_FORMAT,
+        spool: Optional[Spool] = None,
+        max_buffer: int = MQTT_BUFFER_MAX,
+    ) -> None:
+        if fmt not in ("json", "ndjson"):
+            raise ValueError(f"Unsupported batch format {fmt}")
+        self.client = client
+        self.topic = topic
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fmt = fmt
+        self.max_buffer = max(max_buffer, batch_size)
+        self.spool = spool or Spool(MQTT_SPOOL_PATH, MQTT_SPOOL_MAX_BYTES)
+        self.published_messages = 0
+        self.published_events = 0
+        self.spooled = 0
+        self.replayed = 0
+        self._buffer: Deque[dict] = deque()
+        self._flush_lock = threading.Lock()
+        self._rate_window: Deque[tuple] = deque()
+
+    @property
+    def depth(self) -> int:
+        return len(self._buffer)
+
+    def add(self, event: dict) -> None:
+        self._buffer.append(event)
+        if len(self._buffer) >= self.max_buffer:
+            self._spill()
+
+    def _spill(self) -> None:
+        # flushes are stalled: move the oldest batch to disk, not RAM
+        events = []
+        while self._buffer and len(events) < self.batch_size:
+            events.append(self._buffer.popleft())
+        if events:
+            self.spool.push(self._encode(events))
+            self.spooled += 1
+
+    def _encode(self, events: List[dict]) -> bytes:
+        if self.fmt == "ndjson":
+            return "".join(json.dumps(e, default=str) + "\n" for e in events).encode()
+        return json.dumps(events, default=str).encode()
+
+    def _connected(self) -> bool:
+        return self.client is not None and self.client.is_connected()
+
+    def _publish(self, payload: bytes) -> bool:
+        try:
+            info = self.client.publish(self.topic, payload)
+        except Exception as exc:
+            logger.error("MQTT publish failed: %s", exc)
+            return False
+        return getattr(info, "rc", 0) == 0
+
+    def _count(self, events: int) -> None:
+        now = time.monotonic()
+        self.published_messages += 1
+        self.published_events += events
+        self._rate_window.append((now, events))
+        while self._rate_window and now - self._rate_window[0][0] > 60:
+            self._rate_window.popleft()
+
+    def replay(self, batch: int = 100) -> int:
+        """Publish spooled payloads in order while the broker accepts them."""
+        replayed = 0
+        while self._connected():
+            rows = self.spool.peek(batch)
+            if not rows:
+                break
+            done = []
+            for row_id, payload in rows:
+                if not self._publish(payload):
+                    break
+                done.append(row_id)
+            self.spool.remove(done)
+            replayed += len(done)
+            if len(done) < len(rows):
+                break
+        if replayed:
+            self.replayed += replayed
+            logger.info("Replayed %d spooled MQTT messages", replayed)
+        return replayed
+
+    def flush(self) -> int:
+        """Publish or spool everything buffered; return events handled."""
+        with self._flush_lock:
+            handled = 0
+            if self._connected():
+                self.replay()
+            while self._buffer:
+                events = [
+                    self._buffer.popleft()
+                    for _ in range(min(self.batch_size, len(self._buffer)))
+                ]
+                payload = self._encode(events)
+                if self._connected() and self._publish(payload):
+                    self._count(len(events))
+                else:
+                    self.spool.push(payload)
+                    self.spooled += 1
+                handled += len(events)
+            return handled
+
+    def on_connect(self, *_args) -> None:
+        """paho ``on_connect`` hook: replay the spool after reconnecting."""
+        threading.Thread(target=self.flush, daemon=True).start()
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Flush every ``flush_interval`` seconds until ``stop_event`` is set."""
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.to_thread(self.flush)
+
+    def snapshot(self) -> dict:
+        """Return publish rate, spool size and replay progress."""
+        window = sum(n for _, n in self._rate_window)
+        return {
+            "buffer_depth": self.depth,
+            "published_messages": self.published_messages,
+            "published_events": self.published_events,
+            "publish_rate": window / 60.0,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "spool": self.spool.stats(),
+        }
+
+
+OUTBOX = MqttOutbox(_client)
+
+
 def publish_event(event: dict) -> None:
     if _client is None:
         return
-    try:
-        payload = json.dumps(event)
-        _client.publish(MQTT_TOPIC, payload)
-    except Exception as exc:
-        logger.error("MQTT publish failed: %s", exc)
+    OUTBOX.add(event)
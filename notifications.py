@@ -1,7 +1,19 @@
-import requests
+import asyncio
 import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+import requests
+
 from config import (
     DISCORD_WEBHOOK_URL,
+    NOTIFY_CHANNEL_COOLDOWN,
+    NOTIFY_DEVICE_COOLDOWN,
+    NOTIFY_DIGEST_WINDOW,
+    NOTIFY_QUEUE_SIZE,
+    NOTIFY_RETRIES,
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_CHAT_ID,
     WHATSAPP_API_URL,
@@ -16,7 +28,7 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 
-def send_discord_notification(message):
+def send_discord_notification(message, session=None):
     """Send notification to Discord using webhook."""
     try:
         if not DISCORD_WEBHOOK_URL:
@@ -24,7 +36,9 @@ def send_discord_notification(message):
             return False
 
         payload = {"content": message}
-        response = requests.post(DISCORD_WEBHOOK_URL, json=payload, timeout=10)
+        response = (session or requests).post(
+            DISCORD_WEBHOOK_URL, json=payload, timeout=10
+        )
         response.raise_for_status()
         logger.info("Discord notification sent successfully")
         return True
@@ -34,7 +48,7 @@ def send_discord_notification(message):
         return False
 
 
-def send_telegram_notification(message):
+def send_telegram_notification(message, session=None):
     """Send notification via Telegram bot."""
     try:
         if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
@@ -44,7 +58,7 @@ def send_telegram_notification(message):
         url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
         payload = {"chat_id": TELEGRAM_CHAT_ID, "text": message, "parse_mode": "HTML"}
 
-        response = requests.post(url, json=payload, timeout=10)
+        response = (session or requests).post(url, json=payload, timeout=10)
         response.raise_for_status()
         logger.info("Telegram notification sent successfully")
         return True
@@ -54,7 +68,7 @@ def send_telegram_notification(message):
         return False
 
 
-def send_whatsapp_notification(message):
+def send_whatsapp_notification(message, session=None):
     """Send notification via WhatsApp Business API."""
     try:
         if not all([WHATSAPP_API_URL, WHATSAPP_AUTH_TOKEN, WHATSAPP_FROM, WHATSAPP_TO]):
@@ -68,7 +82,7 @@ def send_whatsapp_notification(message):
 
         payload = {"from": WHATSAPP_FROM, "to": WHATSAPP_TO, "text": {"body": message}}
 
-        response = requests.post(
+        response = (session or requests).post(
             WHATSAPP_API_URL, json=payload, headers=headers, timeout=10
         )
         response.raise_for_status()
@@ -99,3 +113,183 @@ def send_all_notifications(message):
         logger.info("Successfully sent notifications to all channels")
 
     return results
+
+
+def _channels() -> Dict[str, Callable]:
+    """Return the send function of every configured channel."""
+    channels = {}
+    if DISCORD_WEBHOOK_URL:
+        channels["discord"] = send_discord_notification
+    if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+        channels["telegram"] = send_telegram_notification
+    if all([WHATSAPP_API_URL, WHATSAPP_AUTH_TOKEN, WHATSAPP_FROM, WHATSAPP_TO]):
+        channels["whatsapp"] = send_whatsapp_notification
+    return channels
+
+
+def format_digest(addresses: List[str], limit: int = 20) -> str:
+    """Build one message announcing every address in ``addresses``."""
+    if len(addresses) == 1:
+        return f"New BLE device {addresses[0]}"
+    shown = ", ".join(addresses[:limit])
+    more = len(addresses) - limit
+    suffix = f" and {more} more" if more > 0 else ""
+    return f"{len(addresses)} new BLE devices: {shown}{suffix}"
+
+
+@dataclass
+class DispatcherStats:
+    """Counters describing the notification dispatcher."""
+
+    queued: int = 0
+    dropped: int = 0
+    suppressed: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    last_latency: float = 0.0
+    total_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.sent if self.sent else 0.0
+
+
+@dataclass
+class _Channel:
+    send: Callable
+    session: requests.Session = field(default_factory=requests.Session)
+    next_allowed: float = 0.0
+    pending: List[str] = field(default_factory=list)
+
+
+class NotificationDispatcher:
+    """Send notifications from a background task instead of the event loop.
+
+    New-device events are queued by :meth:`submit`, which never blocks. The
+    worker collects them for ``window`` seconds and sends one digest message
+    per channel, honouring a per-device cooldown (a MAC is announced at most
+    once per ``device_cooldown``) and a per-channel cooldown (at most one
+    message per ``channel_cooldown``). HTTP calls run in a worker thread on
+    pooled sessions and are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        window: float = NOTIFY_DIGEST_WINDOW,
+        device_cooldown: float = NOTIFY_DEVICE_COOLDOWN,
+        channel_cooldown: float = NOTIFY_CHANNEL_COOLDOWN,
+        maxsize: int = NOTIFY_QUEUE_SIZE,
+        retries: int = NOTIFY_RETRIES,
+        backoff: float = 1.0,
+        channels: Optional[Dict[str, Callable]] = None,
+    ) -> None:
+        self.window = window
+        self.device_cooldown = device_cooldown
+        self.channel_cooldown = channel_cooldown
+        self.maxsize = maxsize
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = DispatcherStats()
+        self._channel_funcs = channels
+        self._channels: Dict[str, _Channel] = {}
+        self._queue: Deque[str] = deque()
+        # oldest first, so expired cooldowns are dropped from the front
+        self._last_notified: "OrderedDict[str, float]" = OrderedDict()
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def submit(self, address: str, now: Optional[float] = None) -> bool:
+        """Queue a new-device notification; return ``False`` if not queued."""
+        now = time.time() if now is None else now
+        self._expire_cooldowns(now)
+        last = self._last_notified.get(address)
+        if last is not None and now - last < self.device_cooldown:
+            self.stats.suppressed += 1
+            return False
+        if len(self._queue) >= self.maxsize:
+            self.stats.dropped += 1
+            return False
+        self._last_notified[address] = now
+        self._last_notified.move_to_end(address)
+        self._queue.append(address)
+        self.stats.queued += 1
+        return True
+
+    def _expire_cooldowns(self, now: float) -> None:
+        last = self._last_notified
+        while last:
+            address, when = next(iter(last.items()))
+            if now - when < self.device_cooldown:
+                break
+            del last[address]
+
+    def _get_channels(self) -> Dict[str, _Channel]:
+        funcs = self._channel_funcs if self._channel_funcs is not None else _channels()
+        for name, send in funcs.items():
+            if name not in self._channels:
+                self._channels[name] = _Channel(send)
+        return self._channels
+
+    async def _send(self, name: str, channel: _Channel, message: str) -> bool:
+        for attempt in range(self.retries):
+            if attempt:
+                self.stats.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            start = time.perf_counter()
+            ok = await asyncio.to_thread(channel.send, message, channel.session)
+            if ok:
+                latency = time.perf_counter() - start
+                self.stats.sent += 1
+                self.stats.last_latency = latency
+                self.stats.total_latency += latency
+                return True
+        self.stats.failed += 1
+        logger.error(
+            "Giving up on %s notification after %d attempts", name, self.retries
+        )
+        return False
+
+    async def flush(self, now: Optional[float] = None) -> None:
+        """Send one digest per channel for everything queued so far."""
+        now = time.time() if now is None else now
+        addresses = list(self._queue)
+        self._queue.clear()
+        for name, channel in self._get_channels().items():
+            channel.pending.extend(addresses)
+            if not channel.pending or now < channel.next_allowed:
+                continue
+            message = format_digest(channel.pending)
+            channel.pending = []
+            channel.next_allowed = now + self.channel_cooldown
+            await self._send(name, channel, message)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Flush a digest every ``window`` seconds until ``stop_event`` is set."""
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.window)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.error("Notification dispatch failed: %s", exc)
+        for channel in self._channels.values():
+            channel.session.close()
+
+    def snapshot(self) -> dict:
+        """Return queue depth and send latency statistics."""
+        return {
+            "queue_depth": self.depth,
+            "queued": self.stats.queued,
+            "dropped": self.stats.dropped,
+            "suppressed": self.stats.suppressed,
+            "sent": self.stats.sent,
+            "failed": self.stats.failed,
+            "retries": self.stats.retries,
+            "last_send_latency": self.stats.last_latency,
+            "avg_send_latency": self.stats.avg_latency,
+        }
@@ -1,7 +1,9 @@
-from PyQt6 import QtWidgets
-from core.scanner import EVENT_BUS
 import asyncio
 import logging
+
+from PyQt6 import QtWidgets
+
+from core.scanner import EVENT_BUS
 from external_api import shodan_lookup, wigle_lookup
 
 logger = logging.getLogger(__name__)
@@ -26,9 +28,9 @@ class MainWindow(QtWidgets.QMainWindow):
         wigle_action.triggered.connect(lambda: asyncio.create_task(self.lookup_wigle()))
 
     async def update_loop(self):
-        while True:
-            event = await EVENT_BUS.get()
-            self.text.append(str(event))
+        async with EVENT_BUS.subscribe() as sub:
+            async for event in sub:
+                self.text.append(str(event))
 
     async def lookup_shodan(self) -> None:
         query, ok = QtWidgets.QInputDialog.getText(self, "Shodan Query", "Query:")
@@ -0,0 +1,116 @@
+"""Measure reader/writer concurrency for each SQLite storage profile.
+
+One thread writes batches of sightings through the write-behind path while
+reader threads page through devices, as the API handlers do. For every
+profile the script reports throughput, read latency percentiles and how
+many operations failed with ``database is locked``.
+
+    python scripts/bench_storage.py --seconds 5 --readers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from core import db as core_db  # noqa: E402
+from core.persistence import _PendingDevice, write_devices  # noqa: E402
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run_profile(profile: str, seconds: float, readers: int, batch: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        core_db.configure(str(Path(tmp) / "bench.db"), profile, readers)
+        core_db.init_db()
+        stop = threading.Event()
+        counts = {"writes": 0, "reads": 0, "write_errors": 0, "read_errors": 0}
+        latencies = []
+        lock = threading.Lock()
+
+        def writer():
+            n = 0
+            while not stop.is_set():
+                now = datetime.now()
+                pending = {}
+                for i in range(batch):
+                    dev = _PendingDevice(None, now, now)
+                    dev.history.append((now, -40 - i % 50))
+                    pending[f"{(n + i) % 5000:012X}"] = dev
+                n += batch
+                try:
+                    write_devices(pending)
+                    counts["writes"] += 1
+                except OperationalError:
+                    counts["write_errors"] += 1
+
+        def reader():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    core_db.get_devices(limit=50)
+                except OperationalError:
+                    with lock:
+                        counts["read_errors"] += 1
+                    continue
+                with lock:
+                    counts["reads"] += 1
+                    latencies.append(time.perf_counter() - start)
+
+        threads = [threading.Thread(target=writer)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        core_db.get_engine().dispose()
+        core_db.get_read_engine().dispose()
+    return {
+        "profile": profile,
+        "writes/s": counts["writes"] / seconds,
+        "reads/s": counts["reads"] / seconds,
+        "read p50 ms": _percentile(latencies, 50) * 1000,
+        "read p99 ms": _percentile(latencies, 99) * 1000,
+        "locked": counts["write_errors"] + counts["read_errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("profiles", nargs="*", default=["legacy", "durable", "fast"])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+    results = [
+        run_profile(p, args.seconds, args.readers, args.batch) for p in args.profiles
+    ]
+    headers = list(results[0])
+    print("  ".join(f"{h:>12}" for h in headers))
+    for row in results:
+        print(
+            "  ".join(
+                f"{v:>12.1f}" if isinstance(v, float) else f"{v:>12}"
+                for v in row.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
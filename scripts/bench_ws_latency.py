@@ -0,0 +1,122 @@
+"""Measure event-loop latency while streaming exports run against the API.
+
+A probe task wakes every ``--interval`` ms, as the WebSocket delta feed
+does, and records how late it was scheduled; any time the loop spends
+blocked in a database call shows up as WebSocket latency. Meanwhile
+``--exports`` clients repeatedly stream ``/export?format=jsonl`` through the
+ASGI app; clients turned away with 503 beyond ``API_EXPORT_STREAMS``
+back off briefly and are counted as rejected. ``--baseline`` drives the
+export iterator on the event loop, as the API did before reads went
+through :mod:`core.async_db`.
+
+    python scripts/bench_ws_latency.py --devices 20000 --exports 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from api import routes  # noqa: E402
+from api.app import app  # noqa: E402
+from core import db as core_db  # noqa: E402
+from core.persistence import _PendingDevice, write_devices  # noqa: E402
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def populate(devices: int, history: int, batch: int = 1000) -> None:
+    now = datetime.now()
+    for base in range(0, devices, batch):
+        pending = {}
+        for n in range(base, min(base + batch, devices)):
+            dev = _PendingDevice(None, now, now)
+            dev.history.extend((now, -40 - i % 50) for i in range(history))
+            pending[f"{n:012X}"] = dev
+        write_devices(pending)
+
+
+async def _on_loop(iterator):
+    for item in iterator:
+        yield item
+
+
+async def measure(seconds: float, exports: int, interval: float) -> dict:
+    stop = asyncio.Event()
+    lags = []
+    counts = {"exports": 0, "rejected": 0, "bytes": 0}
+
+    async def probe():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - start - interval)
+
+    async def client():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://b") as c:
+            while not stop.is_set():
+                async with c.stream("GET", "/export?format=jsonl") as resp:
+                    if resp.status_code == 503:
+                        counts["rejected"] += 1
+                        await asyncio.sleep(0.05)
+                        continue
+                    async for data in resp.aiter_bytes():
+                        counts["bytes"] += len(data)
+                counts["exports"] += 1
+
+    tasks = [asyncio.create_task(probe())]
+    tasks += [asyncio.create_task(client()) for _ in range(exports)]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return {
+        "exports/s": counts["exports"] / seconds,
+        "rejected/s": counts["rejected"] / seconds,
+        "MB/s": counts["bytes"] / seconds / 1e6,
+        "lag p50 ms": _percentile(lags, 50) * 1000,
+        "lag p99 ms": _percentile(lags, 99) * 1000,
+        "lag max ms": max(lags, default=0.0) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=20000)
+    parser.add_argument("--history", type=int, default=5)
+    parser.add_argument("--exports", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=10.0, help="probe ms")
+    parser.add_argument("--baseline", action="store_true")
+    args = parser.parse_args()
+    if args.baseline:
+        routes.iterate_read = _on_loop
+    with tempfile.TemporaryDirectory() as tmp:
+        core_db.configure(str(Path(tmp) / "bench.db"), "fast")
+        core_db.init_db()
+        populate(args.devices, args.history)
+        idle = asyncio.run(measure(args.seconds, 0, args.interval / 1000))
+        busy = asyncio.run(measure(args.seconds, args.exports, args.interval / 1000))
+        core_db.get_engine().dispose()
+        core_db.get_read_engine().dispose()
+    print(f"{'':>8}  " + "  ".join(f"{h:>12}" for h in busy))
+    for name, row in (("idle", idle), ("exports", busy)):
+        print(f"{name:>8}  " + "  ".join(f"{v:>12.1f}" for v in row.values()))
+
+
+if __name__ == "__main__":
+    main()
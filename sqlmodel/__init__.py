@@ -1,11 +1,39 @@
-
 from __future__ import annotations
 
-from typing import Any, Optional, Callable
-from sqlalchemy.orm import DeclarativeBase, mapped_column, Session as _Session
-from sqlalchemy import create_engine, select, delete, ForeignKey
+import typing
+from typing import Any, Callable, Optional
+
+from sqlalchemy import ForeignKey, create_engine, delete, select, text
+from sqlalchemy.orm import DeclarativeBase, Mapped
+from sqlalchemy.orm import Session as _Session
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.orm.properties import MappedColumn
+
 
 class SQLModel(DeclarativeBase):
+    __abstract__ = True
+
+    def __init_subclass__(cls, table: bool = False, **kw: Any) -> None:
+        if not table:
+            cls.__abstract__ = True
+            super().__init_subclass__(**kw)
+            return
+        cls.__abstract__ = False
+        if "__tablename__" not in cls.__dict__:
+            cls.__tablename__ = cls.__name__.lower()
+        hints = typing.get_type_hints(cls)
+        annotations = dict(cls.__dict__.get("__annotations__", {}))
+        for name in annotations:
+            if name.startswith("__"):
+                continue
+            hint = hints[name]
+            annotations[name] = Mapped[hint]
+            value = cls.__dict__.get(name)
+            if not isinstance(value, MappedColumn):
+                setattr(cls, name, mapped_column(default=value))
+        cls.__annotations__ = annotations
+        super().__init_subclass__(**kw)
+
     def dict(self) -> dict:
         return {c.name: getattr(self, c.name) for c in self.__table__.columns}
 
@@ -24,13 +52,30 @@ def Field(
     *,
     primary_key: bool = False,
     foreign_key: Optional[str] = None,
+    index: bool = False,
     default_factory: Optional[Callable[[], Any]] = None,
+    sa_column_kwargs: Optional[dict] = None,
 ):
-    if default_factory is not None:
-        default = default_factory()
     args = []
     if foreign_key is not None:
         args.append(ForeignKey(foreign_key))
-    return mapped_column(*args, default=default, primary_key=primary_key)
+    kwargs: dict = {"primary_key": primary_key, "index": index}
+    if primary_key:
+        kwargs["nullable"] = False
+    if default_factory is not None:
+        kwargs["default"] = default_factory
+    elif default is not None:
+        kwargs["default"] = default
+    kwargs.update(sa_column_kwargs or {})
+    return mapped_column(*args, **kwargs)
+
 
-__all__ = ["SQLModel", "Session", "Field", "create_engine", "select", "delete"]
+__all__ = [
+    "SQLModel",
+    "Session",
+    "Field",
+    "create_engine",
+    "select",
+    "delete",
+    "text",
+]
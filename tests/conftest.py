@@ -0,0 +1,28 @@
+import pytest
+
+from core import db as core_db
+
+
+@pytest.fixture
+def configure_db(monkeypatch):
+    """Return a function that rebinds ``core.db`` to a database file.
+
+    It goes through :func:`core.db.configure`, so tests get the same
+    read-only reader engine as production; extra keyword arguments are
+    passed on to it. The engines and any raw partition store a test
+    installs are closed and the originals restored after the test.
+    """
+    raw_store = core_db._raw_store
+    for name in ("DB_PATH", "PROFILE", "_engine", "_read_engine", "_raw_store"):
+        monkeypatch.setattr(core_db, name, getattr(core_db, name))
+
+    def configure(path, profile="fast", **kwargs):
+        core_db.DB_PATH = str(path)
+        core_db.configure(str(path), profile, **kwargs)
+        return core_db.get_engine()
+
+    yield configure
+    core_db.get_engine().dispose()
+    core_db.get_read_engine().dispose()
+    if core_db._raw_store not in (None, raw_store):
+        core_db._raw_store.close()
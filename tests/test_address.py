@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from core.address import (
+    NON_RESOLVABLE_PRIVATE,
+    PUBLIC,
+    RANDOM_STATIC,
+    RESOLVABLE_PRIVATE,
+    classify_address,
+    is_random,
+    reported_address_type,
+)
+
+
+def test_classify_reported_random_uses_top_bits():
+    assert classify_address("C4:00:00:00:00:01", "random") == RANDOM_STATIC
+    assert classify_address("4A:00:00:00:00:01", "random") == RESOLVABLE_PRIVATE
+    assert classify_address("1A:00:00:00:00:01", True) == NON_RESOLVABLE_PRIVATE
+
+
+def test_classify_reported_public():
+    assert classify_address("C4:00:00:00:00:01", "public") == PUBLIC
+    assert classify_address("C4:00:00:00:00:01", False) == PUBLIC
+
+
+def test_classify_without_hint():
+    # locally administered bit set: cannot be an IEEE assignment
+    assert classify_address("7A:00:00:00:00:01") == RESOLVABLE_PRIVATE
+    assert classify_address("1A:00:00:00:00:01") == NON_RESOLVABLE_PRIVATE
+    # top two bits 11 / 01 with the LA bit clear
+    assert classify_address("C4:00:00:00:00:01") == RANDOM_STATIC
+    assert classify_address("F8:00:00:00:00:01") == RANDOM_STATIC
+    assert classify_address("40:00:00:00:00:01") == RESOLVABLE_PRIVATE
+    assert classify_address("4C:00:00:00:00:01") == RESOLVABLE_PRIVATE
+    # indistinguishable from a public OUI
+    assert classify_address("00:11:22:33:44:55") is None
+    assert classify_address("not-a-mac") is None
+
+
+def test_classify_without_hint_trusts_registered_ouis():
+    def known(address):
+        return address.startswith(("C4:7C:8D", "4C:57:CA"))
+
+    assert classify_address("C4:7C:8D:00:00:01", known_oui=known) is None
+    assert classify_address("4C:57:CA:00:00:01", known_oui=known) is None
+    assert classify_address("C4:00:00:00:00:01", known_oui=known) == RANDOM_STATIC
+    # a reported type wins over the vendor tables
+    assert classify_address("C4:7C:8D:00:00:01", "random", known) == RANDOM_STATIC
+
+
+def test_is_random_and_reported_type():
+    assert is_random(RESOLVABLE_PRIVATE)
+    assert not is_random(PUBLIC)
+    assert not is_random(None)
+    device = SimpleNamespace(details={"props": {"AddressType": "random"}})
+    assert reported_address_type(device) == "random"
+    assert reported_address_type(SimpleNamespace(details=None)) is None
+    assert reported_address_type(None) is None
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient
+
+from core import db as core_db
+from core.db import init_db
+from core.models import Device
+from sqlmodel import Session
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, configure_db):
+    db = tmp_path / "test.db"
+    monkeypatch.setattr(core_db, "DB_PATH", str(db))
+    configure_db(db)
+    init_db()
+    from api.app import app
+
+    return TestClient(app)
+
+
+def _add_devices(count):
+    base = datetime(2024, 1, 1)
+    with Session(core_db.get_engine()) as session:
+        for i in range(count):
+            ts = base + timedelta(minutes=i)
+            session.add(
+                Device(mac=f"M{i:03d}", vendor="V", first_seen=ts, last_seen=ts)
+            )
+        session.commit()
+
+
+def test_export_pages_with_cursor(client):
+    _add_devices(5)
+    r = client.get("/export?limit=2")
+    assert r.status_code == 200
+    assert [d["mac"] for d in r.json()] == ["M004", "M003"]
+    macs = [d["mac"] for d in r.json()]
+    while "X-Next-Cursor" in r.headers:
+        r = client.get(f"/export?limit=2&cursor={r.headers['X-Next-Cursor']}")
+        macs += [d["mac"] for d in r.json()]
+    assert macs == ["M004", "M003", "M002", "M001", "M000"]
+    assert client.get("/export?cursor=%%%").status_code == 400
+
+
+def test_export_streams_csv(client):
+    _add_devices(3)
+    r = client.get("/export?format=csv")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert "content-encoding" not in r.headers
+    assert r.headers["content-disposition"].endswith('filename="devices.csv"')
+    lines = r.text.splitlines()
+    assert lines[0].startswith("mac_address")
+    assert len(lines) == 4
+    assert client.get("/export?format=xml").status_code == 400
+
+
+def test_export_gzip_is_a_gz_download(client):
+    import gzip
+
+    _add_devices(3)
+    r = client.get("/export?format=csv&gzip=true")
+    assert r.status_code == 200
+    # the .gz name must match an undecoded gzip body
+    assert r.headers["content-type"] == "application/gzip"
+    assert "content-encoding" not in r.headers
+    assert r.headers["content-disposition"].endswith('filename="devices.csv.gz"')
+    lines = gzip.decompress(r.content).decode().splitlines()
+    assert lines[0].startswith("mac_address")
+    assert len(lines) == 4
+
+
+def test_streaming_exports_are_limited(client, monkeypatch):
+    import threading
+
+    _add_devices(3)
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr("api.routes.STREAM_SLOTS", slots)
+    assert slots.acquire(blocking=False)
+    r = client.get("/export?format=jsonl")
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "5"
+    slots.release()
+    assert len(client.get("/export?format=jsonl").text.splitlines()) == 3
+    # the finished stream gave its slot back
+    assert slots.acquire(blocking=False)
+    slots.release()
+
+
+def test_device_rssi_uses_rollups(client):
+    from core.persistence import write_sighting
+
+    now = datetime.now()
+    write_sighting("AA", -40, None, timestamp=now - timedelta(minutes=5))
+    r = client.get("/devices/AA/rssi?resolution=3600")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["tier"] == "hour"
+    assert body["buckets"][0]["count"] == 1
+    assert client.get("/devices/AA/rssi?resolution=0").status_code == 400
+
+
+def test_device_search(client):
+    _add_devices(5)
+    r = client.get("/devices?vendor=v&until=2024-01-01T00:03:00&limit=2")
+    assert r.status_code == 200
+    assert [d["mac"] for d in r.json()] == ["M002", "M001"]
+    assert client.get("/devices?vendor=other").json() == []
+    assert client.get("/devices?mac_prefix=xyz").status_code == 400
+    assert client.get("/devices?address_type=bogus").status_code == 400
+
+
+def test_api_stats_served_from_memory(client, monkeypatch):
+    from core import scanner
+    from core.stats import StatsService
+
+    stats = StatsService()
+    stats.observe({"event": "appeared", "address": "AA"})
+    monkeypatch.setattr(scanner, "STATS", stats)
+    monkeypatch.setattr("api.routes.STATS", stats)
+    body = client.get("/api/stats").json()
+    assert body["stats"]["total_devices"] == 1
+    assert body["hourly"][0]["unique_devices"] == 1
+
+
+def test_export_page_cached_until_new_data(client):
+    from core.persistence import write_sighting
+
+    _add_devices(3)
+    first = client.get("/export?limit=2")
+    etag = first.headers["ETag"]
+    assert client.get("/export?limit=2").headers["ETag"] == etag
+    r = client.get("/export?limit=2", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    write_sighting("ZZ", -40, None, timestamp=datetime(2030, 1, 1))
+    r = client.get("/export?limit=2", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()[0]["mac"] == "ZZ"
+    assert client.get("/api/cache").json()["not_modified"] >= 1
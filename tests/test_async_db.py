@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import text
+
+from core import async_db
+from core import db as core_db
+from core.db import init_db
+
+LONG_QUERY = text(
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+    "SELECT count(*) FROM n"
+)
+
+
+def _long_read():
+    with core_db.get_read_engine().connect() as conn:
+        return conn.execute(LONG_QUERY).scalar()
+
+
+def test_run_read_returns_result():
+    assert asyncio.run(async_db.run_read(sum, [1, 2, 3])) == 6
+
+
+def test_run_read_timeout_interrupts_query(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+
+    async def main():
+        with pytest.raises(async_db.QueryTimeout):
+            await async_db.run_read(_long_read, timeout=0.2)
+        # the interrupted statement frees its worker almost immediately
+        start = time.monotonic()
+        assert await async_db.run_read(lambda: 42, timeout=5) == 42
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 2
+
+
+def test_run_read_client_disconnect(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+
+    class Request:
+        async def is_disconnected(self):
+            return True
+
+    async def main():
+        with pytest.raises(async_db.ClientDisconnected):
+            await async_db.run_read(_long_read, timeout=5, request=Request())
+
+    asyncio.run(main())
+
+
+def test_iterate_read_yields_and_closes():
+    closed = []
+
+    def chunks():
+        try:
+            yield from range(5)
+        finally:
+            closed.append(True)
+
+    async def main():
+        out = []
+        async for item in async_db.iterate_read(chunks()):
+            out.append(item)
+            if item == 2:
+                break
+        return out
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    async_db._executor().submit(lambda: None).result()
+    assert closed == [True]
+
+
+def test_iterate_read_timeout_waits_for_step_before_close():
+    events = []
+
+    class Slow:
+        running = False
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            self.running = True
+            time.sleep(0.3)
+            self.running = False
+            return 1
+
+        def close(self):
+            events.append(("close", self.running))
+
+    async def main():
+        with pytest.raises(async_db.QueryTimeout):
+            async for _ in async_db.iterate_read(Slow(), timeout=0.05):
+                pass
+
+    asyncio.run(main())
+    assert events == [("close", False)]
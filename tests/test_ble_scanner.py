@@ -1,11 +1,13 @@
 import asyncio
-from core.scanner import EVENT_BUS, parse_ibeacon, parse_eddystone
+
+from core.scanner import EVENT_BUS, parse_eddystone, parse_ibeacon
 
 
 def test_event_bus():
     async def inner():
-        await EVENT_BUS.put({"hello": "world"})
-        return await asyncio.wait_for(EVENT_BUS.get(), timeout=1)
+        async with EVENT_BUS.subscribe() as sub:
+            EVENT_BUS.publish_nowait({"hello": "world"})
+            return await asyncio.wait_for(sub.get(), timeout=1)
 
     result = asyncio.run(inner())
     assert result["hello"] == "world"
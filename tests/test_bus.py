@@ -0,0 +1,91 @@
+import asyncio
+
+from core.bus import BLOCK, DROP_NEWEST, EventBus
+
+
+def test_every_subscriber_sees_every_event():
+    async def inner():
+        bus = EventBus()
+        subs = [bus.subscribe() for _ in range(3)]
+        for i in range(5):
+            bus.publish_nowait({"n": i})
+        return [[(await s.get())["n"] for _ in range(5)] for s in subs]
+
+    assert asyncio.run(inner()) == [[0, 1, 2, 3, 4]] * 3
+
+
+def test_slow_subscriber_drops_without_affecting_others():
+    async def inner():
+        bus = EventBus()
+        slow = bus.subscribe(maxsize=2)
+        newest = bus.subscribe(maxsize=2, policy=DROP_NEWEST)
+        fast = bus.subscribe(maxsize=10)
+        for i in range(5):
+            bus.publish_nowait({"n": i})
+        return (
+            [slow.get_nowait()["n"] for _ in range(2)],
+            [newest.get_nowait()["n"] for _ in range(2)],
+            slow.stats(),
+            fast.lag,
+        )
+
+    oldest, newest, stats, fast_lag = asyncio.run(inner())
+    assert oldest == [3, 4]
+    assert newest == [0, 1]
+    assert stats["dropped"] == 3
+    assert stats["max_lag"] == 2
+    assert fast_lag == 5
+
+
+def test_block_policy_keeps_order_without_stalling_publisher():
+    async def inner():
+        bus = EventBus()
+        sub = bus.subscribe(maxsize=1, policy=BLOCK)
+        for i in range(4):
+            bus.publish_nowait({"n": i})
+        assert sub.lag == 4
+        return [(await sub.get())["n"] for _ in range(4)], sub.stats()
+
+    received, stats = asyncio.run(inner())
+    assert received == [0, 1, 2, 3]
+    assert stats["dropped"] == 0
+
+
+def test_unsubscribe():
+    async def inner():
+        bus = EventBus()
+        async with bus.subscribe() as sub:
+            assert len(bus) == 1
+        bus.publish_nowait({"n": 1})
+        return len(bus), sub.lag
+
+    assert asyncio.run(inner()) == (0, 0)
+
+
+def test_block_policy_bounds_pending_events():
+    async def inner():
+        bus = EventBus(pending=2)
+        sub = bus.subscribe(maxsize=1, policy=BLOCK)
+        for i in range(6):
+            bus.publish_nowait({"n": i})
+        assert sub.lag == 3
+        return [sub.get_nowait()["n"] for _ in range(3)], sub.stats()
+
+    received, stats = asyncio.run(inner())
+    assert received == [0, 1, 2]
+    assert stats["dropped"] == 3
+
+
+def test_block_publish_waits_for_room():
+    async def inner():
+        bus = EventBus()
+        sub = bus.subscribe(maxsize=1, policy=BLOCK)
+        await bus.publish({"n": 0})
+        second = asyncio.ensure_future(bus.publish({"n": 1}))
+        await asyncio.sleep(0)
+        assert not second.done()
+        first = await sub.get()
+        await second
+        return first["n"], (await sub.get())["n"]
+
+    assert asyncio.run(inner()) == (0, 1)
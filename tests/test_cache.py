@@ -0,0 +1,63 @@
+import sqlite3
+
+from core.cache import ResponseCache, bump_generation, data_generation
+from core.db import init_db
+
+
+def test_generation_moves_on_local_and_external_writes(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    first = data_generation()
+    assert data_generation() == first
+    bump_generation()
+    second = data_generation()
+    assert second != first
+
+    # a commit from another connection, e.g. a scanner in another process
+    with sqlite3.connect(tmp_path / "test.db") as conn:
+        conn.execute("INSERT INTO device (mac) VALUES ('AA')")
+    assert data_generation() != second
+
+
+def test_response_cache_hits_and_not_modified(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    cache = ResponseCache(max_entries=2)
+    renders = []
+
+    def render():
+        renders.append(1)
+        return b"body", "text/plain", {"X-Test": "1"}
+
+    status, first = cache.respond("a", None, render)
+    assert status == 200 and first.body == b"body"
+    status, again = cache.respond("a", None, render)
+    assert status == 200 and again is first
+    status, _ = cache.respond("a", f'W/"x", {first.etag}', render)
+    assert status == 304
+    assert len(renders) == 1
+
+    bump_generation()
+    status, fresh = cache.respond("a", first.etag, render)
+    assert status == 200 and fresh.etag != first.etag
+    assert len(renders) == 2
+
+    cache.respond("b", None, render)
+    cache.respond("c", None, render)
+    assert cache.snapshot()["entries"] == 2
+    assert (cache.hits, cache.not_modified, cache.misses) == (1, 1, 4)
+    assert cache.hit_ratio == 2 / 6
+
+
+def test_etag_from_previous_process_never_matches(tmp_path, monkeypatch, configure_db):
+    from core import cache as core_cache
+
+    configure_db(tmp_path / "test.db")
+    init_db()
+    generation = core_cache._generation
+    status, first = ResponseCache().respond("a", None, lambda: (b"x", "t", {}))
+    # a restart resets both counters but draws a new epoch
+    monkeypatch.setattr(core_cache, "_epoch", "restarted")
+    monkeypatch.setattr(core_cache, "_generation", generation)
+    status, fresh = ResponseCache().respond("a", first.etag, lambda: (b"y", "t", {}))
+    assert status == 200 and fresh.body == b"y"
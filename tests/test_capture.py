@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from ble_scanner.plugins import RawPacket, parse_sniffer_line
+from core import db as core_db
+from core.capture import RawCaptureWriter
+from core.db import get_raw_packets, init_db
+from core.models import CaptureSession
+from core.partitions import RawPartitionStore
+
+
+def _packet(i, start=datetime(2024, 5, 1, 12)):
+    return RawPacket(
+        timestamp=start + timedelta(milliseconds=i),
+        phy="LE1M",
+        channel=37 + i % 3,
+        rssi=-60,
+        address="AA:BB:CC:DD:EE:FF",
+        access_addr="8e89bed6",
+        pdu_type="ADV_IND",
+        payload=bytes([i % 256]),
+    )
+
+
+def _session(session_id):
+    table = CaptureSession.__table__
+    with core_db.get_engine().connect() as conn:
+        return conn.execute(select(table).where(table.c.id == session_id)).one()
+
+
+def test_batches_link_to_capture_session(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    core_db._raw_store = RawPartitionStore(tmp_path / "raw")
+    writer = RawCaptureWriter("ubertooth", max_batch=2000)
+    session_id = writer.open_session()
+    for i in range(5000):
+        writer.add(_packet(i))
+    assert writer.flush() == 5000
+    assert writer.flushes == 3
+    writer.close_session()
+
+    rows = get_raw_packets()
+    assert len(rows) == 5000
+    assert {r["session_id"] for r in rows} == {session_id}
+    assert rows[0]["access_addr"] == "8e89bed6"
+    assert rows[0]["pdu_type"] == "ADV_IND"
+    assert rows[1]["channel"] == 38
+    session = _session(session_id)
+    assert session.backend == "ubertooth"
+    assert session.packets == 5000
+    assert session.end_time is not None
+
+
+def test_overflow_drops_oldest(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    core_db._raw_store = RawPartitionStore(tmp_path / "raw")
+    writer = RawCaptureWriter(max_batch=10, max_pending=5)
+    for i in range(8):
+        writer.add(_packet(i))
+    assert writer.dropped == 3
+    writer.flush()
+    assert [r["payload"] for r in get_raw_packets()] == [
+        bytes([i]) for i in range(3, 8)
+    ]
+
+
+def test_failed_flush_counts_requeue_overflow(monkeypatch):
+    from core import capture
+
+    writer = RawCaptureWriter("test", max_batch=3, max_pending=4)
+    for i in range(3):
+        writer.add(_packet(i))
+
+    def failing_insert(batch):
+        # packets keep arriving while the write is in flight
+        for i in range(3, 6):
+            writer.add(_packet(i))
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(capture, "insert_raw_packets", failing_insert)
+    assert writer.flush() == 0
+    # the two oldest packets of the failed batch no longer fit
+    assert writer.dropped == 2
+    assert writer.received - writer.dropped == writer.depth == 4
+    assert [p["payload"] for p in writer._pending] == [bytes([i]) for i in range(2, 6)]
+
+
+def test_parse_sniffer_line_fields():
+    packet = parse_sniffer_line(
+        "11:22:33:44:55:66 ch=39 aa=0x8e89bed6 pdu=ADV_IND data=0201 -45"
+    )
+    assert packet.address == "11:22:33:44:55:66"
+    assert packet.channel == 39
+    assert packet.access_addr == "0x8e89bed6"
+    assert packet.pdu_type == "ADV_IND"
+    assert packet.payload == b"\x02\x01"
+    assert packet.rssi == -45
+    assert parse_sniffer_line("garbage") is None
+
+
+def test_run_radio_backend_persists_packets(tmp_path, monkeypatch, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    core_db._raw_store = RawPartitionStore(tmp_path / "raw")
+    from core import scanner
+
+    monkeypatch.setattr(scanner, "load_vendor_cache", lambda: None)
+    monkeypatch.setattr(scanner, "RETENTION", scanner.RetentionJob([]))
+
+    class FakeBackend:
+        name = "fake"
+
+        async def scan(self):
+            for i in range(50):
+                yield _packet(i, datetime.now())
+            await asyncio.sleep(3600)
+
+    async def inner():
+        stop = asyncio.Event()
+        task = asyncio.create_task(scanner.run_radio_backend(FakeBackend(), stop))
+        while scanner.CAPTURE is None or scanner.CAPTURE.received < 50:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(inner())
+    assert scanner.CAPTURE.written == 50
+    assert len(get_raw_packets()) == 50
+    assert _session(scanner.CAPTURE.session_id).backend == "fake"
@@ -1,6 +1,7 @@
-from typer.testing import CliRunner
 from unittest.mock import patch
 
+from typer.testing import CliRunner
+
 from cli.main import app
 
 
@@ -19,6 +20,19 @@ def test_aggregate_command():
 def test_export_command(tmp_path):
     runner = CliRunner()
     out = tmp_path / "data.json"
-    result = runner.invoke(app, ["export", "--format", "json", str(out), "--limit", "0"])
+    result = runner.invoke(
+        app, ["export", "--format", "json", str(out), "--limit", "0"]
+    )
     assert result.exit_code == 0
     assert out.exists()
+
+
+def test_scan_rejects_unknown_mode_for_every_backend():
+    runner = CliRunner()
+    for backend in ("bleak", "bluez"):
+        with patch("cli.main.load_plugins") as mock_plugins:
+            result = runner.invoke(
+                app, ["scan", "--backend", backend, "--mode", "bogus"]
+            )
+        assert result.exit_code == 2
+        mock_plugins.assert_not_called()
@@ -1,24 +1,163 @@
-from sqlmodel import Session, select, create_engine
 from datetime import datetime, timedelta
 
+import pytest
+
 import config
 from core import db as core_db
 from core.db import init_db, purge_old_entries
+from sqlmodel import Session, select, text
 
 
-def test_purge_old_entries(tmp_path, monkeypatch):
+def test_purge_old_entries(tmp_path, monkeypatch, configure_db):
     db = tmp_path / "test.db"
     monkeypatch.setattr(config, "DB_PATH", str(db))
     monkeypatch.setattr(core_db, "DB_PATH", str(db))
-    core_db._engine = create_engine(f"sqlite:///{db}")
+    configure_db(db)
     init_db()
     from core.models import Device
+
     engine = core_db.get_engine()
     old = datetime.now() - timedelta(days=31)
     with Session(engine) as session:
-        session.add(Device(mac="AA", vendor="V", first_seen=old, last_seen=old, rssi_history="[]"))
+        session.add(Device(mac="AA", vendor="V", first_seen=old, last_seen=old))
         session.commit()
     purge_old_entries()
     with Session(engine) as session:
         rows = session.exec(select(Device)).all()
     assert rows == []
+
+
+def test_get_devices_with_history(tmp_path, monkeypatch, configure_db):
+    db = tmp_path / "test.db"
+    monkeypatch.setattr(core_db, "DB_PATH", str(db))
+    configure_db(db)
+    init_db()
+    from core.models import Device, Sighting
+
+    now = datetime(2024, 1, 1)
+    with Session(core_db.get_engine()) as session:
+        session.add(Device(mac="AA", vendor="V", first_seen=now, last_seen=now))
+        session.add(Sighting(mac="AA", ts=now + timedelta(seconds=1), rssi=-50))
+        session.add(Sighting(mac="AA", ts=now, rssi=-40))
+        session.commit()
+    rows = core_db.get_devices(history=True)
+    assert [h["rssi"] for h in rows[0]["rssi_history"]] == [-40, -50]
+    assert "rssi_history" not in core_db.get_devices()[0]
+
+
+def test_sightings_migration(tmp_path, configure_db):
+    pytest.importorskip("alembic")
+    import json
+    import sqlite3
+
+    from alembic import command
+    from alembic.config import Config
+
+    db = tmp_path / "test.db"
+    configure_db(db)
+    cfg = Config("alembic.ini")
+    command.upgrade(cfg, "0001")
+    history = [
+        {"t": "2024-01-01T00:00:01", "rssi": -40},
+        {"t": "2024-01-01T00:00:02", "rssi": -41},
+    ]
+    with sqlite3.connect(db) as conn:
+        conn.executemany(
+            "INSERT INTO device (mac, vendor, rssi_history) VALUES (?, 'V', ?)",
+            [(f"M{i:04d}", json.dumps(history)) for i in range(1200)],
+        )
+    command.upgrade(cfg, "head")
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT count(*) FROM sighting").fetchone()[0] == 2400
+        columns = [c[1] for c in conn.execute("PRAGMA table_info(device)")]
+        latest = conn.execute(
+            "SELECT last_rssi, sighting_count, max_rssi FROM device WHERE mac = 'M0000'"
+        ).fetchone()
+        rollup = conn.execute(
+            "SELECT count, sum_rssi FROM rssiminute WHERE mac = 'M0000'"
+        ).fetchone()
+        # the backfill runs in batches of MACs; every batch must land
+        rolled = conn.execute(
+            "SELECT count(DISTINCT mac), sum(count) FROM rssihour"
+        ).fetchone()
+    assert "rssi_history" not in columns
+    assert latest == (-41, 2, -40)
+    assert rollup == (2, -81)
+    assert rolled == (1200, 2400)
+
+
+def test_storage_profile_pragmas_and_read_pool(tmp_path, configure_db):
+    import sqlalchemy
+
+    db = tmp_path / "test.db"
+    configure_db(db, "durable", read_pool_size=2)
+    init_db()
+    with core_db.get_engine().connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 2
+    with core_db.get_read_engine().connect() as conn:
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            conn.execute(text("INSERT INTO device (mac) VALUES ('AA')"))
+
+    # readers are not blocked by an open write transaction under WAL
+    with core_db.get_engine().begin() as writer:
+        writer.execute(text("INSERT INTO device (mac) VALUES ('BB')"))
+        assert core_db.get_devices() == []
+    assert [d["mac"] for d in core_db.get_devices()] == ["BB"]
+    with pytest.raises(ValueError):
+        core_db.configure(str(db), "bogus")
+
+
+def test_keyset_pagination_is_stable(tmp_path, monkeypatch, configure_db):
+    db = tmp_path / "test.db"
+    monkeypatch.setattr(core_db, "DB_PATH", str(db))
+    configure_db(db)
+    init_db()
+    from core.models import Device
+
+    base = datetime(2024, 1, 1)
+    with Session(core_db.get_engine()) as session:
+        for i in range(25):
+            # pairs share a timestamp so ties are broken by mac
+            ts = base + timedelta(seconds=i // 2)
+            session.add(Device(mac=f"M{i:02d}", first_seen=ts, last_seen=ts))
+        session.add(Device(mac="NULL"))
+        session.commit()
+
+    seen = []
+    rows, cursor = core_db.get_device_page(10)
+    seen += [r["mac"] for r in rows]
+    with Session(core_db.get_engine()) as session:
+        # a device written between pages must not shift later pages
+        session.add(Device(mac="NEW", last_seen=base + timedelta(days=1)))
+        session.commit()
+    while cursor:
+        rows, cursor = core_db.get_device_page(10, cursor)
+        seen += [r["mac"] for r in rows]
+    assert seen[:3] == ["M24", "M23", "M22"]
+    assert seen[-1] == "NULL"
+    assert len(seen) == len(set(seen)) == 26
+    with pytest.raises(ValueError):
+        core_db.get_devices(10, cursor="not-a-cursor")
+
+
+def test_keyset_page_seeks_index(tmp_path, monkeypatch, configure_db):
+    from sqlalchemy import event
+
+    db = tmp_path / "test.db"
+    monkeypatch.setattr(core_db, "DB_PATH", str(db))
+    configure_db(db)
+    init_db()
+    statements = []
+
+    @event.listens_for(core_db.get_read_engine(), "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    core_db.get_devices(10, core_db.encode_cursor(datetime(2024, 1, 1), "AA"))
+    statement, parameters = statements[0]
+    with core_db.get_engine().connect() as conn:
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        detail = " ".join(row[3] for row in plan)
+    assert "SEARCH device USING INDEX ix_device_last_seen_mac" in detail
@@ -1,20 +1,21 @@
 import asyncio
-from sqlmodel import Session, create_engine
 from datetime import datetime
 
 import pytest
 
+from sqlmodel import Session
+
 pytest.importorskip("flask")
 
 import config
+import flask_app
 from core import db as core_db
 from core.db import init_db
-import flask_app
 from flask_app import app
 
 
 def setup_db(engine):
-    from core.models import Device
+    from core.models import Device, Sighting
 
     with Session(engine) as session:
         session.add(
@@ -23,26 +24,36 @@ def setup_db(engine):
                 vendor="Vendor",
                 first_seen=datetime(2020, 1, 1),
                 last_seen=datetime(2020, 1, 1),
-                rssi_history="[]",
+                last_rssi=-42,
+                sighting_count=1,
             )
         )
+        session.add(Sighting(mac="AA", ts=datetime(2020, 1, 1), rssi=-42))
         session.commit()
 
 
-def test_flask_endpoints(tmp_path, monkeypatch):
+def test_flask_endpoints(tmp_path, monkeypatch, configure_db):
     pytest.importorskip("flask")
     db = tmp_path / "test.db"
     monkeypatch.setattr(config, "DB_PATH", str(db))
     monkeypatch.setattr(core_db, "DB_PATH", str(db))
-    core_db._engine = create_engine(f"sqlite:///{db}")
+    configure_db(db)
     init_db()
-    setup_db(core_db._engine)
+    setup_db(core_db.get_engine())
     app.testing = True
     flask_app.STOP_EVENT = asyncio.Event()
     with app.test_client() as client:
         r = client.get("/")
         assert r.status_code == 200
-        r = client.get("/history?page=1")
+        assert b"-42" in r.data
+        r = client.get("/history")
         assert r.status_code == 200
+        assert b"AA - Vendor" in r.data
+        assert b"Next" not in r.data
+        etag = r.headers["ETag"]
+        r = client.get("/history", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        r = client.get("/history?cursor=bogus")
+        assert r.status_code == 400
         r = client.get("/shutdown")
         assert r.status_code == 302
@@ -0,0 +1,31 @@
+from core.lifecycle import APPEARED, CHANGED, LOST, LifecycleTracker, TimingWheel
+
+
+def test_timing_wheel_expiry_and_refresh():
+    wheel = TimingWheel(tick=1.0, slots=8)
+    wheel.schedule("AA", 5)
+    wheel.schedule("BB", 20)
+    assert wheel.advance(4) == []
+    wheel.schedule("AA", 12)
+    assert wheel.advance(6) == []
+    assert wheel.advance(12) == ["AA"]
+    assert wheel.advance(19) == []
+    assert wheel.advance(25) == ["BB"]
+    assert len(wheel) == 0
+
+
+def test_change_only_events():
+    tracker = LifecycleTracker(rssi_delta=5, timeout=10)
+    event = {"address": "AA", "name": "Tag", "rssi": -50}
+    assert tracker.observe(event, now=0)["event"] == APPEARED
+    assert tracker.observe({**event, "rssi": -53}, now=1) is None
+    assert tracker.observe({**event, "rssi": -56}, now=2)["event"] == CHANGED
+    assert (
+        tracker.observe({**event, "rssi": -56, "name": "New"}, now=3)["event"]
+        == CHANGED
+    )
+    assert tracker.observe({**event, "rssi": -56, "name": "New"}, now=4) is None
+    assert tracker.expire(now=10) == []
+    lost = tracker.expire(now=15)
+    assert [e["event"] for e in lost] == [LOST]
+    assert tracker.observe(event, now=16)["event"] == APPEARED
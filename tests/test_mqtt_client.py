@@ -0,0 +1,107 @@
+import json
+from types import SimpleNamespace
+
+from mqtt_client import MqttOutbox, Spool
+
+
+class FakeBroker:
+    """Stand-in for a paho client connected to a local mosquitto."""
+
+    def __init__(self, connected: bool = True) -> None:
+        self.connected = connected
+        self.messages = []
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def publish(self, topic, payload):
+        if not self.connected:
+            return SimpleNamespace(rc=4)
+        self.messages.append((topic, payload))
+        return SimpleNamespace(rc=0)
+
+
+def test_outbox_batches_events(tmp_path):
+    broker = FakeBroker()
+    outbox = MqttOutbox(
+        broker, topic="t", batch_size=2, spool=Spool(str(tmp_path / "s.db"), 1024)
+    )
+    for i in range(3):
+        outbox.add({"n": i})
+    assert outbox.flush() == 3
+    assert [json.loads(p) for _, p in broker.messages] == [
+        [{"n": 0}, {"n": 1}],
+        [{"n": 2}],
+    ]
+    assert outbox.snapshot()["published_events"] == 3
+
+
+def test_outbox_ndjson(tmp_path):
+    broker = FakeBroker()
+    outbox = MqttOutbox(broker, fmt="ndjson", spool=Spool(str(tmp_path / "s.db"), 1024))
+    outbox.add({"n": 0})
+    outbox.add({"n": 1})
+    outbox.flush()
+    assert broker.messages[0][1] == b'{"n": 0}\n{"n": 1}\n'
+
+
+def test_outbox_spools_and_replays(tmp_path):
+    broker = FakeBroker(connected=False)
+    outbox = MqttOutbox(
+        broker, batch_size=1, spool=Spool(str(tmp_path / "s.db"), 1024**2)
+    )
+    for i in range(3):
+        outbox.add({"n": i})
+    outbox.flush()
+    assert broker.messages == []
+    assert outbox.snapshot()["spool"]["rows"] == 3
+
+    broker.connected = True
+    outbox.add({"n": 3})
+    outbox.flush()
+    assert [json.loads(p)[0]["n"] for _, p in broker.messages] == [0, 1, 2, 3]
+    stats = outbox.snapshot()
+    assert stats["replayed"] == 3
+    assert stats["spool"]["rows"] == 0
+
+
+def test_spool_size_cap(tmp_path):
+    spool = Spool(str(tmp_path / "s.db"), max_bytes=10)
+    for i in range(5):
+        spool.push(b"abcd")
+    stats = spool.stats()
+    assert stats["bytes"] <= 10
+    assert stats["discarded"] == 3
+    assert [p for _, p in spool.peek(10)] == [b"abcd", b"abcd"]
+
+
+def test_spool_byte_count_tracks_removal_and_reopen(tmp_path):
+    path = str(tmp_path / "s.db")
+    spool = Spool(path, max_bytes=100)
+    for payload in (b"a", b"bb", b"ccc"):
+        spool.push(payload)
+    assert spool.stats()["bytes"] == 6
+    spool.remove([spool.peek(1)[0][0]])
+    assert spool.stats() == {"rows": 2, "bytes": 5, "discarded": 0}
+    spool.close()
+    assert Spool(path, max_bytes=100).stats()["bytes"] == 5
+
+
+def test_outbox_spills_full_buffer_to_spool(tmp_path):
+    broker = FakeBroker(connected=False)
+    outbox = MqttOutbox(
+        broker,
+        batch_size=2,
+        max_buffer=4,
+        spool=Spool(str(tmp_path / "s.db"), 1024**2),
+    )
+    for i in range(7):
+        outbox.add({"n": i})
+    # no flush ran: the buffer stayed under its cap by spilling the oldest
+    assert outbox.depth < 4
+    assert outbox.snapshot()["spool"]["rows"] == 2
+
+    broker.connected = True
+    outbox.flush()
+    events = [e["n"] for _, p in broker.messages for e in json.loads(p)]
+    assert events == list(range(7))
@@ -1,5 +1,7 @@
+import asyncio
 from unittest.mock import patch
-from notifications import send_all_notifications
+
+from notifications import NotificationDispatcher, send_all_notifications
 
 
 @patch("notifications.send_discord_notification", return_value=True)
@@ -10,3 +12,54 @@ def test_send_all(mock_wa, mock_tg, mock_dc):
     assert res["discord"] is True
     assert res["telegram"] is True
     assert res["whatsapp"] is False
+
+
+def test_dispatcher_digest_and_cooldowns():
+    sent = []
+
+    def fake_send(message, session=None):
+        sent.append(message)
+        return True
+
+    dispatcher = NotificationDispatcher(
+        device_cooldown=60, channel_cooldown=10, channels={"test": fake_send}
+    )
+    assert dispatcher.submit("AA", now=0)
+    assert dispatcher.submit("BB", now=0)
+    assert not dispatcher.submit("AA", now=1)
+    asyncio.run(dispatcher.flush(now=1))
+    assert sent == ["2 new BLE devices: AA, BB"]
+
+    dispatcher.submit("CC", now=2)
+    asyncio.run(dispatcher.flush(now=2))
+    assert len(sent) == 1
+    asyncio.run(dispatcher.flush(now=12))
+    assert sent[-1] == "New BLE device CC"
+    stats = dispatcher.snapshot()
+    assert stats["sent"] == 2
+    assert stats["suppressed"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_dispatcher_forgets_expired_cooldowns():
+    dispatcher = NotificationDispatcher(device_cooldown=60, channels={})
+    for i in range(100):
+        dispatcher.submit(f"R{i:02d}", now=i)
+    assert len(dispatcher._last_notified) == 60
+    dispatcher.submit("AA", now=1000)
+    assert list(dispatcher._last_notified) == ["AA"]
+
+
+def test_dispatcher_retries_with_backoff():
+    results = [False, False, True]
+
+    def flaky_send(message, session=None):
+        return results.pop(0)
+
+    dispatcher = NotificationDispatcher(
+        retries=3, backoff=0, channels={"test": flaky_send}
+    )
+    dispatcher.submit("AA")
+    asyncio.run(dispatcher.flush())
+    assert dispatcher.snapshot()["retries"] == 2
+    assert dispatcher.snapshot()["sent"] == 1
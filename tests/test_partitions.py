@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from core import db as core_db
+from core.db import get_raw_packets, init_db, insert_raw_packets
+from core.partitions import RawPartitionStore, partition_bounds
+from core.retention import RetentionJob, RetentionPolicy
+
+
+def _packets(start, count, step, address="AA"):
+    return [
+        {
+            "timestamp": start + step * i,
+            "phy": "LE1M",
+            "channel": 37,
+            "rssi": -50,
+            "address": address,
+            "payload": bytes([i % 256]),
+        }
+        for i in range(count)
+    ]
+
+
+def test_partition_bounds():
+    ts = datetime(2024, 3, 1, 13, 45, 10)
+    assert partition_bounds(ts) == (datetime(2024, 3, 1), datetime(2024, 3, 2))
+    assert partition_bounds(ts, "hour") == (
+        datetime(2024, 3, 1, 13),
+        datetime(2024, 3, 1, 14),
+    )
+
+
+def test_write_catalog_and_range_query(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    store = RawPartitionStore(tmp_path / "raw")
+    core_db._raw_store = store
+    start = datetime(2024, 3, 1, 12)
+    assert insert_raw_packets(_packets(start, 72, timedelta(hours=1))) == 72
+
+    catalog = store.partitions()
+    assert [p["name"] for p in catalog] == [
+        "raw_20240301",
+        "raw_20240302",
+        "raw_20240303",
+        "raw_20240304",
+    ]
+    assert [p["rows"] for p in catalog] == [12, 24, 24, 12]
+    assert catalog[0]["first_ts"] == start
+    assert store.count() == 72
+
+    rows = get_raw_packets(datetime(2024, 3, 2, 22), datetime(2024, 3, 3, 2))
+    assert [r["timestamp"].hour for r in rows] == [22, 23, 0, 1]
+    assert len(store.partitions(datetime(2024, 3, 2, 22), datetime(2024, 3, 3, 2))) == 2
+    assert len(get_raw_packets(limit=30)) == 30
+    assert get_raw_packets(address="BB") == []
+
+
+def test_retention_drops_whole_partitions(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    store = RawPartitionStore(tmp_path / "raw", "hour")
+    core_db._raw_store = store
+    start = datetime(2024, 3, 1)
+    insert_raw_packets(_packets(start, 240, timedelta(minutes=1)))
+    assert len(store.partitions()) == 4
+
+    job = RetentionJob([RetentionPolicy("rawpacket", "timestamp", 1)])
+    report = job.run_once(now=datetime(2024, 3, 2, 2))
+    assert report.partitions_dropped == 2
+    assert report.removed["rawpacket"] == 120
+    assert not store.path_for("raw_2024030100").exists()
+    assert [p["name"] for p in store.partitions()] == [
+        "raw_2024030102",
+        "raw_2024030103",
+    ]
+    assert len(get_raw_packets()) == 120
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime
+
+from core.db import get_devices, init_db
+from core.persistence import WriteBehindWriter
+
+
+def test_writer_coalesces_and_merges(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    writer = WriteBehindWriter(max_batch=100, flush_interval=10)
+    writer.add("AA", -40, "V", datetime(2024, 1, 1, 0, 0, 0))
+    writer.add("AA", -42, None, datetime(2024, 1, 1, 0, 0, 1))
+    writer.add("BB", -60, "W", datetime(2024, 1, 1, 0, 0, 2))
+    assert writer.depth == 3
+    assert writer.pending_devices == 2
+    assert writer.flush() == 2
+    writer.add("AA", -44, None, datetime(2024, 1, 1, 0, 0, 3))
+    writer.flush()
+
+    rows = {r["mac"]: r for r in get_devices(history=True)}
+    history = rows["AA"]["rssi_history"]
+    assert [h["rssi"] for h in history] == [-40, -42, -44]
+    assert rows["AA"]["vendor"] == "V"
+    assert rows["AA"]["first_seen"] == datetime(2024, 1, 1, 0, 0, 0)
+    assert rows["AA"]["last_seen"] == datetime(2024, 1, 1, 0, 0, 3)
+    stats = writer.snapshot()
+    assert stats["buffer_depth"] == 0
+    assert stats["flushes"] == 2
+    assert stats["sightings_written"] == 4
+
+
+def test_writer_flushes_on_stop(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    writer = WriteBehindWriter(max_batch=100, flush_interval=60)
+
+    async def inner():
+        stop = asyncio.Event()
+        task = asyncio.create_task(writer.run(stop))
+        writer.add("CC", -30, None)
+        stop.set()
+        await asyncio.wait_for(task, timeout=2)
+
+    asyncio.run(inner())
+    assert get_devices()[0]["mac"] == "CC"
+
+
+def test_latest_sighting_columns_maintained_on_write(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    writer = WriteBehindWriter(max_batch=100, flush_interval=10)
+    writer.add("AA", -50, None, datetime(2024, 1, 1, 0, 0, 0), name="Tag")
+    writer.add("AA", -30, None, datetime(2024, 1, 1, 0, 0, 1))
+    writer.flush()
+    writer.add("AA", -45, None, datetime(2024, 1, 1, 0, 0, 2))
+    writer.flush()
+
+    row = get_devices()[0]
+    assert row["last_rssi"] == -45
+    assert row["last_name"] == "Tag"
+    assert row["sighting_count"] == 3
+    assert row["max_rssi"] == -30
+
+
+def test_failed_flushes_drop_oldest_past_cap(tmp_path, monkeypatch, configure_db):
+    from core import persistence
+
+    configure_db(tmp_path / "test.db")
+    init_db()
+    writer = WriteBehindWriter(max_batch=2, flush_interval=10, max_pending=5)
+    base = datetime(2024, 1, 1)
+
+    def fail(pending):
+        raise RuntimeError("database is locked")
+
+    write_devices = persistence.write_devices
+    monkeypatch.setattr(persistence, "write_devices", fail)
+    for i, mac in enumerate(["AA", "BB", "AA", "BB"]):
+        writer.add(mac, -40 - i, None, base.replace(second=i))
+    assert writer.flush() == 0
+    for i, mac in enumerate(["CC", "AA", "CC"], start=4):
+        writer.add(mac, -40 - i, None, base.replace(second=i))
+    assert writer.flush() == 0
+    # seven sightings buffered against a cap of five: the two oldest go
+    assert writer.depth == 5
+    assert writer.snapshot()["dropped"] == 2
+    assert [ts.second for ts, _ in writer._pending["AA"].history] == [2, 5]
+    assert [ts.second for ts, _ in writer._pending["BB"].history] == [3]
+
+    monkeypatch.setattr(persistence, "write_devices", write_devices)
+    assert writer.flush() == 3
+    assert sorted(d["mac"] for d in get_devices()) == ["AA", "BB", "CC"]
@@ -173,8 +173,10 @@ async def test_run_radio_backend(monkeypatch):
 
         async def runner():
             with patch("core.scanner.update_device", return_value=None):
+                sub = EVENT_BUS.subscribe()
                 task = asyncio.create_task(run_radio_backend(backend, stop_event=stop))
-                event = await asyncio.wait_for(EVENT_BUS.get(), timeout=0.2)
+                event = await asyncio.wait_for(sub.get(), timeout=0.2)
+                sub.close()
                 stop.set()
                 await task
                 return event
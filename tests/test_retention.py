@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from core import db as core_db
+from core.db import init_db
+from core.models import DecodedEvent, Device, RawPacket, Sighting
+from core.retention import RetentionJob, RetentionPolicy, default_policies
+
+
+def _count(model):
+    with core_db.get_engine().connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_chunked_purge_per_table_policies(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    now = datetime(2024, 6, 1)
+    old, fresh = now - timedelta(days=40), now - timedelta(days=1)
+    with core_db.get_engine().begin() as conn:
+        conn.execute(
+            insert(Device),
+            [
+                {"mac": f"M{i:04d}", "last_seen": old if i % 2 else fresh}
+                for i in range(500)
+            ],
+        )
+        conn.execute(
+            insert(RawPacket),
+            [
+                {"timestamp": old if i < 300 else fresh, "payload": b"x" * 512}
+                for i in range(400)
+            ],
+        )
+        conn.execute(
+            insert(DecodedEvent),
+            [{"timestamp": old, "event_type": "adv"} for _ in range(10)],
+        )
+    policies = [
+        RetentionPolicy("device", "last_seen", 30),
+        RetentionPolicy("rawpacket", "timestamp", 7),
+        RetentionPolicy("decodedevent", "timestamp", 0),
+    ]
+    job = RetentionJob(policies, chunk=64, vacuum_pages=8)
+    report = job.run_once(now)
+
+    assert report.removed == {"device": 250, "rawpacket": 300, "decodedevent": 0}
+    assert report.rows_removed == 550
+    assert report.pages_freed > 0
+    assert report.free_pages == 0
+    assert _count(Device) == 250
+    assert _count(RawPacket) == 100
+    assert _count(DecodedEvent) == 10
+    assert job.snapshot()["last"]["rows_removed"] == 550
+
+
+def test_default_policies_override_days():
+    tables = {p.table: p.days for p in default_policies(5)}
+    assert tables == {
+        "device": 5,
+        "sighting": 5,
+        "rawpacket": 5,
+        "decodedevent": 5,
+        "rssiminute": 5,
+        "rssihour": 5,
+    }
+    assert {p.table for p in default_policies()} == set(tables)
+
+
+def test_purge_old_entries_keeps_recent_sightings(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    now = datetime.now()
+    with core_db.get_engine().begin() as conn:
+        conn.execute(
+            insert(Sighting),
+            [
+                {"mac": "AA", "ts": now - timedelta(days=60), "rssi": -40},
+                {"mac": "AA", "ts": now, "rssi": -41},
+            ],
+        )
+    report = core_db.purge_old_entries(30)
+    assert report.removed["sighting"] == 1
+    assert _count(Sighting) == 1
+
+
+def test_enable_incremental_vacuum_on_legacy_file(
+    tmp_path, monkeypatch, caplog, configure_db
+):
+    from core import retention
+    from core.retention import auto_vacuum_mode, enable_incremental_vacuum
+
+    # alembic's fileConfig() in the migration tests disables existing loggers
+    monkeypatch.setattr(retention.logger, "disabled", False)
+    # a file created before storage profiles existed
+    configure_db(tmp_path / "test.db", "legacy")
+    init_db()
+    now = datetime.now()
+    with core_db.get_engine().begin() as conn:
+        conn.execute(
+            insert(Sighting),
+            [{"mac": "AA", "ts": now, "rssi": -40, "id": i} for i in range(5000)],
+        )
+        conn.execute(Sighting.__table__.delete())
+    job = RetentionJob([])
+    assert auto_vacuum_mode() == 0
+    freed, free = job.reclaim()
+    assert freed == 0 and free > 0
+    assert "ble-scan vacuum" in caplog.text
+
+    assert enable_incremental_vacuum() is True
+    assert auto_vacuum_mode() == 2
+    assert enable_incremental_vacuum() is False
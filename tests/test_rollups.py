@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from core import db as core_db
+from core import rollups
+from core.db import init_db
+from core.models import RssiHour, RssiMinute
+from core.persistence import WriteBehindWriter, write_sighting
+
+
+def _rows(model):
+    with core_db.get_engine().connect() as conn:
+        stmt = select(model).order_by(model.mac, model.bucket)
+        return [dict(r) for r in conn.execute(stmt).mappings()]
+
+
+def test_floor_time():
+    ts = datetime(2024, 1, 1, 10, 17, 42, 5)
+    assert rollups.floor_time(ts, 60) == datetime(2024, 1, 1, 10, 17)
+    assert rollups.floor_time(ts, 3600) == datetime(2024, 1, 1, 10)
+    assert rollups.floor_time(ts, 300) == datetime(2024, 1, 1, 10, 15)
+
+
+def test_rollups_merge_across_flushes(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    t0 = datetime(2024, 1, 1, 10, 0, 10)
+    writer = WriteBehindWriter()
+    writer.add("AA", -40, None, timestamp=t0)
+    writer.add("AA", -60, None, timestamp=t0 + timedelta(seconds=20))
+    writer.add("AA", -50, None, timestamp=t0 + timedelta(minutes=1))
+    writer.flush()
+    write_sighting("AA", -30, None, timestamp=t0 + timedelta(seconds=30))
+
+    minutes = _rows(RssiMinute)
+    assert [(r["bucket"].minute, r["count"]) for r in minutes] == [(0, 3), (1, 1)]
+    first = minutes[0]
+    assert (first["min_rssi"], first["max_rssi"]) == (-60, -30)
+    assert first["sum_rssi"] == -130
+    assert first["sum_sq"] == 40**2 + 60**2 + 30**2
+
+    hours = _rows(RssiHour)
+    assert len(hours) == 1
+    assert hours[0]["count"] == 4 and hours[0]["sum_rssi"] == -180
+
+
+def test_choose_tier_picks_coarsest_available():
+    now = datetime(2024, 6, 1)
+    recent = now - timedelta(days=1)
+    assert rollups.choose_tier(recent, 10, now).name == "raw"
+    assert rollups.choose_tier(recent, 300, now).name == "minute"
+    assert rollups.choose_tier(recent, 7200, now).name == "hour"
+    assert rollups.choose_tier(now - timedelta(days=60), 60, now).name == "hour"
+
+
+def test_query_rssi_rebuckets_tiers(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    now = datetime(2024, 6, 1, 12)
+    start = now - timedelta(hours=2)
+    writer = WriteBehindWriter()
+    for i in range(120):
+        writer.add("AA", -40 - i % 2 * 10, None, timestamp=start + timedelta(minutes=i))
+    writer.flush()
+
+    tier, buckets = rollups.query_rssi("AA", start, now, 3600, now)
+    assert tier == "hour"
+    assert [b["count"] for b in buckets] == [60, 60]
+    assert buckets[0]["t"] == start
+    assert buckets[0]["mean"] == -45
+    assert buckets[0]["std"] == 5
+
+    tier, buckets = rollups.query_rssi("AA", start, now, 600, now)
+    assert tier == "minute"
+    assert len(buckets) == 12 and buckets[0]["min"] == -50
+
+    tier, buckets = rollups.query_rssi(
+        "AA", start, start + timedelta(minutes=2), 1, now
+    )
+    assert tier == "raw"
+    assert [b["max"] for b in buckets] == [-40, -50]
@@ -1,9 +1,10 @@
 import asyncio
 from types import SimpleNamespace
 
+import pytest
+
 import config
 from core import scanner
-from sqlmodel import create_engine
 from core.db import get_devices, init_db
 
 
@@ -17,14 +18,14 @@ async def fake_discover():
     ]
 
 
-def test_scan_once(tmp_path, monkeypatch):
+def test_scan_once(tmp_path, monkeypatch, configure_db):
     db = tmp_path / "db.sqlite"
     monkeypatch.setattr(config, "DB_PATH", str(db))
     monkeypatch.setattr(scanner, "DB_PATH", str(db), raising=False)
     from core import db as core_db
 
     monkeypatch.setattr(core_db, "DB_PATH", str(db))
-    core_db._engine = create_engine(f"sqlite:///{db}")
+    configure_db(db)
     init_db()
     monkeypatch.setattr(
         scanner, "BleakScanner", SimpleNamespace(discover=fake_discover)
@@ -37,3 +38,98 @@ def test_scan_once(tmp_path, monkeypatch):
     asyncio.run(scanner.scan_once())
     rows = get_devices(1)
     assert rows[0]["mac"] == "AA:BB:CC:DD:EE:FF"
+
+
+def test_random_address_skips_vendor_lookup(tmp_path, monkeypatch, configure_db):
+    db = tmp_path / "db.sqlite"
+    from core import db as core_db
+
+    monkeypatch.setattr(core_db, "DB_PATH", str(db))
+    configure_db(db)
+    init_db()
+    lookups = []
+
+    async def fake_vendor(mac: str) -> str:
+        lookups.append(mac)
+        return "Vendor"
+
+    monkeypatch.setattr(scanner, "vendor_for_mac", fake_vendor)
+    random_dev = DummyDevice(details={"props": {"AddressType": "random"}})
+    public_dev = DummyDevice(details={"props": {"AddressType": "public"}})
+
+    async def inner():
+        await scanner.process_advertisement(
+            "5E:01:02:03:04:05", None, -50, {}, random_dev
+        )
+        await scanner.process_advertisement(
+            "00:11:22:33:44:55", None, -60, {}, public_dev
+        )
+
+    asyncio.run(inner())
+    assert lookups == ["00:11:22:33:44:55"]
+    rows = {r["mac"]: r for r in get_devices()}
+    assert rows["5E:01:02:03:04:05"]["address_type"] == "resolvable-private"
+    assert rows["5E:01:02:03:04:05"]["vendor"] is None
+    assert rows["00:11:22:33:44:55"]["address_type"] == "public"
+    assert rows["00:11:22:33:44:55"]["vendor"] == "Vendor"
+
+
+def test_maintenance_runs_off_the_ingest_executor(tmp_path, monkeypatch, configure_db):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from core import db as core_db
+
+    db = tmp_path / "db.sqlite"
+    monkeypatch.setattr(core_db, "DB_PATH", str(db))
+    configure_db(db)
+    init_db()
+    threads = []
+    monkeypatch.setattr(
+        scanner.RETENTION,
+        "run_once",
+        lambda: threads.append(threading.current_thread().name),
+    )
+    monkeypatch.setattr(scanner.STATS, "load", lambda: None)
+    monkeypatch.setattr(scanner.STATS, "save", lambda: False)
+
+    async def main():
+        stop = asyncio.Event()
+        # a single ingest worker, as with the default ``--threads 1``
+        ingest = ThreadPoolExecutor(max_workers=1)
+        tasks = scanner._start_pipeline(stop, ingest)
+        await asyncio.sleep(0.1)
+        await scanner._stop_pipeline(stop, tasks)
+        ingest.shutdown()
+
+    asyncio.run(main())
+    assert threads and threads[0].startswith("maintenance")
+    assert scanner.MAINTENANCE_EXECUTOR is None
+
+
+def test_lost_device_leaves_live_state(monkeypatch):
+    from core.lifecycle import LifecycleTracker
+    from core.state import DeviceRegistry
+    from core.stats import StatsService
+
+    monkeypatch.setattr(scanner, "STATE", DeviceRegistry(8))
+    monkeypatch.setattr(scanner, "LIFECYCLE", LifecycleTracker(timeout=5))
+    monkeypatch.setattr(scanner, "STATS", StatsService())
+    monkeypatch.setattr(scanner, "publish_event", lambda event: None)
+    monkeypatch.setattr(scanner, "dispatch_event", lambda event: None)
+    monkeypatch.setattr(scanner.NOTIFIER, "submit", lambda address: None)
+    scanner.STATE.update("AA", -40)
+    scanner.LIFECYCLE.expire(now=0)
+    scanner.LIFECYCLE.observe({"address": "AA", "rssi": -40}, now=0)
+    for event in scanner.LIFECYCLE.expire(now=10):
+        scanner.broadcast_event(event)
+    assert "AA" not in scanner.STATE
+    assert scanner.STATE.recent() == []
+
+
+def test_run_scanner_rejects_unknown_mode(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(scanner, "load_vendor_cache", lambda: loaded.append(1))
+    with pytest.raises(ValueError):
+        asyncio.run(scanner.run_scanner(mode="bogus"))
+    assert loaded == []
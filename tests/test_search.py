@@ -0,0 +1,105 @@
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from core import db as core_db
+from core.db import init_db
+from core.models import Device
+from core.search import DeviceFilter, normalize_mac_prefix, search_devices
+from sqlmodel import Session
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+# one value per filter; every combination must be answered from an index
+FILTERS = {
+    "vendor": {"vendor": "apple"},
+    "rssi_min": {"rssi_min": -60},
+    "rssi_max": {"rssi_max": -60},
+    "since": {"since": NOW - timedelta(minutes=10)},
+    "until": {"until": NOW},
+    "public": {"address_type": "public"},
+    "random": {"address_type": "random"},
+    "mac_prefix": {"mac_prefix": "c4:7c"},
+}
+
+
+def _seed():
+    devices = [
+        ("C4:7C:8D:00:00:01", "Apple, Inc.", "public", -50, 1),
+        ("C4:7C:8D:00:00:02", "Apple, Inc.", "public", -80, 30),
+        ("D0:03:4B:00:00:01", "Apple, Inc.", None, -40, 2),
+        ("F8:00:00:00:00:01", None, "random-static", -45, 3),
+        ("4C:00:00:00:00:01", "Samsung", "resolvable-private", -70, 4),
+    ]
+    with Session(core_db.get_engine()) as session:
+        for mac, vendor, kind, rssi, age in devices:
+            seen = NOW - timedelta(minutes=age)
+            session.add(
+                Device(
+                    mac=mac,
+                    vendor=vendor,
+                    address_type=kind,
+                    first_seen=seen,
+                    last_seen=seen,
+                    last_rssi=rssi,
+                )
+            )
+        session.commit()
+
+
+def _macs(**kwargs):
+    return [d["mac"][-5:] for d in search_devices(DeviceFilter(**kwargs))]
+
+
+def test_normalize_mac_prefix():
+    assert normalize_mac_prefix("c47c") == "C4:7C"
+    assert normalize_mac_prefix("C4-7C-8") == "C4:7C:8"
+    with pytest.raises(ValueError):
+        normalize_mac_prefix("zz")
+
+
+def test_search_filters(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    _seed()
+    assert len(_macs()) == 5
+    # "Apple devices stronger than -60 dBm seen in the last 10 minutes"
+    assert _macs(vendor="apple", rssi_min=-60, since=NOW - timedelta(minutes=10)) == [
+        "00:01",
+        "00:01",
+    ]
+    assert _macs(mac_prefix="c47c") == ["00:01", "00:02"]
+    assert _macs(address_type="random") == ["00:01", "00:01"]
+    assert _macs(address_type="PUBLIC", rssi_max=-60) == ["00:02"]
+    assert _macs(vendor="sam", until=NOW - timedelta(minutes=3)) == ["00:01"]
+    assert len(search_devices(DeviceFilter(), limit=2)) == 2
+    with pytest.raises(ValueError):
+        search_devices(DeviceFilter(address_type="bogus"))
+
+
+def test_every_filter_combination_uses_an_index(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    _seed()
+    statements = []
+
+    @event.listens_for(core_db.get_read_engine(), "before_cursor_execute")
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    for n in range(1, len(FILTERS) + 1):
+        for combo in itertools.combinations(FILTERS, n):
+            kwargs = {}
+            for name in combo:
+                kwargs.update(FILTERS[name])
+            search_devices(DeviceFilter(**kwargs))
+            statement, parameters = statements[-1]
+            with core_db.get_read_engine().connect() as conn:
+                plan = conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+                detail = " ".join(row[3] for row in plan)
+            assert "SEARCH device USING" in detail, (combo, detail)
+            assert "SCAN device" not in detail, (combo, detail)
@@ -0,0 +1,31 @@
+from core.state import DeviceRegistry
+
+
+def test_ring_buffer_wraps():
+    registry = DeviceRegistry(capacity=3)
+    for i in range(5):
+        registry.update("AA", -40 - i, name="Tag", vendor="V", now=1000 + i)
+    state = registry.get("AA")
+    assert state.history() == [(1002, -42), (1003, -43), (1004, -44)]
+    assert state.last_rssi == -44
+    assert state.first_seen == 1000
+    assert state.last_name == "Tag"
+
+
+def test_rssi_clamped_and_memory_bounded():
+    registry = DeviceRegistry(capacity=8)
+    registry.update("AA", -200, now=1)
+    assert registry.get("AA").last_rssi == -128
+    before = registry.memory_usage()["bytes_per_device"]
+    for i in range(100):
+        registry.update("AA", -50, now=2 + i)
+    assert registry.memory_usage()["bytes_per_device"] == before
+
+
+def test_recent_and_prune():
+    registry = DeviceRegistry()
+    registry.update("AA", -40, now=10)
+    registry.update("BB", -40, now=20)
+    assert [s.mac for s in registry.recent()] == ["BB", "AA"]
+    assert registry.prune(max_age=5, now=22) == 1
+    assert "AA" not in registry
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.db import init_db
+from core.lifecycle import APPEARED, CHANGED, LOST
+from core.persistence import write_sighting
+from core.stats import StatsService
+
+
+def test_observe_counts_devices_visits_and_hours():
+    stats = StatsService(hours=2)
+    t0 = datetime(2024, 1, 1, 10, 5)
+    stats.observe({"event": APPEARED, "address": "AA"}, t0)
+    stats.observe({"event": CHANGED, "address": "AA"}, t0 + timedelta(minutes=1))
+    stats.observe({"event": LOST, "address": "AA"}, t0 + timedelta(minutes=3))
+    stats.observe({"event": APPEARED, "address": "AA"}, t0 + timedelta(hours=1))
+    stats.observe({"event": APPEARED, "address": "BB"}, t0 + timedelta(hours=1))
+
+    snap = stats.snapshot()
+    assert snap["stats"] == {
+        "total_devices": 2,
+        "total_visits": 3,
+        "total_events": 5,
+        "last_detection": (t0 + timedelta(hours=1)).isoformat(),
+    }
+    assert [(h["hour"][11:13], h["unique_devices"]) for h in snap["hourly"]] == [
+        ("10", 1),
+        ("11", 2),
+    ]
+    assert stats.snapshot() is snap
+
+    stats.observe({"event": APPEARED, "address": "CC"}, t0 + timedelta(hours=2))
+    assert [h["hour"][11:13] for h in stats.snapshot()["hourly"]] == ["11", "12"]
+
+
+def test_save_and_load_round_trip(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    now = datetime.now()
+    stats = StatsService()
+    stats.observe({"event": APPEARED, "address": "AA"}, now)
+    stats.observe({"event": APPEARED, "address": "BB"}, now)
+    assert stats.save() is True
+    assert stats.save() is False
+
+    restored = StatsService()
+    restored.load(now)
+    assert restored.snapshot()["stats"]["total_visits"] == 2
+    assert restored.snapshot()["hourly"][0]["unique_devices"] == 2
+    restored.observe({"event": APPEARED, "address": "CC"}, now)
+    assert restored.snapshot()["hourly"][0]["unique_devices"] == 3
+
+
+def test_load_seeds_from_database(tmp_path, configure_db):
+    configure_db(tmp_path / "test.db")
+    init_db()
+    now = datetime.now()
+    write_sighting("AA", -40, None, timestamp=now)
+    write_sighting("BB", -50, None, timestamp=now - timedelta(minutes=1))
+
+    stats = StatsService()
+    stats.load(now)
+    snap = stats.snapshot()
+    assert snap["stats"]["total_devices"] == 2
+    assert snap["stats"]["last_detection"] == now.isoformat()
+    assert sum(h["unique_devices"] for h in snap["hourly"]) >= 2
+    # known MACs are not counted twice
+    stats.observe({"event": APPEARED, "address": "AA"}, now)
+    assert stats.snapshot()["stats"]["total_devices"] == 2
+
+
+def test_known_devices_are_bounded():
+    stats = StatsService(known=2)
+    now = datetime(2024, 1, 1, 10)
+    for mac in ("AA", "BB", "AA", "CC"):
+        stats.observe({"event": APPEARED, "address": mac}, now)
+    # BB was the least recently seen when CC arrived
+    assert list(stats._known) == ["AA", "CC"]
+    assert stats.snapshot()["stats"]["total_devices"] == 3
+
+
+def test_follow_reloads_saved_counters(tmp_path, configure_db):
+    import threading
+
+    configure_db(tmp_path / "test.db")
+    init_db()
+    scanner = StatsService()
+    scanner.observe({"event": APPEARED, "address": "AA"})
+    scanner.save()
+    web = StatsService(interval=0.01)
+    stop = threading.Event()
+    thread = threading.Thread(target=web.follow, args=(stop,))
+    thread.start()
+    try:
+        for _ in range(200):
+            if web.snapshot()["stats"]["total_devices"] == 1:
+                break
+            stop.wait(0.01)
+    finally:
+        stop.set()
+        thread.join()
+    assert web.snapshot()["stats"]["total_visits"] == 1
+
+
+def test_web_stats_setup_on_empty_database(tmp_path, configure_db):
+    import threading
+
+    pytest.importorskip("uvicorn")
+    from api import __main__ as web
+
+    path = tmp_path / "empty.db"
+    path.touch()
+    configure_db(path)
+    stop = threading.Event()
+    thread = web._follow_stats(stop)
+    stop.set()
+    thread.join()
+    assert web.STATS.snapshot()["stats"]["total_devices"] == 0
@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core import scanner
+from core.stream import (
+    DROP_NEWEST,
+    Advertisement,
+    AdvertisementQueue,
+    AdvertisementStream,
+)
+
+
+def _adv(address: str) -> Advertisement:
+    return Advertisement(address=address, name=None, rssi=-50)
+
+
+def test_queue_drop_oldest():
+    async def inner():
+        queue = AdvertisementQueue(maxsize=2)
+        for addr in ("A", "B", "C"):
+            queue.put(_adv(addr))
+        return [(await queue.get()).address for _ in range(2)], queue.stats()
+
+    addrs, stats = asyncio.run(inner())
+    assert addrs == ["B", "C"]
+    assert stats["received"] == 3
+    assert stats["dropped"] == 1
+
+
+def test_queue_drop_newest():
+    async def inner():
+        queue = AdvertisementQueue(maxsize=2, overflow=DROP_NEWEST)
+        results = [queue.put(_adv(addr)) for addr in ("A", "B", "C")]
+        return results, [(await queue.get()).address for _ in range(2)]
+
+    results, addrs = asyncio.run(inner())
+    assert results == [True, True, False]
+    assert addrs == ["A", "B"]
+
+
+def test_queue_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        AdvertisementQueue(overflow="block")
+
+
+class FakeScanner:
+    def __init__(self, detection_callback):
+        self.callback = detection_callback
+
+    async def start(self):
+        device = SimpleNamespace(address="AA:BB", name="Tag")
+        for rssi in (-40, -41, -42):
+            self.callback(
+                device,
+                SimpleNamespace(local_name=None, rssi=rssi, manufacturer_data={}),
+            )
+
+    async def stop(self):
+        pass
+
+
+def test_stream_feeds_every_advertisement(monkeypatch):
+    seen = []
+    monkeypatch.setattr(
+        scanner,
+        "AdvertisementStream",
+        lambda size, overflow: AdvertisementStream(
+            size, overflow, scanner_factory=FakeScanner
+        ),
+    )
+
+    async def inner():
+        stop = asyncio.Event()
+
+        async def fake_process(address, name, rssi, manufacturer_data, device=None):
+            seen.append((address, name, rssi))
+            if len(seen) == 3:
+                stop.set()
+
+        monkeypatch.setattr(scanner, "process_advertisement", fake_process)
+        await asyncio.wait_for(scanner._run_stream(1, stop, 10, "drop-oldest"), 2)
+
+    asyncio.run(inner())
+    assert seen == [("AA:BB", "Tag", -40), ("AA:BB", "Tag", -41), ("AA:BB", "Tag", -42)]
+    assert scanner.STREAM.queue.stats()["dropped"] == 0
@@ -6,3 +6,69 @@ def test_lookup_vendor(tmp_path):
     VENDOR_CACHE.clear()
     load_vendor_data(data)
     assert lookup_vendor("00:11:22:33:44:55") == "TestVendor"
+
+
+def _registry(tmp_path):
+    csv_path = tmp_path / "oui.csv"
+    csv_path.write_text(
+        "Registry,Assignment,Organization Name,Organization Address\n"
+        "MA-L,001122,Large Corp,Somewhere\n"
+        "MA-M,0011223,Medium Corp,Somewhere\n"
+        "MA-S,001122334,Small Corp,Somewhere\n"
+        "MA-L,AABBCC,Other Corp,Somewhere\n"
+    )
+    return csv_path
+
+
+def test_compiled_index_longest_prefix(tmp_path):
+    from vendor_lookup import VendorIndex, compile_vendor_index
+
+    dest = tmp_path / "vendor_index.bin"
+    assert compile_vendor_index([_registry(tmp_path)], dest) == 4
+    index = VendorIndex(dest)
+    assert len(index) == 4
+    assert index.lookup("00:11:22:33:44:55") == "Small Corp"
+    assert index.lookup("00:11:22:3F:00:00") == "Medium Corp"
+    assert index.lookup("00:11:22:40:00:00") == "Large Corp"
+    assert index.lookup("aa-bb-cc-00-00-01") == "Other Corp"
+    assert index.lookup("12:34:56:00:00:00") is None
+    assert index.lookup("12:34:56:00:00:01") is None
+    assert index.cache_info().hits == 1
+    index.close()
+
+
+def test_lookup_many_matches_lookup(tmp_path):
+    from vendor_lookup import VendorIndex, compile_vendor_index
+
+    dest = tmp_path / "vendor_index.bin"
+    compile_vendor_index([_registry(tmp_path)], dest)
+    index = VendorIndex(dest)
+    macs = [
+        "00:11:22:33:44:55",
+        "00:11:22:3F:00:00",
+        "00:11:22:40:00:00",
+        "AA:BB:CC:00:00:01",
+        "12:34:56:00:00:00",
+    ]
+    assert index.lookup_many(macs) == [index.lookup(m) for m in macs]
+    index.close()
+
+
+def test_load_vendor_index_recompiles_when_stale(tmp_path):
+    import os
+
+    import vendor_lookup
+
+    source = tmp_path / "prefixes.json"
+    source.write_text('{"001122": "First"}')
+    dest = tmp_path / "vendor_index.bin"
+    index = vendor_lookup.load_vendor_index(dest, [source])
+    assert index.lookup("00:11:22:00:00:00") == "First"
+
+    source.write_text('{"001122": "Second"}')
+    os.utime(source, (dest.stat().st_mtime + 10,) * 2)
+    index = vendor_lookup.load_vendor_index(dest, [source])
+    assert vendor_lookup.VENDOR_INDEX is index
+    assert index.lookup("00:11:22:00:00:00") == "Second"
+    index.close()
+    vendor_lookup.VENDOR_INDEX = None
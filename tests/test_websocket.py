@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from core.bus import EventBus
+from core.state import DeviceRegistry
+
+
+def _feed(**kwargs):
+    from api.websocket import DeltaFeed
+
+    bus = EventBus(maxsize=kwargs.pop("maxsize", 100))
+    state = DeviceRegistry()
+    return bus, state, DeltaFeed(bus, state, **kwargs)
+
+
+def test_deltas_coalesce_changes_per_tick():
+    async def inner():
+        bus, state, feed = _feed()
+        state.update("AA", -40, now=1.0)
+        first = feed.snapshot()
+        assert feed.delta() is None
+        for rssi in (-50, -60, -70):
+            state.update("AA", rssi, now=2.0)
+            bus.publish_nowait({"event": "changed", "address": "AA", "rssi": rssi})
+        state.update("BB", -30, now=2.0)
+        bus.publish_nowait({"event": "appeared", "address": "BB"})
+        bus.publish_nowait({"event": "lost", "address": "CC"})
+        return first, feed.delta(), feed.delta()
+
+    first, delta, empty = asyncio.run(inner())
+    assert first["type"] == "snapshot"
+    assert [d["mac"] for d in first["devices"]] == ["AA"]
+    assert delta["type"] == "delta" and delta["seq"] == 2
+    assert {d["mac"]: d["rssi"] for d in delta["devices"]} == {"AA": -70, "BB": -30}
+    assert delta["lost"] == ["CC"]
+    assert empty is None
+
+
+def test_slow_client_collapses_to_snapshot():
+    async def inner():
+        bus, state, feed = _feed(buffer=2, maxsize=2)
+        feed.push(feed.snapshot())
+        for i in range(3):
+            bus.publish_nowait({"event": "appeared", "address": f"M{i}"})
+        # the subscription dropped an event: resync instead of a delta
+        resync = feed.delta()
+        feed.push(resync)
+        bus.publish_nowait({"event": "appeared", "address": "X"})
+        feed.push(feed.delta())
+        frames = [feed._outbox.get_nowait() for _ in range(feed._outbox.qsize())]
+        return resync, frames, feed.stats()
+
+    resync, frames, stats = asyncio.run(inner())
+    assert resync["type"] == "snapshot"
+    assert [f["type"] for f in frames] == ["snapshot"]
+    assert stats["resyncs"] == 2
+
+
+def test_websocket_sends_snapshot_then_delta(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import websocket
+    from api.app import app
+
+    monkeypatch.setattr(websocket, "WS_TICK", 0.01)
+    state = DeviceRegistry()
+    state.update("AA", -40)
+    monkeypatch.setattr(websocket, "STATE", state)
+    bus = EventBus()
+    monkeypatch.setattr(websocket, "EVENT_BUS", bus)
+    with TestClient(app).websocket_connect("/ws") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["devices"][0]["mac"] == "AA"
+        state.update("AA", -55)
+        bus.publish_nowait({"event": "changed", "address": "AA"})
+        delta = ws.receive_json()
+        assert delta["type"] == "delta"
+        assert delta["devices"][0]["rssi"] == -55
@@ -1,12 +1,40 @@
-"""Vendor lookup utilities."""
+"""Vendor lookup utilities.
 
+Besides the small in-memory prefix table, vendors can be resolved from a
+compiled OUI index: a sorted binary file produced by
+:func:`compile_vendor_index` from the IEEE registry CSV (``master_mac.csv``)
+and/or ``vendor_prefixes.json``. The index is memory-mapped and searched
+with longest-prefix matching across MA-L (24-bit), MA-M (28-bit) and MA-S
+(36-bit) assignments, so startup never has to parse the full CSV.
+"""
+
+import csv
 import json
+import logging
+import mmap
+import re
+import struct
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 
 from vendor_prefixes import VENDOR_PREFIXES
 
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
 VENDOR_CACHE: Dict[str, str] = {}
+VENDOR_INDEX: Optional["VendorIndex"] = None
+
+_MAGIC = b"OUI1"
+_HEADER = struct.Struct("<4sHHI")  # magic, version, sections, names offset
+_SECTION = struct.Struct("<B3xII")  # prefix bits, entries, keys offset
+_NAME_LEN = struct.Struct("<H")
+_HEX = re.compile(r"[^0-9A-Fa-f]")
 
 
 def load_vendor_data(path: Path = Path("vendor_prefixes.json")) -> None:
@@ -23,4 +51,177 @@ def load_vendor_data(path: Path = Path("vendor_prefixes.json")) -> None:
 def lookup_vendor(mac: str) -> str:
     """Return vendor name for a MAC address if known."""
     prefix = mac.upper().replace(":", "")[:6]
-    return VENDOR_CACHE.get(prefix, "Unknown")
+    if prefix in VENDOR_CACHE:
+        return VENDOR_CACHE[prefix]
+    if VENDOR_INDEX is not None:
+        vendor = VENDOR_INDEX.lookup(mac)
+        if vendor is not None:
+            return vendor
+    return "Unknown"
+
+
+def mac_to_int(mac: str) -> int:
+    """Return the 48-bit integer value of a MAC address."""
+    return int(_HEX.sub("", mac)[:12].ljust(12, "0"), 16)
+
+
+def _read_registry(path: Path) -> Dict[str, str]:
+    """Read prefixes from an IEEE registry CSV or a prefix JSON file."""
+    if path.suffix.lower() == ".json":
+        with path.open() as f:
+            return {_HEX.sub("", k).upper(): v for k, v in json.load(f).items()}
+    prefixes: Dict[str, str] = {}
+    with path.open(newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header and "Assignment" in header:
+            col = header.index("Assignment")
+            name_col = header.index("Organization Name")
+        else:
+            # headerless "prefix,vendor" rows
+            col, name_col = 0, 1
+            if header and len(header) > 1:
+                prefixes[_HEX.sub("", header[0]).upper()] = header[1].strip()
+        for row in reader:
+            if len(row) > max(col, name_col):
+                prefixes[_HEX.sub("", row[col]).upper()] = row[name_col].strip()
+    return prefixes
+
+
+def compile_vendor_index(sources: Iterable[Path], dest: Path) -> int:
+    """Compile vendor registries into a binary index and return its size.
+
+    Later sources override earlier ones for identical prefixes.
+    """
+    prefixes: Dict[str, str] = {}
+    for source in sources:
+        if source.exists():
+            prefixes.update(_read_registry(source))
+    sections: Dict[int, List[tuple]] = {}
+    for prefix, vendor in prefixes.items():
+        if not 1 <= len(prefix) <= 12 or not vendor:
+            continue
+        bits = len(prefix) * 4
+        key = int(prefix, 16) << (48 - bits)
+        sections.setdefault(bits, []).append((key, vendor))
+
+    names: Dict[str, int] = {}
+    blob = bytearray()
+    for entries in sections.values():
+        for _, vendor in entries:
+            if vendor not in names:
+                names[vendor] = len(blob)
+                raw = vendor.encode()[:0xFFFF]
+                blob += _NAME_LEN.pack(len(raw)) + raw
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    table = bytearray()
+    body = bytearray()
+    for bits in sorted(sections, reverse=True):
+        entries = sorted(sections[bits])
+        table += _SECTION.pack(bits, len(entries), offset + len(body))
+        body += struct.pack(f"<{len(entries)}Q", *(k for k, _ in entries))
+        body += struct.pack(f"<{len(entries)}I", *(names[v] for _, v in entries))
+    names_offset = offset + len(body)
+    data = _HEADER.pack(_MAGIC, 1, len(sections), names_offset) + table + body + blob
+    tmp = dest.with_suffix(dest.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(dest)
+    return len(prefixes)
+
+
+class VendorIndex:
+    """Memory-mapped compiled OUI index with an LRU for hits and misses."""
+
+    def __init__(self, path: Path, cache_size: int = 4096) -> None:
+        self.path = path
+        self._file = path.open("rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _version, count, self._names = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a compiled vendor index")
+        self._sections = []
+        for i in range(count):
+            bits, entries, keys = _SECTION.unpack_from(
+                self._mm, _HEADER.size + i * _SECTION.size
+            )
+            mask = ((1 << bits) - 1) << (48 - bits)
+            self._sections.append((bits, entries, keys, mask))
+        self._lookup_prefix = lru_cache(maxsize=cache_size)(self._find)
+
+    def __len__(self) -> int:
+        return sum(entries for _, entries, _, _ in self._sections)
+
+    def _key(self, keys: int, i: int) -> int:
+        return struct.unpack_from("<Q", self._mm, keys + i * 8)[0]
+
+    def _name(self, keys: int, entries: int, i: int) -> str:
+        (off,) = struct.unpack_from("<I", self._mm, keys + entries * 8 + i * 4)
+        pos = self._names + off
+        (length,) = _NAME_LEN.unpack_from(self._mm, pos)
+        return self._mm[pos + 2 : pos + 2 + length].decode()
+
+    def _find(self, value: int) -> Optional[str]:
+        for _bits, entries, keys, mask in self._sections:
+            target = value & mask
+            lo, hi = 0, entries
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._key(keys, mid) < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < entries and self._key(keys, lo) == target:
+                return self._name(keys, entries, lo)
+        return None
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """Return the vendor for ``mac`` or ``None`` if unassigned."""
+        # no assignment is longer than 36 bits, so cache by that prefix
+        return self._lookup_prefix(mac_to_int(mac) & ~0xFFF)
+
+    def lookup_many(self, macs: Sequence[str]) -> List[Optional[str]]:
+        """Resolve many MACs at once, vectorised with NumPy when available."""
+        if np is None:
+            return [self.lookup(m) for m in macs]
+        values = np.array([mac_to_int(m) for m in macs], dtype=np.uint64)
+        result: List[Optional[str]] = [None] * len(macs)
+        pending = np.ones(len(macs), dtype=bool)
+        for _bits, entries, keys, mask in self._sections:
+            if not entries or not pending.any():
+                continue
+            table = np.frombuffer(self._mm, dtype="<u8", count=entries, offset=keys)
+            targets = values & np.uint64(mask)
+            pos = np.searchsorted(table, targets)
+            pos_clipped = np.minimum(pos, entries - 1)
+            hit = pending & (pos < entries) & (table[pos_clipped] == targets)
+            for i in np.nonzero(hit)[0]:
+                result[i] = self._name(keys, entries, int(pos_clipped[i]))
+            pending &= ~hit
+        return result
+
+    def cache_info(self):
+        return self._lookup_prefix.cache_info()
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+def load_vendor_index(
+    path: Path, sources: Iterable[Path] = (), cache_size: int = 4096
+) -> Optional[VendorIndex]:
+    """Open the compiled index, recompiling it only if a source is newer."""
+    global VENDOR_INDEX
+    sources = [s for s in sources if s.exists()]
+    mtime = path.stat().st_mtime if path.exists() else None
+    if sources and (mtime is None or any(s.stat().st_mtime > mtime for s in sources)):
+        count = compile_vendor_index(sources, path)
+        logger.info("Compiled %d vendor prefixes into %s", count, path)
+    if not path.exists():
+        return None
+    if VENDOR_INDEX is not None:
+        VENDOR_INDEX.close()
+    VENDOR_INDEX = VendorIndex(path, cache_size)
+    return VENDOR_INDEX